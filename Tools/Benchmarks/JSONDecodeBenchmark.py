@@ -0,0 +1,55 @@
+"""
+For comparing json decode backends on provider feed payloads.
+Each json response body held in the HTTP_CACHE folder (real provider feeds from previous runs) is decoded with every
+installed backend, and with the previous response.text plus stdlib path, and the best time of several repetitions is
+reported per feed. A synthetic storm scale Kubra ZIP report is always included so the tool is useful before the
+cache has been populated.
+"""
+
+
+def main():
+
+    from PowerOutages.doit_PowerOutage_ConditionalRequestCache import ConditionalRequestCache
+    from PowerOutages.doit_PowerOutage_JSONDecoder import JSONDecoder
+    import json
+    import time
+
+    # VARIABLES
+    repetitions = 5
+    synthetic_area_count = 50_000
+
+    def build_synthetic_report_bytes():
+        areas = [{"name": f"{20000 + index}", "cust_a": {"val": index % 50}, "cust_s": 1000 + index,
+                  "etr": "ETR-NULL", "n_out": index % 7} for index in range(synthetic_area_count)]
+        return json.dumps({"file_data": {"areas": [{"name": "MD", "areas": areas}]}}).encode("utf-8")
+
+    def gather_payloads():
+        payloads = {f"synthetic Kubra ZIP report ({synthetic_area_count} areas)": build_synthetic_report_bytes()}
+        cache = ConditionalRequestCache()
+        for entry_name, entry in cache.get_entries().items():
+            if "json" not in entry["headers"].get("content-type", ""):
+                continue
+            with open(cache.body_path(entry_name=entry_name), "rb") as file_handler:
+                payloads[entry["uri"]] = file_handler.read()
+        return payloads
+
+    def best_seconds(decode, content):
+        timings = []
+        for _ in range(repetitions):
+            start = time.perf_counter()
+            decode(content)
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+
+    # FUNCTIONALITY
+    decoders = {"json (response.text)": lambda content: json.loads(content.decode("utf-8"))}
+    decoders.update(JSONDecoder.available_backends())
+    print(f"Default backend: {JSONDecoder().backend_name}")
+    for label, content in gather_payloads().items():
+        print(f"{label} ({round(len(content) / 1024, 1)} KB)")
+        for backend_name, decode in decoders.items():
+            print(f"\t{backend_name}: {round(best_seconds(decode=decode, content=content) * 1000, 2)} ms")
+
+
+if __name__ == "__main__":
+    main()
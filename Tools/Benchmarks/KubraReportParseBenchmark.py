@@ -0,0 +1,71 @@
+"""
+For comparing the full decode and the streaming parse of a Kubra report.json.
+Builds a synthetic report, in the DEL style with a state level, at a configurable number of areas per state and
+parses it with both paths. Reports the elapsed time and the peak memory (tracemalloc) of each and confirms the two
+paths produce the same stats objects. Storm day zip reports are the largest feeds processed. The streaming path
+requires the optional ijson package.
+"""
+
+
+def main():
+
+    from PowerOutages.doit_PowerOutage_DELClasses import DEL
+    from PowerOutages.doit_PowerOutage_UtilityClass import Utility as DOIT_UTIL
+    import PowerOutages.doit_PowerOutage_CentralizedVariables as VARS
+    import json
+    import time
+    import tracemalloc
+
+    # VARIABLES
+    areas_per_state = 25_000
+    repetitions = 3
+    states = ("DE", "MD")
+
+    class ReportResponse:
+        """Stand-in for a requests response carrying the report body"""
+        def __init__(self, content):
+            self.content = content
+
+        def json(self):
+            return json.loads(self.content)
+
+    def build_report_bytes():
+        state_areas = []
+        for state in states:
+            areas = [{"name": f"{20000 + index}", "cust_a": {"val": index % 50}, "cust_s": 1000 + index,
+                      "etr": "ETR-NULL", "etr_confidence": "ETR-NULL", "n_out": index % 7, "percent_cust_a": 0}
+                     for index in range(areas_per_state)]
+            state_areas.append({"name": state, "cust_a": {"val": 0}, "cust_s": 0, "areas": areas})
+        return json.dumps({"file_title": "benchmark", "file_data": {"areas": state_areas}}).encode("utf-8")
+
+    def measure(obj, streaming_enabled):
+        # Timed without tracing because tracemalloc slows allocation heavy code. Peak memory is a separate pass.
+        VARS.kubra_streaming_parse_enabled = streaming_enabled
+        VARS.kubra_streaming_parse_minimum_bytes = 0
+        start = time.perf_counter()
+        obj.extract_outage_counts_from_report()
+        elapsed = time.perf_counter() - start
+        tracemalloc.start()
+        obj.extract_outage_counts_from_report()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return elapsed, peak
+
+    # FUNCTIONALITY
+    report_bytes = build_report_bytes()
+    print(f"Report: {len(states) * areas_per_state} areas, {round(len(report_bytes) / 1_048_576, 2)} MB")
+    results = {}
+    for label, streaming_enabled in (("full decode", False), ("streaming", True)):
+        obj = DEL(provider_abbrev="DEL", style=DOIT_UTIL.ZIP)
+        obj.data_feed_response = ReportResponse(content=report_bytes)
+        measurements = [measure(obj=obj, streaming_enabled=streaming_enabled) for _ in range(repetitions)]
+        best_seconds = min(elapsed for elapsed, peak in measurements)
+        peak_megabytes = max(peak for elapsed, peak in measurements) / 1_048_576
+        results[label] = obj.stats_objects
+        print(f"\t{label}: best of {repetitions} {round(best_seconds, 3)}s, peak memory {round(peak_megabytes, 2)} MB")
+
+    print(f"Identical stats objects: {sorted(results['full decode'], key=repr) == sorted(results['streaming'], key=repr)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+For comparing zip code classification with the ZipGeographyIndex against the previous list scans.
+A storm scale sample of zip areas (Maryland polygon and point zips, DC zips, and unknown zips) is classified both ways:
+the Maryland geometry check formerly made per zip stats object (point list plus polygon keys rebuilt as one list per
+call, then scanned) and the PEP MD/DC determination (polygon key list, then DC list, scanned). Reports the best time
+of several repetitions and the cost per record, and confirms both ways give the same answers.
+"""
+
+
+def main():
+
+    from PowerOutages.doit_PowerOutage_ZipGeographyIndex import ZipGeographyIndex
+    import PowerOutages.doit_PowerOutage_CentralizedVariables as VARS
+    import random
+    import time
+
+    # VARIABLES
+    record_count = 50_000
+    repetitions = 5
+    random.seed(1)
+
+    def build_sample_zips():
+        candidates = (list(VARS.maryland_master_inventory_zip_codes_polygon_geometry.keys())
+                      + VARS.maryland_master_inventory_zip_codes_point_geometry
+                      + VARS.district_of_columbia_zip_code_inventory_from_web
+                      + [str(zip_code) for zip_code in range(19701, 19980)])
+        return [random.choice(candidates) for _ in range(record_count)]
+
+    def list_scan_classification(zip_codes):
+        results = []
+        for zip_code in zip_codes:
+            all_maryland_zips_with_geometry_ls = VARS.maryland_master_inventory_zip_codes_point_geometry + list(
+                VARS.maryland_master_inventory_zip_codes_polygon_geometry.keys())
+            md_zips_keys_only = list(VARS.maryland_master_inventory_zip_codes_polygon_geometry.keys())
+            if zip_code in md_zips_keys_only:
+                state = "MD"
+            elif zip_code in VARS.district_of_columbia_zip_code_inventory_from_web:
+                state = "DC"
+            else:
+                state = None
+            results.append((zip_code in all_maryland_zips_with_geometry_ls, state))
+        return results
+
+    def index_classification(zip_codes):
+        index = ZipGeographyIndex()
+        return [(index.is_maryland(zip_code=zip_code),
+                 index.determine_state_abbrev(zip_code=zip_code, require_polygon_geometry=True))
+                for zip_code in zip_codes]
+
+    def best_seconds(classify, zip_codes):
+        timings = []
+        for _ in range(repetitions):
+            start = time.perf_counter()
+            result = classify(zip_codes)
+            timings.append(time.perf_counter() - start)
+        return min(timings), result
+
+    # FUNCTIONALITY
+    zip_codes = build_sample_zips()
+    print(f"Classifying {record_count} zip records")
+    results = {}
+    for label, classify in (("list scans", list_scan_classification), ("zip geography index", index_classification)):
+        seconds, results[label] = best_seconds(classify=classify, zip_codes=zip_codes)
+        print(f"\t{label}: best of {repetitions} {round(seconds, 4)}s, "
+              f"{round(seconds / record_count * 1_000_000, 3)} microseconds per record")
+    print(f"Identical classifications: {results['list scans'] == results['zip geography index']}")
+
+
+if __name__ == "__main__":
+    main()
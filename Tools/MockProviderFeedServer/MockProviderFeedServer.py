@@ -0,0 +1,382 @@
+"""
+Local mock provider feed server for load testing the process at storm scale without touching the provider feeds.
+Imitates the endpoints and formats of each provider: Kubra (BGE, DEL, PEP) metadata, configuration, and report.json
+with interval generation data and multi-zip comma separated areas, FES xml Outage elements, the CTK
+report/dataset/t/e xml, SME summaryFileData and file_data json, and the EUC json-in-xml response.
+The number of areas, outage volume, latency, and error rate are configurable. Feeds are regenerated on an interval, with
+a new Kubra interval generation data and SME directory each time, like the live feeds. A ProvidersURI config file
+pointing at the server is written on start. Point provider_uri_cfg_file in the Centralized Variables at it to run the
+process against the server.
+
+Example, 50 times normal outage volume with 10% errors:
+    python MockProviderFeedServer.py --areas 5000 --outage-scale 50 --error-rate 0.1 --latency 0.2 1.5
+"""
+
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+import PowerOutages.doit_PowerOutage_CentralizedVariables as VARS
+import argparse
+import datetime
+import gzip
+import json
+import os
+import random
+import threading
+import time
+import uuid
+
+MARYLAND_COUNTIES = ("Allegany", "Anne Arundel", "Baltimore", "Baltimore City", "Calvert", "Caroline", "Carroll",
+                     "Cecil", "Charles", "Dorchester", "Frederick", "Garrett", "Harford", "Howard", "Kent",
+                     "Montgomery", "Prince George's", "Queen Anne's", "Somerset", "St. Mary's", "Talbot", "Washington",
+                     "Wicomico", "Worcester")
+DELAWARE_COUNTIES = ("Kent", "New Castle", "Sussex")
+DELAWARE_ZIP_CODES = tuple(str(zip_code) for zip_code in range(19701, 19980))
+KUBRA_PROVIDERS = ("BGE", "DEL", "PEP")
+MARYLAND_ZIP_CODES = tuple(zip_code for zip_code in VARS.maryland_master_inventory_zip_codes_polygon_geometry.keys()
+                           if zip_code != "0")
+STYLES = ("County", "ZIP")
+
+
+class MockFeedGenerator:
+    """
+    Generates the feed bodies for every provider and style. A generation is a consistent snapshot of all feeds that
+    is replaced on an interval.
+    """
+
+    def __init__(self, area_count: int, outage_scale: float, multi_zip_fraction: float, seed: int = None):
+        self.area_count = area_count
+        self.generation = None
+        self.lock = threading.Lock()
+        self.multi_zip_fraction = multi_zip_fraction
+        self.outage_scale = outage_scale
+        self.random = random.Random(seed)
+
+    def build_area_counts(self, area_names: list) -> list:
+        """
+        Build (area, outages, customers) for each area name. Outages scale with outage_scale.
+        :param area_names: list of area names
+        :return: list of tuples
+        """
+        counts = []
+        for area_name in area_names:
+            customers = self.random.randint(500, 40000)
+            outages = min(customers, int(self.random.expovariate(1 / 20) * self.outage_scale))
+            counts.append((area_name, outages, customers))
+        return counts
+
+    def build_ctk(self, created: datetime.datetime) -> bytes:
+        """
+        Build the CTK xml with a County and a ZIP report, each with a dataset of t rows of e values.
+        :param created: generation time
+        :return: bytes
+        """
+        report_xml = []
+        for style in STYLES:
+            area_names = MARYLAND_COUNTIES if style == "County" else self.build_zip_area_names(MARYLAND_ZIP_CODES, self.area_count)
+            rows = "".join(f"<t><e>{area}</e><e>{customers}</e><e>{outages}</e></t>"
+                           for area, outages, customers in self.build_area_counts(area_names))
+            report_xml.append(f'<report id="{style}"><title>{style}</title><dataset>{rows}</dataset></report>')
+        return (f'<?xml version="1.0" encoding="UTF-8"?><root><generated date="{created:%Y-%m-%d %H:%M:%S}"/>'
+                f'{"".join(report_xml)}</root>').encode("utf-8")
+
+    def build_euc(self, created: datetime.datetime) -> bytes:
+        """
+        Build the EUC xml, a single string element holding a json list of outage events for zip 21601.
+        :param created: generation time
+        :return: bytes
+        """
+        events = [{"Count": outages, "AccountCount": customers, "ZipCode": "21601",
+                   "TimeStamp": f"{created:%m/%d/%Y %I:%M:%S %p}"}
+                  for area, outages, customers in self.build_area_counts(["21601"] * max(1, self.area_count // 100))]
+        return (f'<?xml version="1.0" encoding="utf-8"?><string xmlns="http://tempuri.org/">'
+                f'{json.dumps(events)}</string>').encode("utf-8")
+
+    def build_fes(self, style: str, created: datetime.datetime) -> bytes:
+        """
+        Build the FES xml with a ResponseHeader and an Outage element per area. County areas include non-MD counties.
+        :param style: County or ZIP
+        :param created: generation time
+        :return: bytes
+        """
+        if style == "County":
+            area_names = [f"{county}(MD)" for county in MARYLAND_COUNTIES] + ["Adams(PA)", "Preston(WV)"]
+        else:
+            area_names = self.build_zip_area_names(MARYLAND_ZIP_CODES, self.area_count)
+        tag = style.title()
+        outages_xml = "".join(f"<Outage><{tag}>{area}</{tag}><CustomersOut>{outages}</CustomersOut>"
+                              f"<CustomersServed>{customers}</CustomersServed></Outage>"
+                              for area, outages, customers in self.build_area_counts(area_names))
+        return (f'<?xml version="1.0" encoding="UTF-8"?><OutageSummary><ResponseHeader>'
+                f'<CreateDateTime>{created:%Y-%m-%dT%H:%M:%S}</CreateDateTime></ResponseHeader>'
+                f'<Outages>{outages_xml}</Outages></OutageSummary>').encode("utf-8")
+
+    @staticmethod
+    def build_kubra_area(area: str, outages: int, customers: int) -> dict:
+        """
+        Build a Kubra report area dict.
+        :return: dict
+        """
+        return {"name": area, "cust_a": {"val": outages}, "cust_s": customers, "etr": "ETR-NULL",
+                "etr_confidence": "ETR-NULL", "n_out": max(1, outages // 10) if outages else 0,
+                "percent_cust_a": {"val": round(outages / customers * 100, 2)}}
+
+    def build_kubra_report(self, provider: str, style: str) -> bytes:
+        """
+        Build a Kubra report.json. DEL reports have a state level (DE, MD). BGE and PEP reports do not, and PEP
+        includes the District of Columbia.
+        :param provider: BGE, DEL, or PEP
+        :param style: County or ZIP
+        :return: bytes
+        """
+        if provider == "DEL":
+            state_areas = {"DE": DELAWARE_COUNTIES if style == "County" else self.build_zip_area_names(DELAWARE_ZIP_CODES, self.area_count // 4),
+                           "MD": MARYLAND_COUNTIES if style == "County" else self.build_zip_area_names(MARYLAND_ZIP_CODES, self.area_count)}
+            areas = [{"name": state, "cust_a": {"val": 0}, "cust_s": 0,
+                      "areas": [MockFeedGenerator.build_kubra_area(*counts) for counts in self.build_area_counts(names)]}
+                     for state, names in state_areas.items()]
+        else:
+            if style == "County":
+                area_names = list(MARYLAND_COUNTIES) + (["District Of Columbia"] if provider == "PEP" else [])
+            else:
+                zip_codes = MARYLAND_ZIP_CODES + (tuple(VARS.district_of_columbia_zip_code_inventory_from_web) if provider == "PEP" else ())
+                area_names = self.build_zip_area_names(zip_codes, self.area_count)
+            areas = [MockFeedGenerator.build_kubra_area(*counts) for counts in self.build_area_counts(area_names)]
+        return json.dumps({"file_title": f"{provider} {style}", "file_data": {"areas": areas}}).encode("utf-8")
+
+    def build_sme(self, style: str) -> bytes:
+        """
+        Build the SME file_data json. SME serves southern Maryland so the area count is capped.
+        :param style: County or ZIP
+        :return: bytes
+        """
+        area_names = MARYLAND_COUNTIES[4:] if style == "County" else self.build_zip_area_names(MARYLAND_ZIP_CODES[:200], min(self.area_count, 200))
+        areas = [{"area_name": area, "cust_a": {"val": outages}, "cust_s": customers}
+                 for area, outages, customers in self.build_area_counts(area_names)]
+        return json.dumps({"file_data": {"areas": [{"area_name": "SMECO", "areas": areas}]}}).encode("utf-8")
+
+    def build_zip_area_names(self, zip_codes: tuple, count: int) -> list:
+        """
+        Build zip area names, cycling through the zip codes, with a fraction of them as multi-zip comma separated
+        values like those found in Kubra ZIP reports.
+        :param zip_codes: zip codes to draw from
+        :param count: number of area names
+        :return: list of str
+        """
+        area_names = []
+        for index in range(count):
+            if self.random.random() < self.multi_zip_fraction:
+                area_names.append(VARS.multi_zip_code_value_delimiter.join(
+                    self.random.sample(zip_codes, k=self.random.randint(2, 3))))
+            else:
+                area_names.append(zip_codes[index % len(zip_codes)])
+        return area_names
+
+    def get_generation(self) -> dict:
+        """
+        Get the current generation of feeds
+        :return: dict
+        """
+        with self.lock:
+            return self.generation
+
+    def regenerate(self) -> None:
+        """
+        Build a new generation of every feed body. Kubra interval generation data and the SME directory change with
+        every generation, like the live feeds.
+        :return: None
+        """
+        created = datetime.datetime.now(tz=VARS.eastern_tz)  # Providers report US/Eastern wall time
+        generation = {"created": created,
+                      "sme_directory": f"{created:%Y_%m_%d_%H_%M_%S}",
+                      "kubra_interval_generation_data": {provider: f"data/{uuid.uuid4()}" for provider in KUBRA_PROVIDERS},
+                      "bodies": {}}
+        for provider in KUBRA_PROVIDERS:
+            for style in STYLES:
+                generation["bodies"][f"{provider}_{style}"] = self.build_kubra_report(provider=provider, style=style)
+        for style in STYLES:
+            generation["bodies"][f"FES_{style}"] = self.build_fes(style=style, created=created)
+            generation["bodies"][f"SME_{style}"] = self.build_sme(style=style)
+        generation["bodies"]["CTK"] = self.build_ctk(created=created)
+        generation["bodies"]["EUC"] = self.build_euc(created=created)
+        with self.lock:
+            self.generation = generation
+        total_bytes = sum(len(body) for body in generation["bodies"].values())
+        print(f"Generated feeds {created:%H:%M:%S}: {round(total_bytes / 1_048_576, 2)} MB")
+        return None
+
+
+class MockProviderFeedHandler(BaseHTTPRequestHandler):
+    """
+    Routes requests to the generated feed bodies, after the configured latency, and fails the configured fraction of
+    requests with a retryable status code.
+    """
+
+    protocol_version = "HTTP/1.1"
+    error_rate = 0.0
+    generator = None
+    latency_range = (0.0, 0.0)
+
+    def do_GET(self):
+        """
+        Answer a GET request after the configured latency.
+        :return: None
+        """
+        time.sleep(random.uniform(*self.latency_range))
+        if random.random() < self.error_rate:
+            self.send_body(body=b"Service Unavailable", content_type="text/plain", status=random.choice((500, 503)))
+            return
+        generation = self.generator.get_generation()
+        parts = self.path.split("?")[0].strip("/").split("/")
+        try:
+            body, content_type = self.route(parts=parts, generation=generation)
+        except (KeyError, IndexError, ValueError) as e:
+            body, content_type = None, None
+        if body is None:
+            self.send_body(body=b"Not Found", content_type="text/plain", status=404)
+        else:
+            self.send_body(body=body, content_type=content_type)
+
+    def log_message(self, format, *args):
+        """
+        Silence per request logging. Override of BaseHTTPRequestHandler method.
+        :return: None
+        """
+        return None
+
+    def route(self, parts: list, generation: dict) -> tuple:
+        """
+        Map a path to a feed body. Paths follow the templates written to the ProvidersURI config file.
+        :param parts: path segments
+        :param generation: current feed generation
+        :return: tuple of body bytes and content type, or (None, None)
+        """
+        provider = parts[0].upper()
+        if provider in KUBRA_PROVIDERS:
+            if parts[1] == "currentState":
+                return json.dumps({"stormcenterDeploymentId": f"{provider.lower()}-deployment",
+                                   "updatedAt": int(generation["created"].timestamp() * 1000),
+                                   "data": {"interval_generation_data": generation["kubra_interval_generation_data"][provider]}
+                                   }).encode("utf-8"), "application/json"
+            if parts[1] == "configuration":
+                sources = [{"source": "public/reports/county_report.json"}]
+                if provider != "BGE":
+                    sources.append({"source": "public/reports/zip_report.json"})
+                return json.dumps({"config": {"reports": {"data": {"interval_generation_data": sources}}}}).encode("utf-8"), "application/json"
+            if parts[1] == "data" and parts[-1].endswith("_report.json"):
+                style = "County" if parts[-1].startswith("county") else "ZIP"
+                return generation["bodies"][f"{provider}_{style}"], "application/json"
+        elif provider == "SME":
+            if parts[1] == "metadata.json":
+                return json.dumps({"directory": generation["sme_directory"]}).encode("utf-8"), "application/json"
+            if parts[2] == "summary.json":
+                return json.dumps({"summaryFileData": {"date_generated": f"{generation['created']:%Y-%m-%dT%H:%M:%S}"}}).encode("utf-8"), "application/json"
+            return generation["bodies"][f"SME_{'County' if parts[2] == 'county.json' else 'ZIP'}"], "application/json"
+        elif provider == "FES":
+            return generation["bodies"][f"FES_{'County' if parts[1] == 'county.xml' else 'ZIP'}"], "text/xml; charset=utf-8"
+        elif provider in ("CTK", "EUC"):
+            return generation["bodies"][provider], "text/xml; charset=utf-8"
+        return None, None
+
+    def send_body(self, body: bytes, content_type: str, status: int = 200) -> None:
+        """
+        Send the body, gzip compressed when the client accepts it.
+        :param body: response body
+        :param content_type: content type header value
+        :param status: http status code
+        :return: None
+        """
+        headers = {"Content-Type": content_type}
+        if status == 200 and "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body, compresslevel=1)
+            headers["Content-Encoding"] = "gzip"
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        return None
+
+
+def write_providers_uri_config(file_path: str, base_uri: str) -> None:
+    """
+    Write a ProvidersURI config file whose feed uris point at the mock server. Sections and value order match those
+    read by main(): metadata, data, date created, and for Kubra configuration, instance id, view id, report id.
+    :param file_path: path of the config file to write
+    :param base_uri: server uri, example http://127.0.0.1:8080
+    :return: None
+    """
+    sections = []
+    for provider in KUBRA_PROVIDERS:
+        for style in STYLES:
+            sections.append((f"{provider}_{style}", [
+                ("metadata_feed_uri", f"{base_uri}/{provider}/currentState"),
+                ("data_feed_uri", f"{base_uri}/{provider}/{{interval_generation_data}}/{{source}}"),
+                ("date_created_feed_uri", f"{base_uri}/{provider}/currentState"),
+                ("configuration_url", f"{base_uri}/{provider}/configuration/{{instance_id}}/{{view_id}}/{{deployment_id}}"),
+                ("instance_id", f"{provider.lower()}-instance"),
+                ("view_id", f"{provider.lower()}-view"),
+                ("report_id", style.lower())]))
+    for style in STYLES:
+        sections.append((f"SME_{style}", [
+            ("metadata_feed_uri", f"{base_uri}/SME/metadata.json"),
+            ("data_feed_uri", f"{base_uri}/SME/{{metadata_key}}/{style.lower()}.json"),
+            ("date_created_feed_uri", f"{base_uri}/SME/{{metadata_key}}/summary.json")]))
+        sections.append((f"FES_{style}", [("metadata_feed_uri", "NA"),
+                                          ("data_feed_uri", f"{base_uri}/FES/{style.lower()}.xml"),
+                                          ("date_created_feed_uri", "NA")]))
+        for provider in ("CTK", "EUC"):
+            sections.append((f"{provider}_{style}", [("metadata_feed_uri", "NA"),
+                                                     ("data_feed_uri", f"{base_uri}/{provider}/outages.xml"),
+                                                     ("date_created_feed_uri", "NA")]))
+    with open(file_path, "w") as file_handler:
+        for section, values in sections:
+            file_handler.write(f"[{section}]\n")
+            for name, value in values:
+                file_handler.write(f"{name} = {value.replace('%', '%%')}\n")
+            file_handler.write("\n")
+    return None
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Local mock provider feed server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--areas", type=int, default=500, help="zip areas per ZIP report (DEL adds a quarter for DE)")
+    parser.add_argument("--outage-scale", type=float, default=1.0, help="multiplier on outage counts per area")
+    parser.add_argument("--multi-zip-fraction", type=float, default=0.05, help="fraction of multi-zip zip areas")
+    parser.add_argument("--latency", type=float, nargs=2, default=(0.0, 0.0), metavar=("MIN", "MAX"),
+                        help="seconds of latency added to each response, drawn uniformly")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests failed with 500/503")
+    parser.add_argument("--regenerate-seconds", type=float, default=900, help="feed regeneration interval")
+    parser.add_argument("--seed", type=int, default=None, help="random seed for repeatable feed content")
+    parser.add_argument("--config-path", default=os.path.join(os.path.dirname(__file__), "doit_PowerOutage_ProviderURI_Mock.cfg"))
+    args = parser.parse_args()
+
+    generator = MockFeedGenerator(area_count=args.areas, outage_scale=args.outage_scale,
+                                  multi_zip_fraction=args.multi_zip_fraction, seed=args.seed)
+    generator.regenerate()
+
+    def regenerate_on_interval():
+        while True:
+            time.sleep(args.regenerate_seconds)
+            generator.regenerate()
+
+    threading.Thread(target=regenerate_on_interval, daemon=True).start()
+
+    MockProviderFeedHandler.error_rate = args.error_rate
+    MockProviderFeedHandler.generator = generator
+    MockProviderFeedHandler.latency_range = tuple(args.latency)
+    server = ThreadingHTTPServer((args.host, args.port), MockProviderFeedHandler)
+    write_providers_uri_config(file_path=args.config_path, base_uri=f"http://{args.host}:{server.server_port}")
+    print(f"Serving mock provider feeds on http://{args.host}:{server.server_port}\n"
+          f"ProvidersURI config written to {args.config_path}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt as ki:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,7 @@ The archive process is no longer vital to the production application since movin
 from dataclasses import dataclass
 from datetime import datetime
 from decimal import Decimal
+import pyodbc
 import PowerOutages.doit_PowerOutage_CentralizedVariables as VARS
 
 
@@ -17,10 +18,14 @@ class ArchiveCounty:
     Object for storing and processing data from real time form to archive form.
 
     The methods are used to get data from a view, create data class objects of that data, and then insert into the
-    county archive table.
+    county archive table. The set based method does the same transfer inside the database with one INSERT...SELECT,
+    and the row by row methods remain as the fallback.
     """
     def __init__(self):
+        self.county_archive_inserted_count = 0
         self.county_archive_record_objects_list = None
+        self.sql_count_counties_viewforarchive = VARS.sql_count_counties_viewforarchive
+        self.sql_insert_county_archive_from_view = VARS.sql_insert_county_archive_from_view
         self.sql_insert_record_county_archive = VARS.sql_insert_record_county_archive
 
     def build_list_of_archive_data_record_objects(self, selection) -> None:
@@ -52,6 +57,43 @@ class ArchiveCounty:
                 percentage=round(record_obj.percentage, 3))
             yield sql
 
+    def insert_archive_records_set_based(self, db_obj) -> bool:
+        """
+        Insert the view records into the county archive table with a single server side INSERT...SELECT, rounding the
+        percentage in sql, so no records travel to Python and back.
+        The view records are counted first and the insert is committed only if its row count matches. Otherwise, or if
+        the insert raises a database error such as a value too long for a field, the insert is rolled back and False is
+        returned so the row by row process can be used instead.
+        :param db_obj: DatabaseUtilities object with an established connection
+        :return: bool True if the records were inserted and verified, False otherwise
+        """
+        try:
+            db_obj.create_database_cursor()
+            db_obj.execute_sql_statement(sql_statement=self.sql_count_counties_viewforarchive)
+            db_obj.fetch_all_from_selection()
+            view_count = db_obj.selection[0][0]
+            db_obj.cursor.execute(self.sql_insert_county_archive_from_view)
+            inserted_count = db_obj.cursor.rowcount
+        except pyodbc.DataError as de:
+            print(f"ARCHIVE County set based insert. A value exceeds the field length allowed in the archive table. "
+                  f"Rolled back. {de}")
+            db_obj.connection.rollback()
+            return False
+        except pyodbc.Error as pe:
+            print(f"ARCHIVE County set based insert. Database operation error. Rolled back. {pe}")
+            db_obj.connection.rollback()
+            return False
+        finally:
+            db_obj.delete_cursor()
+        if inserted_count != view_count:
+            print(f"ARCHIVE County set based insert. {inserted_count} records inserted but the view has {view_count}. "
+                  f"Rolled back.")
+            db_obj.connection.rollback()
+            return False
+        db_obj.commit_changes()
+        self.county_archive_inserted_count = inserted_count
+        return True
+
 
 class ArchiveZIP:
     """
@@ -67,14 +109,16 @@ class ArchiveZIP:
         """
         Build the insert sql statement for archive data and yield the statement.
         For ZIP archive data. Uses a master dictionary of ZipCodeCountAggregated objects meant to aggregate outage
-        counts for zip codes covered by multiple providers
+        counts for zip codes covered by multiple providers. A date created that could not be groomed (None) is
+        written as NULL.
         :return: None
         """
         for aggregated_count_obj in self.master_aggregated_zip_count_objects_dict.values():
+            date_created = "NULL" if aggregated_count_obj.date_created is None else f"'{aggregated_count_obj.date_created}'"
             sql = self.sql_insert_record_zip_archive.format(area=aggregated_count_obj.area,
                                                             abbrev=aggregated_count_obj.abbrev,
                                                             outages=aggregated_count_obj.outages,
-                                                            date_created=aggregated_count_obj.date_created,
+                                                            date_created=date_created,
                                                             date_updated=aggregated_count_obj.date_updated
                                                             )
             yield sql
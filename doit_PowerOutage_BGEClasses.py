@@ -5,6 +5,7 @@ peculiarities of the BGE outage data not common to the other Kubra feeds.
 
 from PowerOutages.doit_PowerOutage_UtilityClass import Utility as DOIT_UTIL
 from PowerOutages.doit_PowerOutage_Kubra_ParentClass import KubraParent
+import io
 import PowerOutages.doit_PowerOutage_CentralizedVariables as VARS
 
 
@@ -15,6 +16,7 @@ class BGE(KubraParent):
 
     def __init__(self, provider_abbrev, style):
         super(BGE, self).__init__(provider_abbrev=provider_abbrev, style=style)
+        self.configuration_feed_required = self.style != DOIT_UTIL.ZIP  # ZIP report_id is fixed, see extract_source_report()
         self.outages_list = None
         self.report_str_template = VARS.bge_report_string_tempiate
 
@@ -30,7 +32,7 @@ class BGE(KubraParent):
         if self.style == DOIT_UTIL.ZIP:
             source_data = self.report_str_template.format(report_id=self.report_id)
         else:
-            configuration_json = self.configuration_feed_response.json()
+            configuration_json = self.decode_json_response(response=self.configuration_feed_response)
             config_data = DOIT_UTIL.extract_attribute_from_dict(data_dict=configuration_json,
                                                                 attribute_name="config")
             reports_data = DOIT_UTIL.extract_attribute_from_dict(data_dict=config_data,
@@ -61,3 +63,15 @@ class BGE(KubraParent):
         # Need to store the dicts with state key to make states_outages_list_dict
         self.state_to_data_list_dict = {"MD": self.area_list}
         return
+
+    def generate_area_dicts_from_report_stream(self):
+        """
+        Stream the report.json response body and yield each area dict with the MD state abbreviation.
+        BGE reports have no state level and all areas are assumed to be in Maryland, see
+        extract_area_outage_lists_by_state().
+        Overload of Kubra_ParentClass method.
+        :return: generator of (state abbreviation, area dict) tuples
+        """
+        report_stream = io.BytesIO(self.data_feed_response.content)
+        for area_dict in KubraParent.generate_top_level_area_dicts_from_stream(report_stream=report_stream):
+            yield "MD", area_dict
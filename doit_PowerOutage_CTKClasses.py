@@ -1,10 +1,14 @@
 """
 Module contains a CTK class that inherits from Provider class. CTK class is an implementation specific to the
 peculiarities of the CTK feeds and the processing they require that is not common to all providers.
+The xml feed is read as a stream, one dataset row (t element) at a time, so memory does not grow with the size of the
+feed.
 """
 
+from PowerOutages.doit_PowerOutage_ExtractionSpecs import ExtractionSpec
 from PowerOutages.doit_PowerOutage_UtilityClass import Utility as DOIT_UTIL
 from PowerOutages.doit_PowerOutage_ProviderClasses import Outage
+from PowerOutages.doit_PowerOutage_ProviderClasses import OutageBatch
 from PowerOutages.doit_PowerOutage_ProviderClasses import Provider
 
 
@@ -13,63 +17,54 @@ class CTK(Provider):
     CTK specific functionality and variables for handling CTK feed data. Inherits from Provider.
     """
 
+    # Dataset rows are positional e elements: area, customers, affected
+    ROW_EXTRACTION_SPEC = ExtractionSpec(fields={"area": "e[1]", "customers": "e[2]", "outages": "e[3]"},
+                                         record_format=ExtractionSpec.XML,
+                                         constants={"state": DOIT_UTIL.MARYLAND})
+
     def __init__(self, provider_abbrev, style):
         super().__init__(provider_abbrev=provider_abbrev, style=style)
-        self.xml_element = None
-        self.outage_report = None
-        self.outage_dataset = None
         self.grouped_zipcodes_dict = None
 
-    def extract_date_created(self) -> None:
+    def create_stat_object_from_row_element(self, element, record_index: int):
         """
-        Extract the date created from the xml response content
-        :return: None
+        Extract the area, customer count, and affected count from a dataset row (t element) and build a stat object.
+        :param element: completed t ET.Element
+        :param record_index: position of the row in the dataset, for error reporting
+        :return: Outage, or None if a field is missing
         """
-        date_generated = DOIT_UTIL.extract_first_immediate_child_feature_from_element(element=self.xml_element,
-                                                                                      tag_name="generated")
-        date_dict = date_generated.attrib
-        self.date_created = DOIT_UTIL.extract_attribute_from_dict(data_dict=date_dict, attribute_name="date")
-        return
+        values = CTK.ROW_EXTRACTION_SPEC.extract(record=element, record_index=record_index,
+                                                 errors=self.extraction_errors)
+        if values is None:
+            return None
+        return Outage(abbrev=self.abbrev, style=self.style, **values)
 
-    def extract_outage_counts_from_dataset(self) -> None:
+    def extract_outage_counts_and_date_created(self) -> None:
         """
-        Extract the outage counts from the outage dataset xml and build stat objects to store the data.
+        Stream the xml response and build a stat object from each row of the dataset of the report whose id matches
+        the style, as each row completes. Extract the date created from the generated element.
         :return: None
         """
-        list_of_stats_objects = []
-        t_elements = DOIT_UTIL.extract_all_immediate_child_features_from_element(element=self.outage_dataset,
-                                                                                 tag_name="t")
-        area_index, customers_index, affected_index = (0, 1, 2)
-        for t in t_elements:
-            e_list = DOIT_UTIL.extract_all_immediate_child_features_from_element(element=t, tag_name="e")
-            list_of_stats_objects.append(Outage(abbrev=self.abbrev,
-                                                style=self.style,
-                                                area=e_list[area_index].text,
-                                                outages=e_list[affected_index].text,
-                                                customers=e_list[customers_index].text,
-                                                state=DOIT_UTIL.MARYLAND))
-        self.stats_objects = list_of_stats_objects
-        return
+        stats_objects = OutageBatch()
+        row_count = 0
+        style_report = None
+        for ancestors, element in DOIT_UTIL.generate_completed_xml_elements(
+                response_content=self.data_feed_response.content, tag_names=("generated", "report", "t")):
+            if element.tag == "generated" and len(ancestors) == 1:
+                date_dict = element.attrib
+                self.date_created = DOIT_UTIL.extract_attribute_from_dict(data_dict=date_dict, attribute_name="date")
+            elif element.tag == "t" and ancestors[-1].tag == "dataset" and ancestors[-2].tag == "report":
+                report = ancestors[-2]
+                if style_report is None and report.get("id", "").lower() == self.style.lower():
+                    style_report = report
+                if report is style_report:
+                    stat_obj = self.create_stat_object_from_row_element(element=element,
+                                                                        record_index=row_count)
+                    row_count += 1
+                    if stat_obj is not None:
+                        stats_objects.append(outage=stat_obj)
 
-    def extract_outage_dataset(self) -> None:
-        """
-        Extract the outage dataset from xml.
-        :return: None
-        """
-        self.outage_dataset = DOIT_UTIL.extract_first_immediate_child_feature_from_element(element=self.outage_report,
-                                                                                           tag_name="dataset")
-        if len(self.outage_dataset) == 0:
+        if row_count == 0:
             print(f"No {self.abbrev}_{self.style} dataset values in feed.\n\tResponse value: {self.data_feed_response}")
-        return
-
-    def extract_report_by_id(self) -> None:
-        """
-        Extract the data report based on id.
-        :return: None
-        """
-        style_id = self.style
-        for report in self.xml_element.iter("report"):
-            if report.attrib["id"].lower() == style_id.lower():
-                self.outage_report = report
-                return
+        self.stats_objects = stats_objects
         return
@@ -15,10 +15,15 @@ from pytz import timezone
 import os
 
 _root_project_path = os.path.dirname(__file__)
+archive_county_set_based_enabled = True  # True archives counties with one INSERT...SELECT, False row by row in Python
 bge_report_string_tempiate = "public/reports/{report_id}_report.json"
 # credentials_cfg_file = "doit_PowerOutage_Credentials - PROD.cfg"  # PRODUCTION
 credentials_cfg_file = "doit_PowerOutage_Credentials - DEV.cfg"  # DEVELOPMENT
+database_bulk_insert_batch_size = 1000  # Rows per parameterized executemany call for the realtime tables
+database_concurrent_writers = 1  # Threads writing realtime deltas on pooled connections. 1 publishes serially in one transaction
+database_connection_pool_size = 4  # Maximum open connections, the main connection plus the realtime writers
 database_connection_string = "DSN={database_name};UID={database_user};PWD={database_password}"
+database_deadlock_retry_attempts = 2  # Retries of a realtime writer chosen as a deadlock victim
 database_flag = -9999
 date_time_field_name = "dt_stamp"
 datetime_format_str_naive = '%Y-%m-%dT%H:%M:%S'
@@ -61,7 +66,18 @@ district_of_columbia_zip_code_inventory_from_web = ['20001', '20002', '20003', '
                                            '56901', '56902', '56904', '56908', '56915', '56920', '56933', '56935',
                                            '56944', '56945', '56950', '56965', '56967', '56972', '56998', '56999']
 eastern_tz = timezone('US/Eastern')
+fetch_engine_max_requests_per_host = 4
+fetch_engine_max_workers = 16
+fetch_phase_deadline_seconds = 300  # Bounds the fetch phase within the 15 minute run cadence
 kubra_feed_providers = ["PEP", "DEL", "BGE"]
+kubra_incremental_mode_enabled = True
+kubra_incremental_state_file_name = "kubra_incremental_state.json"
+kubra_streaming_parse_enabled = True  # Requires the optional ijson package, otherwise the full decode is used
+kubra_streaming_parse_minimum_bytes = 32 * 1024 * 1024  # Smaller reports use the full decode, about 3x less cpu
+http_cache_directory = "HTTP_CACHE"
+http_cache_enabled = True
+http_cache_max_bytes = 250 * 1024 * 1024
+json_decode_backend = None  # None uses the fastest installed of orjson, ujson, json. Or name one of them.
 json_file_local_location_and_name = "JSON_Outputs\PowerOutageFeeds_StatusJSON.json"
 less_than_five = "Less than 5"
 
@@ -299,9 +315,27 @@ maryland_master_inventory_zip_codes_polygon_geometry = {'0': 'Assateague Island'
                                                         '21918': 'Conowingo',
                                                         '21919': 'Earleville', '21921': 'Elkton'}
 multi_zip_code_value_delimiter = ","
+multi_zip_split_cache_file_name = "multi_zip_split_cache.json"
+multi_zip_split_cache_max_entries = 50_000  # Least recently used multi-value zip strings beyond this are dropped
 multiple_providers = "MULTI"
 none_and_not_available = (None, "NA")
+parse_pool_cpu_timeout_seconds = 60  # Per provider response. Enforced in the worker where SIGPROF timers exist (not Windows)
+parse_pool_enabled = False  # True fans response processing out to a process pool, False processes serially in main
+parse_pool_phase_timeout_seconds = 180  # Results not returned by then are abandoned and their workers terminated
+parse_pool_processes = None  # None uses the number of cpus, capped at the number of responses to process
 provider_uri_cfg_file = "doit_PowerOutage_ProviderURI.cfg"
+realtime_columns_by_style = {"County": "STATE, COUNTY, OUTAGE, PROVIDER, UPDATED, CREATED",
+                             "ZIP": "ZIPCODE, PROVIDER, OUTAGE, CREATED, UPDATED"}
+realtime_key_conditions_by_style = {"County": "STATE = ? AND COUNTY = ?",
+                                    "ZIP": "ZIPCODE = ?"}
+realtime_publish_mode = "staged_swap"  # "staged_swap" all providers at once, "delta" changed records only, or "per_provider"
+realtime_select_fields_by_style = {"County": "STATE, COUNTY, OUTAGE",
+                                   "ZIP": "ZIPCODE, OUTAGE"}
+realtime_staging_table_name_by_style = {"County": "#RealTime_PowerOutagesCounty_Staging",
+                                        "ZIP": "#RealTime_PowerOutagesZipcodes_Staging"}
+realtime_table_name_by_style = {"County": "dbo.RealTime_PowerOutagesCounty",
+                                "ZIP": "dbo.RealTime_PowerOutagesZipcodes"}
+run_state_directory = "RUN_STATE"
 sme_customer_count_database_location_and_name = "SME_Customer_Count_Memory_DB\SME_Customer_Count_Memory_DB.db"
 sme_database_table_name = "SME_Customer_Count_Memory"
 # sql_create_county_table_sme_sqlite3 = textwrap.dedent(
@@ -312,10 +346,32 @@ sme_database_table_name = "SME_Customer_Count_Memory"
 #         Last_Updated text
 #     )"""
 # )
+sql_count_counties_viewforarchive = textwrap.dedent(
+    """SELECT COUNT(*) 
+    FROM dbo.PowerOutages_PowerOutagesViewForArchive 
+    WHERE state is not Null"""
+)
+sql_create_realtime_staging_table = textwrap.dedent(
+    """SELECT TOP 0 {columns} INTO {staging_table_name} 
+    FROM {table_name}"""
+)
+sql_database_health_check = "SELECT 1"
+sql_delete_realtime_by_providers = textwrap.dedent(
+    """DELETE FROM {table_name} 
+    WHERE PROVIDER IN ({provider_markers})"""
+)
+sql_delete_realtime_delta_record = textwrap.dedent(
+    """DELETE FROM {table_name} 
+    WHERE PROVIDER = ? AND {key_conditions}"""
+)
 sql_delete_statement = textwrap.dedent(
     """DELETE FROM dbo.RealTime_PowerOutages{style} 
     WHERE PROVIDER = '{provider_abbrev}'"""
 )
+sql_drop_realtime_staging_table = textwrap.dedent(
+    """IF OBJECT_ID('tempdb..{staging_table_name}') IS NOT NULL 
+    DROP TABLE {staging_table_name}"""
+)
 # sql_insert_into_county_table_sme_sqlite3 = textwrap.dedent(
 #     """INSERT INTO {table_name} VALUES (
 #         Null,
@@ -324,6 +380,23 @@ sql_delete_statement = textwrap.dedent(
 #         '{date_updated}'
 #     )"""
 # )
+sql_insert_county_archive_from_view = textwrap.dedent(
+    """INSERT INTO dbo.Archive_PowerOutagesCounty(
+            STATE, 
+            COUNTY, 
+            Outage, 
+            updated, 
+            archived, 
+            percentage
+        ) 
+        SELECT state, county, outage, updated, updated, ROUND(percentage, 3) 
+        FROM dbo.PowerOutages_PowerOutagesViewForArchive 
+        WHERE state is not Null"""
+)
+sql_insert_realtime_from_staging = textwrap.dedent(
+    """INSERT INTO {table_name}({columns}) 
+    SELECT {columns} FROM {staging_table_name}"""
+)
 sql_insert_record_county_archive = textwrap.dedent(
     """INSERT INTO dbo.Archive_PowerOutagesCounty(
             STATE, 
@@ -343,7 +416,7 @@ sql_insert_record_county_archive = textwrap.dedent(
         )"""
 )
 sql_insert_record_county_realtime = textwrap.dedent(
-    """INSERT INTO dbo.RealTime_PowerOutagesCounty(
+    """INSERT INTO {table_name}(
             STATE, 
             COUNTY, 
             OUTAGE, 
@@ -351,14 +424,7 @@ sql_insert_record_county_realtime = textwrap.dedent(
             UPDATED, 
             CREATED
         ) 
-        VALUES (
-            '{state}',
-            '{county}',
-            {outages},
-            '{abbrev}',
-            '{date_updated}',
-            '{date_created}'
-        )"""
+        VALUES (?, ?, ?, ?, ?, ?)"""
 )
 sql_insert_record_zip_archive = textwrap.dedent(
     """INSERT INTO dbo.Archive_PowerOutagesZipcode(
@@ -375,26 +441,20 @@ sql_insert_record_zip_archive = textwrap.dedent(
             'NULL',
             '{abbrev}',
             {outages},
-            '{date_created}',
+            {date_created},
             '{date_updated}',
             '{date_updated}'
         )"""
 )
 sql_insert_record_zip_realtime = textwrap.dedent(
-    """INSERT INTO dbo.RealTime_PowerOutagesZipcodes(
+    """INSERT INTO {table_name}(
             ZIPCODE, 
             PROVIDER, 
             OUTAGE, 
             CREATED, 
             UPDATED
         ) 
-        VALUES (
-            '{area}',
-            '{abbrev}',
-            {outages},
-            '{date_created}',
-            '{date_updated}'
-        )"""
+        VALUES (?, ?, ?, ?, ?)"""
 )
 sql_select_by_provider_abbrev_realtime = textwrap.dedent(
     """SELECT {fields} FROM dbo.RealTime_PowerOutages{style}
@@ -418,10 +478,43 @@ sql_update_customer_counts_table = textwrap.dedent(
     SET Customers = {cust_count} 
     WHERE County = '{area}'"""
 )
+sql_update_realtime_delta_outage = textwrap.dedent(
+    """UPDATE {table_name} SET OUTAGE = ? 
+    WHERE PROVIDER = ? AND {key_conditions}"""
+)
+sql_update_realtime_provider_dates = textwrap.dedent(
+    """UPDATE {table_name} SET CREATED = ?, UPDATED = ? 
+    WHERE PROVIDER = ? AND (CREATED IS NULL OR CREATED <> ?)"""
+)
+sql_update_realtime_provider_dates_null_created = textwrap.dedent(
+    """UPDATE {table_name} SET CREATED = NULL, UPDATED = ? 
+    WHERE PROVIDER = ? AND CREATED IS NOT NULL"""
+)
 sql_update_task_tracking_table = textwrap.dedent(
     """UPDATE dbo.RealTime_TaskTracking SET lastRun = '{now}',
     DataGenerated = '{now}' WHERE taskName = 'PowerOutage'"""
 )
+web_accept_encoding = "gzip, deflate"
+web_adaptive_timeout_multiplier = 4
+web_default_pool_size = 2
+web_fixture_directory = "FIXTURES"
+web_fixture_mode = None  # None for live runs, "record" to record provider responses, or "replay" to serve them back
+web_fixture_name = None  # Record: None names the fixture by timestamp. Replay: None uses the latest recorded fixture
+web_latency_history_file_name = "web_latency_history.json"
+web_latency_history_size = 20
+web_minimum_read_timeout_seconds = 5
+web_pool_sizes_by_host = {"kubra.io": 10,  # BGE, DEL, PEP County and ZIP metadata, configuration, and report requests
+                          "firstenergycorp.com": 4,
+                          "smeco.coop": 4}
+web_retry_attempts = 3
+web_retry_backoff_base_seconds = 1
+web_retry_backoff_max_seconds = 10
+web_retry_status_codes = (429, 500, 502, 503, 504)
+web_timeouts_by_feed_type = {"metadata": (5, 20),  # (connect seconds, read seconds ceiling)
+                             "date_created": (5, 20),
+                             "configuration": (5, 20),
+                             "data": (5, 90),
+                             "default": (5, 60)}
 
 # sql_update_customers_table_sme_sqlite3 = textwrap.dedent(
 #     """UPDATE SME_Customer_Count_Memory
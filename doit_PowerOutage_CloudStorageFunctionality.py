@@ -11,13 +11,13 @@ Revisions:
 """
 
 
+from PowerOutages.doit_PowerOutage_Timestamps import RunClock
 from PowerOutages.doit_PowerOutage_UtilityClass import Utility as DOIT_UTIL
 import PowerOutages.doit_PowerOutage_CentralizedVariables as VARS
 import datetime
 from sodapy import Socrata
 import arcgis
 import configparser
-import dataclasses
 import pandas as pd
 import time
 import types
@@ -37,7 +37,7 @@ class CloudStorage:
         self.grouped_sums_df = None
         self.master_groupby_area = None
         self.master_outages_df = None
-        self.outages_as_record_dicts_list = []
+        self.outage_dataframes_list = []
         self.cloud_acceptable_process_run_dt_str = None
         self.zipcode_outage_records_df = None
         self.zipcode_zipper = None
@@ -70,11 +70,15 @@ class CloudStorage:
     def create_feed_status_dataframe(self, status_check_output: dict) -> None:
         """
         Create a pandas dataframe from a dict of provider feed status checks.
-        Function creates dataframe, transposes data, resets index, and renames column before returning.
+        Function creates dataframe, transposes data, resets index, renames column, and drops the transfer statistics
+        before returning.
         :param status_check_output: dict of feed status check information
         :return: None
         """
         self.feed_status_df = pd.DataFrame(data=status_check_output).transpose().reset_index().rename(columns={"index": "prov_style"})
+
+        # Transfer statistics are for the json output file only and are not a column in the open data asset
+        self.feed_status_df.drop(columns=["transfer"], errors="ignore", inplace=True)
         return None
 
     @staticmethod
@@ -89,21 +93,22 @@ class CloudStorage:
 
     def create_master_outage_dataframe(self) -> None:
         """
-        Create pandas dataframe from list of outage dicts
+        Create pandas dataframe from the list of provider outage dataframes
         :return: None
         """
-        self.master_outages_df = pd.DataFrame.from_records(data=self.outages_as_record_dicts_list,
-                                                           columns=["style", "area", "outages", "customers"])
+        self.master_outages_df = pd.concat(objs=self.outage_dataframes_list,
+                                           ignore_index=True)[["style", "area", "outages", "customers"]]
         return None
 
     def create_outage_records(self, provider_objects: dict) -> None:
         """
-        Create a list of outage record dicts from the provider objects
+        Create a list of outage dataframes, one per provider object, from the stats objects batch columns
+        Style is exported as str rather than categorical so that groupby on style does not produce unobserved groups.
         :param provider_objects: dict of provider objects
         :return: None
         """
         for obj in provider_objects.values():
-            self.outages_as_record_dicts_list.extend([dataclasses.asdict(stat_obj) for stat_obj in obj.stats_objects])
+            self.outage_dataframes_list.append(obj.stats_objects.to_dataframe(categorical=False))
         return None
 
     def create_unique_id_feed_status(self) -> None:
@@ -202,7 +207,7 @@ class CloudStorage:
         :param value: required but not used
         :return: None
         """
-        self.__cloud_acceptable_dt_string = DOIT_UTIL.current_date_time_str().replace(" ", "T")
+        self.__cloud_acceptable_dt_string = RunClock.date_time_str().replace(" ", "T")
 
 
 class OpenData:
@@ -0,0 +1,217 @@
+"""
+Module containing a ConditionalRequestCache class for an on-disk http cache that persists between runs.
+Providers do not regenerate every feed between runs. Response bodies are stored with their validators (ETag and
+Last-Modified) and later requests for the same uri send If-None-Match/If-Modified-Since. A 304 Not Modified response
+means the cached body is reused instead of re-downloading the feed. The store is size capped and the least recently
+used entries are evicted when the cap is exceeded.
+"""
+
+from requests.structures import CaseInsensitiveDict
+import PowerOutages.doit_PowerOutage_CentralizedVariables as VARS
+import hashlib
+import json
+import os
+import requests
+import threading
+import time
+
+
+class ConditionalRequestCache:
+    """
+    On-disk store of response bodies and validators, keyed by request, used by the web layer for conditional GETs.
+    An index json file holds the validators, headers, size, and last use time of each entry. Bodies are stored as
+    individual files named by the hash of the request key.
+    """
+
+    INDEX_FILE_NAME = "index.json"
+    STORED_HEADERS = ("content-type", "date", "etag", "last-modified")
+
+    def __init__(self, cache_directory: str = None, max_bytes: int = VARS.http_cache_max_bytes):
+        self.cache_directory = os.path.join(VARS._root_project_path, VARS.http_cache_directory) if cache_directory is None else cache_directory
+        self.entries = None
+        self.lock = threading.Lock()
+        self.max_bytes = max_bytes
+        self.not_modified_count = 0
+
+    @property
+    def index_path(self) -> str:
+        """
+        Get the path to the index json file
+        :return: str path
+        """
+        return os.path.join(self.cache_directory, ConditionalRequestCache.INDEX_FILE_NAME)
+
+    def body_path(self, entry_name: str) -> str:
+        """
+        Get the path to the body file of an entry
+        :param entry_name: name from build_entry_name()
+        :return: str path
+        """
+        return os.path.join(self.cache_directory, f"{entry_name}.body")
+
+    @staticmethod
+    def build_entry_name(key) -> str:
+        """
+        Build a file system safe name for a request key.
+        :param key: request key, example ('GET', uri, payload repr)
+        :return: str hex digest
+        """
+        return hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+
+    def conditional_headers(self, key) -> dict:
+        """
+        Build the conditional request headers for a request key using the stored validators, if any.
+        :param key: request key
+        :return: dict of If-None-Match and/or If-Modified-Since headers, empty if nothing is cached
+        """
+        entry = self.get_entries().get(ConditionalRequestCache.build_entry_name(key))
+        if entry is None:
+            return {}
+        headers = {}
+        if entry["headers"].get("etag"):
+            headers["If-None-Match"] = entry["headers"]["etag"]
+        if entry["headers"].get("last-modified"):
+            headers["If-Modified-Since"] = entry["headers"]["last-modified"]
+        return headers
+
+    def evict_least_recently_used(self) -> None:
+        """
+        Evict the least recently used entries until the total size of stored bodies is within the cap.
+        Caller must hold the lock.
+        :return: None
+        """
+        total_bytes = sum(entry["size"] for entry in self.entries.values())
+        for entry_name, entry in sorted(self.entries.items(), key=lambda item: item[1]["last_used"]):
+            if total_bytes <= self.max_bytes:
+                break
+            self.remove_entry(entry_name=entry_name)
+            total_bytes -= entry["size"]
+        return None
+
+    def get_entries(self) -> dict:
+        """
+        Get the index entries, loading the index file on first use.
+        :return: dict of entry name to entry dict
+        """
+        with self.lock:
+            if self.entries is None:
+                self.entries = self.load_index()
+            return self.entries
+
+    def load_index(self) -> dict:
+        """
+        Load the index json file. Entries whose body file is missing are dropped.
+        :return: dict of entry name to entry dict
+        """
+        try:
+            with open(self.index_path, "r") as file_handler:
+                entries = json.load(file_handler)
+        except (FileNotFoundError, ValueError) as e:
+            return {}
+        return {name: entry for name, entry in entries.items() if os.path.exists(self.body_path(entry_name=name))}
+
+    def remove_entry(self, entry_name: str) -> None:
+        """
+        Remove an entry from the index and delete its body file. Caller must hold the lock.
+        :param entry_name: name from build_entry_name()
+        :return: None
+        """
+        self.entries.pop(entry_name, None)
+        try:
+            os.remove(self.body_path(entry_name=entry_name))
+        except FileNotFoundError as fnfe:
+            pass
+        return None
+
+    def resolve_response(self, key, response: requests.Response) -> requests.Response:
+        """
+        Resolve a response to a conditional request.
+        For 304 Not Modified, return a response built from the cached body, or None if the entry was evicted or its
+        body file removed since the conditional headers were built, in which case the caller must request the uri
+        again without conditional headers. For 200 with validators, store the body. Any other response is returned
+        as is.
+        :param key: request key
+        :param response: response from the conditional request
+        :return: response, or None for a 304 whose cached body is no longer available
+        """
+        entry_name = ConditionalRequestCache.build_entry_name(key)
+        if response.status_code == 304:
+            return self.reuse_cached_body(entry_name=entry_name, response=response)
+        if response.status_code == 200 and ("etag" in response.headers or "last-modified" in response.headers):
+            self.store_response(entry_name=entry_name, response=response)
+        return response
+
+    def reuse_cached_body(self, entry_name: str, response: requests.Response) -> requests.Response:
+        """
+        Build a response from the cached body and headers, updated with any headers sent with the 304.
+        The status code of the rebuilt response is the status code that was cached (200). The entry lookup and the body
+        read are done under the lock so a concurrent eviction cannot remove the body in between. An entry whose body
+        file is missing is removed.
+        :param entry_name: name from build_entry_name()
+        :param response: the 304 response
+        :return: response carrying the cached body, or None if the entry or its body file no longer exists
+        """
+        self.get_entries()
+        with self.lock:
+            entry = self.entries.get(entry_name)
+            if entry is None:
+                return None
+            try:
+                with open(self.body_path(entry_name=entry_name), "rb") as file_handler:
+                    body = file_handler.read()
+            except FileNotFoundError as fnfe:
+                self.remove_entry(entry_name=entry_name)
+                self.write_index()
+                return None
+            entry["last_used"] = time.time()
+            self.not_modified_count += 1
+            self.write_index()
+        cached_response = requests.Response()
+        cached_response._content = body
+        cached_response.status_code = entry["status_code"]
+        cached_response.headers = CaseInsensitiveDict(entry["headers"])
+        cached_response.headers.update({name: value for name, value in response.headers.items()
+                                        if name.lower() in ConditionalRequestCache.STORED_HEADERS})
+        cached_response.url = response.url
+        cached_response.encoding = requests.utils.get_encoding_from_headers(cached_response.headers)
+        cached_response.request = response.request
+        cached_response.elapsed = response.elapsed
+        cached_response.from_conditional_cache = True
+        return cached_response
+
+    def store_response(self, entry_name: str, response: requests.Response) -> None:
+        """
+        Store the response body and validators, then evict least recently used entries if over the size cap.
+        :param entry_name: name from build_entry_name()
+        :param response: response with a 200 status code
+        :return: None
+        """
+        body = response.content
+        if len(body) > self.max_bytes:
+            return None
+        self.get_entries()
+        with self.lock:
+            os.makedirs(self.cache_directory, exist_ok=True)
+            with open(self.body_path(entry_name=entry_name), "wb") as file_handler:
+                file_handler.write(body)
+            self.entries[entry_name] = {"uri": response.url,
+                                        "status_code": response.status_code,
+                                        "headers": {name.lower(): value for name, value in response.headers.items()
+                                                    if name.lower() in ConditionalRequestCache.STORED_HEADERS},
+                                        "size": len(body),
+                                        "last_used": time.time()}
+            self.evict_least_recently_used()
+            self.write_index()
+        return None
+
+    def write_index(self) -> None:
+        """
+        Write the index json file. Written to a temporary file and then replaced so a partial index is never read.
+        Caller must hold the lock.
+        :return: None
+        """
+        temp_path = f"{self.index_path}.tmp"
+        with open(temp_path, "w") as file_handler:
+            json.dump(self.entries, file_handler)
+        os.replace(temp_path, self.index_path)
+        return None
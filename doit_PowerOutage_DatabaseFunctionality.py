@@ -1,17 +1,158 @@
 """
-Module containing DatabaseUtilities class for functionality related to database interaction.
+Module containing DatabaseUtilities class for functionality related to database interaction, and a
+DatabaseConnectionPool class that holds the database connections so they are checked and reused, not reopened.
 """
 
+from concurrent.futures import ThreadPoolExecutor
+import copy
 import pyodbc
 import PowerOutages.doit_PowerOutage_CentralizedVariables as VARS
+import threading
+import time
+
+
+class DatabaseConnectionPool:
+    """
+    Bounded pool of pyodbc connections. An idle connection is health checked with a trivial query before it is
+    handed out again and is replaced if the check fails. When every connection is in use, acquire() waits for one to
+    be released. A pyodbc connection must only be used by one thread at a time, which the pool guarantees.
+    """
+
+    def __init__(self, connection_string: str, max_size: int = VARS.database_connection_pool_size,
+                 health_check_sql: str = VARS.sql_database_health_check):
+        self.condition = threading.Condition()
+        self.connection_string = connection_string
+        self.created_count = 0
+        self.health_check_failure_count = 0
+        self.health_check_sql = health_check_sql
+        self.idle_connections = []
+        self.in_use_count = 0
+        self.max_size = max_size
+        self.reused_count = 0
+
+    def acquire(self):
+        """
+        Get a healthy connection, reusing an idle one when available, opening a new one while under the maximum size,
+        and otherwise waiting for one to be released.
+        NOTE: when the keyword 'p_str=' is used in pyodbc.connect(), a pyodbc.InterfaceError occurs
+        :return: pyodbc connection
+        """
+        with self.condition:
+            while not self.idle_connections and self.in_use_count >= self.max_size:
+                self.condition.wait()
+            connection = self.idle_connections.pop() if self.idle_connections else None
+            self.in_use_count += 1
+        try:
+            if connection is not None and self.is_healthy(connection=connection):
+                with self.condition:
+                    self.reused_count += 1
+                return connection
+            if connection is not None:
+                DatabaseConnectionPool.close_quietly(connection=connection)
+                with self.condition:
+                    self.health_check_failure_count += 1
+            connection = pyodbc.connect(self.connection_string)
+            with self.condition:
+                self.created_count += 1
+            return connection
+        except Exception:
+            with self.condition:
+                self.in_use_count -= 1
+                self.condition.notify()
+            raise
+
+    def close_all(self) -> None:
+        """
+        Close every idle connection. Connections still in use are closed when they are released.
+        :return: None
+        """
+        with self.condition:
+            for connection in self.idle_connections:
+                DatabaseConnectionPool.close_quietly(connection=connection)
+            self.idle_connections = []
+            self.max_size = 0
+        return None
+
+    @staticmethod
+    def close_quietly(connection) -> None:
+        """
+        Close a connection, ignoring errors from a connection that is already broken.
+        :param connection: pyodbc connection
+        :return: None
+        """
+        try:
+            connection.close()
+        except pyodbc.Error as pe:
+            pass
+        return None
+
+    def is_healthy(self, connection) -> bool:
+        """
+        Check that a connection still works by running the health check query.
+        :param connection: pyodbc connection
+        :return: bool
+        """
+        try:
+            cursor = connection.cursor()
+            cursor.execute(self.health_check_sql)
+            cursor.fetchall()
+            cursor.close()
+        except pyodbc.Error as pe:
+            return False
+        return True
+
+    def print_statistics(self) -> None:
+        """
+        Print the connection reuse statistics of the pool.
+        :return: None
+        """
+        print(f"\tDatabase connection pool: opened={self.created_count}, reused={self.reused_count}, "
+              f"replaced after failed health check={self.health_check_failure_count}")
+        return None
+
+    def release(self, connection, discard: bool = False) -> None:
+        """
+        Return a connection to the pool. Any uncommitted work is rolled back first. A discarded connection, or one
+        released after the pool was closed, is closed instead.
+        :param connection: pyodbc connection from acquire()
+        :param discard: True to close the connection, for example after an error left it in an unknown state
+        :return: None
+        """
+        if not discard:
+            try:
+                connection.rollback()
+            except pyodbc.Error as pe:
+                discard = True
+        with self.condition:
+            self.in_use_count -= 1
+            if discard or len(self.idle_connections) + self.in_use_count >= self.max_size:
+                DatabaseConnectionPool.close_quietly(connection=connection)
+            else:
+                self.idle_connections.append(connection)
+            self.condition.notify()
+        return None
 
 
 class DatabaseUtilities:
     """
     For functionality related to database interaction.
+    Realtime records are written with parameterized insert statements sent in batches (pyodbc fast_executemany).
+    In the staged swap publish mode, records for all providers are loaded into session temp staging tables and the
+    realtime tables are then replaced from staging in one short transaction. In the delta publish mode, the current
+    records of each provider are read and only the inserts, updates, and deletes needed to match the new records are
+    written, also in one transaction.
     """
+
+    REALTIME_INSERT_STATEMENT_BY_STYLE = {"County": VARS.sql_insert_record_county_realtime,
+                                          "ZIP": VARS.sql_insert_record_zip_realtime}
+    REALTIME_KEY_LENGTH_BY_STYLE = {"County": 2, "ZIP": 1}  # Leading values of an insert row that identify the area
+    REALTIME_OUTAGE_INDEX = 2  # Position of the outage count in an insert row, for both styles
+
     def __init__(self, parser):
+        self.bulk_insert_batch_size = VARS.database_bulk_insert_batch_size
+        self.bulk_insert_cursors_by_table = {}
         self.connection = None
+        self.connection_pool = None
         self.database_connection_string = VARS.database_connection_string
         self.cursor = None
         self.database_name = parser["DATABASE"]["NAME"]
@@ -23,6 +164,131 @@ class DatabaseUtilities:
         self.sql_select_zipcode_by_provider_abbrev_statement_realtime = VARS.sql_select_zip_by_provider_abbrev_realtime
         self.sql_select_by_provider_abbrev_statement_realtime = VARS.sql_select_by_provider_abbrev_realtime
 
+    def apply_realtime_delta(self, style: str, provider_abbrev: str, rows: list, date_created, date_updated) -> dict:
+        """
+        Write the changes between the current realtime records of a provider/style and its new records, without
+        committing. The current records are read once, the delta calculated, and the deletes, outage updates, and
+        inserts written. The created and updated dates of the provider's records are refreshed with a single
+        statement only when the provider's date created has changed, so a provider whose feed has not been republished
+        has no records rewritten and keeps the updated date of the run that last changed it. A provider with no new
+        rows has all of its records deleted, as in the per provider delete and insert.
+        :param style: ZIP or County
+        :param provider_abbrev: abbreviation of the provider
+        :param rows: list of new insert parameter tuples for the style
+        :param date_created: date created of the provider, for every record
+        :param date_updated: date updated of the run, for every record
+        :return: dict of inserted, updated, deleted, and unchanged record counts
+        """
+        table_name = VARS.realtime_table_name_by_style[style]
+        key_conditions = VARS.realtime_key_conditions_by_style[style]
+        delta = DatabaseUtilities.calculate_realtime_delta(
+            style=style,
+            provider_abbrev=provider_abbrev,
+            current_records=self.read_realtime_records(style=style, provider_abbrev=provider_abbrev),
+            rows=rows)
+        self.execute_many(sql_statement=VARS.sql_delete_realtime_delta_record.format(
+            table_name=table_name, key_conditions=key_conditions), parameters=delta["delete"])
+        self.execute_many(sql_statement=VARS.sql_update_realtime_delta_outage.format(
+            table_name=table_name, key_conditions=key_conditions), parameters=delta["update"])
+        inserted_count = self.bulk_insert_realtime_records(style=style, rows=delta["insert"])
+        if rows and date_created is None:
+            self.cursor.execute(VARS.sql_update_realtime_provider_dates_null_created.format(table_name=table_name),
+                                (date_updated, provider_abbrev))
+        elif rows:
+            self.cursor.execute(VARS.sql_update_realtime_provider_dates.format(table_name=table_name),
+                                (date_created, date_updated, provider_abbrev, date_created))
+        return {"inserted": inserted_count,
+                "updated": len(delta["update"]),
+                "deleted": delta["deleted_count"],
+                "unchanged": delta["unchanged_count"]}
+
+    def bulk_insert_realtime_records(self, style: str, rows: list, table_name: str = None) -> int:
+        """
+        Insert rows into the realtime table of the style, or its staging table, with the parameterized insert
+        statement, in batches sent with pyodbc fast_executemany. Each table has its own cursor so the statement is
+        prepared once per table and reused for every batch and provider.
+        fast_executemany checks values against the field lengths while binding a batch, before it is sent. A batch with
+        a value that is too long is inserted row by row so that only the offending rows are skipped.
+        :param style: ZIP or County
+        :param rows: list of parameter tuples in the column order of the insert statement
+        :param table_name: table to insert into, None for the realtime table of the style
+        :return: int number of rows inserted
+        """
+        table_name = VARS.realtime_table_name_by_style[style] if table_name is None else table_name
+        sql_statement = DatabaseUtilities.REALTIME_INSERT_STATEMENT_BY_STYLE[style].format(table_name=table_name)
+        cursor = self.bulk_insert_cursors_by_table.get(table_name)
+        if cursor is None:
+            cursor = self.connection.cursor()
+            cursor.fast_executemany = True
+            self.bulk_insert_cursors_by_table[table_name] = cursor
+        inserted_count = 0
+        for start in range(0, len(rows), self.bulk_insert_batch_size):
+            batch_rows = rows[start:start + self.bulk_insert_batch_size]
+            try:
+                cursor.executemany(sql_statement, batch_rows)
+            except pyodbc.DataError:
+                for row in batch_rows:
+                    try:
+                        cursor.execute(sql_statement, row)
+                    except pyodbc.DataError:
+                        print(f"A value exceeds the field length allowed in database table ({style}): {row}")
+                    else:
+                        inserted_count += 1
+            else:
+                inserted_count += len(batch_rows)
+        return inserted_count
+
+    @staticmethod
+    def calculate_realtime_delta(style: str, provider_abbrev: str, current_records: list, rows: list) -> dict:
+        """
+        Compare the current realtime records of a provider with the new insert rows and determine the writes needed.
+        Records are matched by area key (state and county, or zip) and compared on the outage count. An area with one
+        current and one new record whose counts differ is updated in place. An area with more than one record on
+        either side (a zip both reported singly and split from a multi-value zip string) is deleted and re-inserted
+        whenever its counts differ. Created and updated dates are not compared; they are refreshed with one statement
+        per provider when the provider's date created changes.
+        :param style: ZIP or County
+        :param provider_abbrev: abbreviation of the provider
+        :param current_records: list of current records, key values followed by the outage count
+        :param rows: list of new insert parameter tuples for the style
+        :return: dict of delete, update, and insert parameter lists, and the number of records deleted and unchanged
+        """
+        key_length = DatabaseUtilities.REALTIME_KEY_LENGTH_BY_STYLE[style]
+        outage_index = DatabaseUtilities.REALTIME_OUTAGE_INDEX
+        current_outages_by_key = {}
+        for record in current_records:
+            key = tuple(str(value).rstrip() for value in record[:key_length])
+            current_outages_by_key.setdefault(key, []).append(int(record[key_length]))
+        new_rows_by_key = {}
+        for row in rows:
+            new_rows_by_key.setdefault(tuple(str(value) for value in row[:key_length]), []).append(row)
+
+        delta = {"delete": [], "update": [], "insert": [], "deleted_count": 0, "unchanged_count": 0}
+        for key in current_outages_by_key.keys() | new_rows_by_key.keys():
+            current_outages = current_outages_by_key.get(key, [])
+            new_rows = new_rows_by_key.get(key, [])
+            if sorted(current_outages) == sorted(row[outage_index] for row in new_rows):
+                delta["unchanged_count"] += len(new_rows)
+            elif len(current_outages) == 1 and len(new_rows) == 1:
+                delta["update"].append((new_rows[0][outage_index], provider_abbrev, *key))
+            else:
+                if current_outages:
+                    delta["delete"].append((provider_abbrev, *key))
+                    delta["deleted_count"] += len(current_outages)
+                delta["insert"].extend(new_rows)
+        return delta
+
+    def close_database_connections(self) -> None:
+        """
+        Return the connection of this object to the pool and close every pooled connection.
+        :return: None
+        """
+        if self.connection is not None:
+            self.connection_pool.release(connection=self.connection)
+            self.connection = None
+        self.connection_pool.close_all()
+        return None
+
     def commit_changes(self) -> None:
         """
         Commit changes to database.
@@ -53,6 +319,49 @@ class DatabaseUtilities:
         self.cursor = self.connection.cursor()
         return None
 
+    def create_realtime_staging_tables(self) -> None:
+        """
+        Create an empty session temp staging table for each realtime table, with the realtime insert columns, dropping
+        any left from earlier in the session. Staging tables are dropped by the database when the connection closes.
+        :return: None
+        """
+        for style, table_name in VARS.realtime_table_name_by_style.items():
+            staging_table_name = VARS.realtime_staging_table_name_by_style[style]
+            self.cursor.execute(VARS.sql_drop_realtime_staging_table.format(staging_table_name=staging_table_name))
+            self.cursor.execute(VARS.sql_create_realtime_staging_table.format(
+                columns=VARS.realtime_columns_by_style[style],
+                staging_table_name=staging_table_name,
+                table_name=table_name))
+        self.connection.commit()
+        return None
+
+    def create_writer(self):
+        """
+        Create a writer for use in another thread: a copy of this object with its own pooled connection, cursor, and
+        bulk insert cursors. Release it with release_writer().
+        :return: DatabaseUtilities writer
+        """
+        writer = copy.copy(self)
+        writer.bulk_insert_cursors_by_table = {}
+        writer.connection = self.connection_pool.acquire()
+        try:
+            writer.cursor = writer.connection.cursor()
+        except pyodbc.Error as pe:
+            self.connection_pool.release(connection=writer.connection, discard=True)
+            raise
+        writer.selection = None
+        return writer
+
+    def delete_bulk_insert_cursors(self) -> None:
+        """
+        Close and delete the realtime bulk insert cursors.
+        :return: None
+        """
+        for cursor in self.bulk_insert_cursors_by_table.values():
+            cursor.close()
+        self.bulk_insert_cursors_by_table = {}
+        return None
+
     def delete_cursor(self) -> None:
         """
         Delete existing database cursor.
@@ -78,15 +387,38 @@ class DatabaseUtilities:
         self.connection.commit()
         return None
 
+    def drop_realtime_staging_tables(self) -> None:
+        """
+        Drop the realtime staging tables.
+        :return: None
+        """
+        for staging_table_name in VARS.realtime_staging_table_name_by_style.values():
+            self.cursor.execute(VARS.sql_drop_realtime_staging_table.format(staging_table_name=staging_table_name))
+        self.connection.commit()
+        return None
+
     def establish_database_connection(self) -> None:
         """
-        Establish a connection.
-        NOTE: when the keyword 'p_str=' is used in pyodbc.connect(), a pyodbc.InterfaceError occurs
+        Establish a connection, taken from the connection pool. The pool is created on first use.
         :return: None
         """
+        if self.connection_pool is None:
+            self.connection_pool = DatabaseConnectionPool(connection_string=self.full_connection_string)
+        self.connection = self.connection_pool.acquire()
+        return None
 
-        with pyodbc.connect(self.full_connection_string) as connection:
-            self.connection = connection
+    def execute_many(self, sql_statement: str, parameters: list) -> None:
+        """
+        Execute a parameterized statement for every parameter tuple, in batches sent with pyodbc fast_executemany.
+        :param sql_statement: parameterized sql statement
+        :param parameters: list of parameter tuples
+        :return: None
+        """
+        if not parameters:
+            return None
+        self.cursor.fast_executemany = True
+        for start in range(0, len(parameters), self.bulk_insert_batch_size):
+            self.cursor.executemany(sql_statement, parameters[start:start + self.bulk_insert_batch_size])
         return None
 
     def execute_sql_statement(self, sql_statement) -> None:
@@ -110,3 +442,136 @@ class DatabaseUtilities:
         self.selection = self.cursor.fetchall()
         return None
 
+    def publish_realtime_deltas(self, realtime_writes: dict) -> dict:
+        """
+        Write only the changes between the current realtime records and the new records, for every provider/style, in
+        one transaction on the connection of this object. On failure the transaction is rolled back and the process
+        exits.
+        :param realtime_writes: dict of unique key to dict of style, provider_abbrev, rows, date_created, date_updated
+        :return: dict of unique key to dict of inserted, updated, deleted, and unchanged record counts
+        """
+        counts_by_key = {}
+        try:
+            for key, write in realtime_writes.items():
+                counts_by_key[key] = self.apply_realtime_delta(**write)
+            self.connection.commit()
+        except pyodbc.Error as pe:
+            self.connection.rollback()
+            print(f"RealTime delta publish failed and was rolled back. Previous records remain published. {pe}")
+            exit()
+        return counts_by_key
+
+    def publish_realtime_deltas_concurrently(self, realtime_writes: dict,
+                                             writer_count: int = VARS.database_concurrent_writers) -> dict:
+        """
+        Write the realtime deltas of the provider/styles in parallel threads, each writer on its own pooled connection.
+        The delta of each provider/style is committed as its own transaction, so every provider's records change
+        atomically but providers are not published together as they are in publish_realtime_deltas(). A writer chosen
+        as a deadlock victim is retried. A provider/style that still fails is rolled back, keeps its previous records,
+        and is reported with an error, and the other writers are not affected.
+        :param realtime_writes: dict of unique key to dict of style, provider_abbrev, rows, date_created, date_updated
+        :param writer_count: number of writer threads, capped at the connection pool size
+        :return: dict of unique key to dict of record counts, plus writer thread name, seconds, and error
+        """
+        writer_count = max(1, min(writer_count, self.connection_pool.max_size))
+        with ThreadPoolExecutor(max_workers=writer_count, thread_name_prefix="DatabaseWriter") as executor:
+            futures_by_key = {key: executor.submit(self.write_realtime_delta, write=write)
+                              for key, write in realtime_writes.items()}
+        return {key: future.result() for key, future in futures_by_key.items()}
+
+    def read_realtime_records(self, style: str, provider_abbrev: str) -> list:
+        """
+        Read the area key values and outage count of every current realtime record of a provider.
+        :param style: ZIP or County
+        :param provider_abbrev: abbreviation of the provider
+        :return: list of records, key values followed by the outage count
+        """
+        table_name_style = {"ZIP": "Zipcodes", "County": "County"}.get(style)
+        self.cursor.execute(self.sql_select_by_provider_abbrev_statement_realtime.format(
+            fields=VARS.realtime_select_fields_by_style[style],
+            style=table_name_style,
+            provider_abbrev=provider_abbrev))
+        return self.cursor.fetchall()
+
+    def release_writer(self, writer, discard: bool = False) -> None:
+        """
+        Close the cursors of a writer and return its connection to the pool. Errors closing the cursors of a possibly
+        broken connection are ignored and the connection is discarded, so the connection is always returned.
+        :param writer: DatabaseUtilities writer from create_writer()
+        :param discard: True to close the connection instead of reusing it
+        :return: None
+        """
+        try:
+            writer.delete_bulk_insert_cursors()
+            writer.cursor.close()
+        except pyodbc.Error as pe:
+            discard = True
+        writer.delete_cursor()
+        self.connection_pool.release(connection=writer.connection, discard=discard)
+        writer.connection = None
+        return None
+
+    def swap_realtime_from_staging(self, provider_abbrevs_by_style: dict) -> tuple:
+        """
+        Replace the realtime records of the providers with the staged records, for every style, in one transaction.
+        The records of each provider are deleted and the staging table is inserted in their place, then the change is
+        committed once, so readers see either the previous snapshot or the new one and never a partial one. A
+        provider staged with no stats objects is left with no records, as in the per provider delete and insert.
+        Delete and insert are used, not MERGE, because a zip can appear more than once for a provider (for example a
+        single zip and the same zip split from a multi-value zip string), which MERGE does not allow.
+        On failure the transaction is rolled back, leaving the previous snapshot in place, and the process exits.
+        :param provider_abbrevs_by_style: dict of style to collection of provider abbreviations to replace
+        :return: tuple of dict of style to dict of deleted and inserted record counts, and transaction milliseconds
+        """
+        counts_by_style = {}
+        start = time.perf_counter()
+        try:
+            for style, provider_abbrevs in provider_abbrevs_by_style.items():
+                provider_abbrevs = sorted(provider_abbrevs)
+                table_name = VARS.realtime_table_name_by_style[style]
+                self.cursor.execute(VARS.sql_delete_realtime_by_providers.format(
+                    table_name=table_name,
+                    provider_markers=", ".join("?" for _ in provider_abbrevs)), provider_abbrevs)
+                deleted_count = self.cursor.rowcount
+                self.cursor.execute(VARS.sql_insert_realtime_from_staging.format(
+                    table_name=table_name,
+                    columns=VARS.realtime_columns_by_style[style],
+                    staging_table_name=VARS.realtime_staging_table_name_by_style[style]))
+                counts_by_style[style] = {"deleted": deleted_count, "inserted": self.cursor.rowcount}
+            self.connection.commit()
+        except pyodbc.Error as pe:
+            self.connection.rollback()
+            print(f"RealTime staged swap failed and was rolled back. Previous records remain published. {pe}")
+            exit()
+        return counts_by_style, round((time.perf_counter() - start) * 1000, 1)
+
+    def write_realtime_delta(self, write: dict) -> dict:
+        """
+        Apply and commit the realtime delta of one provider/style on a writer of its own, timing the write. Retried
+        when the database chooses the writer as a deadlock victim (SQLSTATE 40001).
+        :param write: dict of style, provider_abbrev, rows, date_created, date_updated
+        :return: dict of record counts, plus writer thread name, seconds, and error (None on success)
+        """
+        start = time.perf_counter()
+        error = None
+        for attempt in range(VARS.database_deadlock_retry_attempts + 1):
+            writer = None
+            try:
+                writer = self.create_writer()
+                counts = writer.apply_realtime_delta(**write)
+                writer.connection.commit()
+            except pyodbc.Error as pe:
+                if writer is not None:
+                    self.release_writer(writer=writer, discard=True)
+                error = f"{type(pe).__name__}: {pe}"
+                if pe.args and pe.args[0] == "40001":
+                    continue
+                break
+            else:
+                self.release_writer(writer=writer)
+                counts.update({"writer": threading.current_thread().name,
+                               "seconds": time.perf_counter() - start,
+                               "error": None})
+                return counts
+        return {"inserted": 0, "updated": 0, "deleted": 0, "unchanged": 0,
+                "writer": threading.current_thread().name, "seconds": time.perf_counter() - start, "error": error}
@@ -3,64 +3,61 @@ Module contains a EUC class that inherits from Provider class. EUC class is an i
 peculiarities of the EUC feeds and the processing they require that is not common to all providers.
 """
 
+from PowerOutages.doit_PowerOutage_ExtractionSpecs import ExtractionSpec
 from PowerOutages.doit_PowerOutage_UtilityClass import Utility as DOIT_UTIL
 from PowerOutages.doit_PowerOutage_ProviderClasses import Outage
+from PowerOutages.doit_PowerOutage_ProviderClasses import OutageBatch
 from PowerOutages.doit_PowerOutage_ProviderClasses import Provider
-import json
 
 
 class EUC(Provider):
     """
     EUC specific functionality and variables for handling EUC feed data. Inherits from Provider.
     EUC is unique in that the provider only serves a single zip code, at time of Version 2 build, and does not provide
-    feed data by county.
+    feed data by county. The xml response is a single root element whose text is a json list of outage events.
     """
 
+    EVENT_EXTRACTION_SPEC = ExtractionSpec(fields={"area": "ZipCode",
+                                                   "outages": "Count",
+                                                   "customers": "AccountCount",
+                                                   "date_created": "TimeStamp"},
+                                           constants={"state": DOIT_UTIL.MARYLAND})
+
     def __init__(self, provider_abbrev, style):
         super().__init__(provider_abbrev=provider_abbrev, style=style)
-        self.xml_element = None
-        self.events_list = None
         self.zip_to_county = {"21601": "Talbot"}
 
-    def extract_date_created(self) -> None:
-        """
-        Extract the date created from the events list.
-        :return: None
-        """
-        for event in self.events_list:
-            self.date_created = DOIT_UTIL.extract_attribute_from_dict(data_dict=event, attribute_name="TimeStamp")
-        return
-
-    def extract_outage_counts(self) -> None:
+    def create_stat_object_from_event_values(self, values: dict) -> Outage:
         """
-        Extract outage counts, customer counts, and area from events list, exchange zip for county, then
-        build stat objects.
-        :return: None
+        Exchange zip for county, for the county style, and build a stat object from extracted event values.
+        :param values: dict of extracted event field values
+        :return: Outage
         """
-        list_of_stats_objects = []
-        for event in self.events_list:
-            outages = DOIT_UTIL.extract_attribute_from_dict(data_dict=event, attribute_name="Count")
-            customers = DOIT_UTIL.extract_attribute_from_dict(data_dict=event, attribute_name="AccountCount")
-            area = DOIT_UTIL.extract_attribute_from_dict(data_dict=event, attribute_name="ZipCode")
-
-            # At time of original design, EUC only served zip 21601 and did not provide county name (Talbot) in feed.
-            if self.style == DOIT_UTIL.COUNTY and area in self.zip_to_county.keys():
-                area = self.zip_to_county[area]
-            list_of_stats_objects.append(Outage(abbrev=self.abbrev,
-                                                style=self.style,
-                                                area=area,
-                                                outages=outages,
-                                                customers=customers,
-                                                state=DOIT_UTIL.MARYLAND)
-                                         )
-        self.stats_objects = list_of_stats_objects
-        return
-
-    def extract_outage_events_list_from_xml_str(self) -> None:
+        area = values["area"]
+
+        # At time of original design, EUC only served zip 21601 and did not provide county name (Talbot) in feed.
+        if self.style == DOIT_UTIL.COUNTY and area in self.zip_to_county.keys():
+            area = self.zip_to_county[area]
+        return Outage(abbrev=self.abbrev,
+                      style=self.style,
+                      area=area,
+                      outages=values["outages"],
+                      customers=values["customers"],
+                      state=values["state"])
+
+    def extract_outage_counts_and_date_created(self) -> None:
         """
-        Extract outage events from xml response
+        Read the outage events from the root element text of the xml response, build a stat object from each event,
+        and extract the date created. The date created is the time stamp of the last event.
+        The response holds a single element so there are no records to stream, but the raw bytes are parsed directly
+        and no intermediate events list is kept.
         :return: None
         """
-        content_list_as_str = self.xml_element.text
-        self.events_list = json.loads(content_list_as_str)
+        stats_objects = OutageBatch()
+        xml_element = DOIT_UTIL.parse_xml_response_to_element(response_xml_str=self.data_feed_response.content)
+        events = self.decode_json_content(content=xml_element.text)
+        for values in EUC.EVENT_EXTRACTION_SPEC.extract_records(records=events, errors=self.extraction_errors):
+            stats_objects.append(outage=self.create_stat_object_from_event_values(values=values))
+            self.date_created = values["date_created"]
+        self.stats_objects = stats_objects
         return
@@ -0,0 +1,98 @@
+"""
+Module containing an ExtractionSpec class and an ExtractionError dataclass for declarative extraction of outage records.
+A spec maps record fields (area, outages, customers, and where present state and date created) to paths in a json
+dict record (dot separated keys, example cust_a.val) or an xml element record (ElementTree find paths, example e[2]).
+Paths are compiled once into accessor functions and applied to every record. A record with a missing path is skipped
+and an ExtractionError is recorded for it, instead of the process exiting. A new feed format needs only a spec.
+"""
+
+from dataclasses import dataclass
+import operator
+
+
+@dataclass
+class ExtractionError:
+    """
+    Structured description of a record that could not be extracted.
+    """
+    record_index: int
+    field_name: str
+    path: str
+    error: str
+
+
+class ExtractionSpec:
+    """
+    Compiled field paths, and constant field values, for the records of a feed.
+    """
+
+    JSON = "json"
+    XML = "xml"
+
+    def __init__(self, fields: dict, record_format: str = JSON, constants: dict = None):
+        self.constants = {} if constants is None else constants
+        self.fields = fields
+        self.record_format = record_format
+        self.accessors = tuple((field_name, path, ExtractionSpec.compile_path(path=path, record_format=record_format))
+                               for field_name, path in fields.items())
+
+    @staticmethod
+    def compile_path(path: str, record_format: str):
+        """
+        Compile a path into an accessor function taking a record.
+        Json paths become chained itemgetters. Xml paths return the text of the first matching element.
+        Accessors raise KeyError, IndexError, or TypeError when the path is missing from a record.
+        :param path: dot separated dict keys, or an ElementTree find path
+        :param record_format: json or xml
+        :return: accessor function
+        """
+        if record_format == ExtractionSpec.XML:
+            def access_element_text(element):
+                child = element.find(path)
+                if child is None:
+                    raise KeyError(path)
+                return child.text
+            return access_element_text
+
+        getters = tuple(operator.itemgetter(key) for key in path.split("."))
+        if len(getters) == 1:
+            return getters[0]
+        if len(getters) == 2:
+            first, second = getters
+            return lambda record: second(first(record))
+
+        def access_nested(record):
+            for getter in getters:
+                record = getter(record)
+            return record
+        return access_nested
+
+    def extract(self, record, record_index: int, errors: list):
+        """
+        Extract the fields of a single record.
+        :param record: json dict or xml ET.Element record
+        :param record_index: position of the record in the feed, for error reporting
+        :param errors: list to which an ExtractionError is appended if a path is missing
+        :return: dict of field name to value, including constants, or None if the record could not be extracted
+        """
+        values = dict(self.constants)
+        for field_name, path, accessor in self.accessors:
+            try:
+                values[field_name] = accessor(record)
+            except (KeyError, IndexError, TypeError) as e:
+                errors.append(ExtractionError(record_index=record_index, field_name=field_name, path=path,
+                                              error=f"{type(e).__name__}: {e}"))
+                return None
+        return values
+
+    def extract_records(self, records, errors: list):
+        """
+        Extract the fields of every record, skipping records that could not be extracted.
+        :param records: iterable of json dict or xml ET.Element records
+        :param errors: list to which an ExtractionError is appended for each skipped record
+        :return: generator of dicts of field name to value
+        """
+        for record_index, record in enumerate(records):
+            values = self.extract(record=record, record_index=record_index, errors=errors)
+            if values is not None:
+                yield values
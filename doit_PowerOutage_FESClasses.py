@@ -1,10 +1,13 @@
 """
 Module contains a FES class that inherits from Provider class. FES class is an implementation specific to the
 peculiarities of the FES feeds and the processing they require that is not common to all providers.
+The xml feed is read as a stream, one Outage element at a time, so memory does not grow with the size of the feed.
 """
 
+from PowerOutages.doit_PowerOutage_ExtractionSpecs import ExtractionSpec
 from PowerOutages.doit_PowerOutage_UtilityClass import Utility as DOIT_UTIL
 from PowerOutages.doit_PowerOutage_ProviderClasses import Outage
+from PowerOutages.doit_PowerOutage_ProviderClasses import OutageBatch
 from PowerOutages.doit_PowerOutage_ProviderClasses import Provider
 
 
@@ -13,76 +16,55 @@ class FES(Provider):
     FES specific functionality and variables for handling FES feed data. Inherits from Provider.
     FES does not report customer counts for zip codes.
     """
+
+    OUTAGE_EXTRACTION_SPECS = {DOIT_UTIL.COUNTY: ExtractionSpec(fields={"area": "County",
+                                                                        "outages": "CustomersOut",
+                                                                        "customers": "CustomersServed"},
+                                                                record_format=ExtractionSpec.XML,
+                                                                constants={"state": DOIT_UTIL.MARYLAND}),
+                               DOIT_UTIL.ZIP: ExtractionSpec(fields={"area": "Zip", "outages": "CustomersOut"},
+                                                             record_format=ExtractionSpec.XML,
+                                                             constants={"customers": -9999,
+                                                                        "state": DOIT_UTIL.MARYLAND})}
+
     def __init__(self, provider_abbrev, style):
         super().__init__(provider_abbrev=provider_abbrev, style=style)
-        self.xml_element = None
-        self.zip_events_list = None
-        self.area_elements = None
-        self.stats_data_tuples_list = None
 
-    def create_stats_objects(self) -> None:
+    def create_stat_object_from_outage_element(self, element, record_index: int):
         """
-        Build stat objects
-        :return: None
+        Extract outage counts from an Outage element, clean the county string, and build a stat object.
+        :param element: completed Outage ET.Element
+        :param record_index: position of the Outage element in the feed, for error reporting
+        :return: Outage, or None if the area is a non-MD county or a field is missing
         """
-        list_of_stats_objects = []
-        for stat_tup in self.stats_data_tuples_list:
-            area, customers, outages = stat_tup
-            list_of_stats_objects.append(Outage(abbrev=self.abbrev,
-                                                style=self.style,
-                                                area=area,
-                                                outages=outages,
-                                                customers=customers,
-                                                state=DOIT_UTIL.MARYLAND))
-        self.stats_objects = list_of_stats_objects
-        return
+        values = FES.OUTAGE_EXTRACTION_SPECS[self.style].extract(record=element, record_index=record_index,
+                                                                 errors=self.extraction_errors)
+        if values is None:
+            return None
 
-    def extract_area_outage_elements(self) -> None:
-        """
-        Extract the area outage elements from the xml response
-        :return: None
-        """
-        area_elements_list = []
-        for area_element in self.xml_element.iter("Outage"):
-            area_elements_list.append(area_element)
-        self.area_elements = area_elements_list
-        return
+        if self.style == DOIT_UTIL.COUNTY and "(MD)" not in values["area"]:
+            # Isolating MD counties. NOTE: Non-MD zip codes are not filtered out here.
+            return None
 
-    def extract_date_created(self) -> None:
-        """
-        Extract the data created from the xml response
-        :return: None
-        """
-        response_header_element = DOIT_UTIL.extract_first_immediate_child_feature_from_element(element=self.xml_element,
-                                                                                               tag_name="ResponseHeader")
-        date_created = DOIT_UTIL.extract_first_immediate_child_feature_from_element(element=response_header_element,
-                                                                                    tag_name="CreateDateTime")
-        self.date_created = date_created.text
-        return
+        values["area"] = values["area"].replace("(MD)", "").strip()
+        return Outage(abbrev=self.abbrev, style=self.style, **values)
 
-    def extract_outage_counts(self) -> None:
+    def extract_outage_counts_and_date_created(self) -> None:
         """
-        Extract outage counts from the xml response and clean the county string
+        Stream the xml response, build a stat object from each Outage element as it completes, and extract the date
+        created from the ResponseHeader.
         :return: None
         """
-        stats_tuples_list = []
-        for element in self.area_elements:
-            area = DOIT_UTIL.extract_first_immediate_child_feature_from_element(element=element,
-                                                                                tag_name=self.style.title()).text
-            outages = DOIT_UTIL.extract_first_immediate_child_feature_from_element(element=element,
-                                                                                   tag_name="CustomersOut").text
-            if self.style == DOIT_UTIL.COUNTY:
-                customers = DOIT_UTIL.extract_first_immediate_child_feature_from_element(element=element,
-                                                                                         tag_name="CustomersServed").text
-            else:
-                customers = -9999
-
-            if self.style == DOIT_UTIL.COUNTY and "(MD)" not in area:
-                # Isolating MD counties. NOTE: Non-MD zip codes are not filtered out here.
-                continue
-
-            area = area.replace("(MD)", "")
-            stats_tuples_list.append((area, customers, outages))
-
-        self.stats_data_tuples_list = stats_tuples_list
+        stats_objects = OutageBatch()
+        record_index = 0
+        for ancestors, element in DOIT_UTIL.generate_completed_xml_elements(
+                response_content=self.data_feed_response.content, tag_names=("CreateDateTime", "Outage")):
+            if element.tag == "Outage":
+                stat_obj = self.create_stat_object_from_outage_element(element=element, record_index=record_index)
+                record_index += 1
+                if stat_obj is not None:
+                    stats_objects.append(outage=stat_obj)
+            elif len(ancestors) == 2 and ancestors[-1].tag == "ResponseHeader":
+                self.date_created = element.text
+        self.stats_objects = stats_objects
         return
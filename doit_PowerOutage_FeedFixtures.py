@@ -0,0 +1,200 @@
+"""
+Module containing a FeedFixtureStore class and the RecordingAdapter and ReplayAdapter transport adapters for offline,
+repeatable runs of the process.
+In record mode every provider response the web layer receives (status, headers, body) is written to a versioned
+fixture directory as it arrives. In replay mode the adapters serve those responses back in place of the network, so
+requests, retries, caching, decoding, and parsing all run through the same code path as a live run. Replayed responses
+are returned in recorded order and without recorded latency, so replayed runs are deterministic and before/after
+timings of a change can be compared.
+"""
+
+from requests.adapters import HTTPAdapter
+from urllib3.response import HTTPResponse
+import PowerOutages.doit_PowerOutage_CentralizedVariables as VARS
+import datetime
+import hashlib
+import io
+import json
+import os
+import threading
+
+
+class FeedFixtureStore:
+    """
+    A versioned directory of recorded responses. A manifest json file lists the recorded responses, in order, for
+    each request key (method, url, and hash of any body). Bodies are stored decoded in individual files.
+    """
+
+    FORMAT_VERSION = 1
+    MANIFEST_FILE_NAME = "manifest.json"
+    STRIPPED_HEADERS = ("content-encoding", "content-length", "transfer-encoding")
+
+    def __init__(self, mode: str, fixture_name: str = VARS.web_fixture_name,
+                 fixtures_directory: str = None):
+        self.fixtures_directory = os.path.join(VARS._root_project_path, VARS.web_fixture_directory) if fixtures_directory is None else fixtures_directory
+        self.lock = threading.Lock()
+        self.mode = mode
+        self.recordings_by_key = {}
+        self.replay_positions_by_key = {}
+        if mode == "record":
+            self.fixture_name = datetime.datetime.now().strftime("%Y%m%d_%H%M%S") if fixture_name is None else fixture_name
+        else:
+            self.fixture_name = self.find_latest_fixture_name() if fixture_name is None else fixture_name
+            self.load_manifest()
+
+    @property
+    def fixture_path(self) -> str:
+        """
+        Get the path to the fixture directory in use
+        :return: str path
+        """
+        return os.path.join(self.fixtures_directory, self.fixture_name)
+
+    @staticmethod
+    def build_request_key(request) -> str:
+        """
+        Build the key for a prepared request from the method, url, and a hash of the body if present.
+        :param request: requests.PreparedRequest
+        :return: str key
+        """
+        body = request.body or b""
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        body_hash = hashlib.sha1(body).hexdigest() if body else ""
+        return f"{request.method} {request.url} {body_hash}".strip()
+
+    def find_latest_fixture_name(self) -> str:
+        """
+        Find the most recently recorded fixture directory. Names are timestamps, so the latest sorts last.
+        :return: str fixture directory name
+        """
+        try:
+            fixture_names = sorted(name for name in os.listdir(self.fixtures_directory)
+                                   if os.path.isfile(os.path.join(self.fixtures_directory, name,
+                                                                  FeedFixtureStore.MANIFEST_FILE_NAME)))
+        except FileNotFoundError as fnfe:
+            fixture_names = []
+        if not fixture_names:
+            print(f"No recorded fixtures found in {self.fixtures_directory}. Run in record mode first.")
+            exit()
+        return fixture_names[-1]
+
+    def load_manifest(self) -> None:
+        """
+        Load the manifest of the fixture in use and confirm it was written in a supported format version.
+        :return: None
+        """
+        with open(os.path.join(self.fixture_path, FeedFixtureStore.MANIFEST_FILE_NAME), "r") as file_handler:
+            manifest = json.load(file_handler)
+        if manifest.get("format_version") != FeedFixtureStore.FORMAT_VERSION:
+            print(f"Fixture {self.fixture_name} format version {manifest.get('format_version')} is not supported. "
+                  f"Expected {FeedFixtureStore.FORMAT_VERSION}")
+            exit()
+        self.recordings_by_key = manifest["recordings"]
+        print(f"Replaying recorded feed responses from fixture {self.fixture_name}")
+        return None
+
+    def next_recording(self, key: str):
+        """
+        Get the next recorded response for a key, with its body. After the last recording for a key the last one is
+        repeated.
+        :param key: request key
+        :return: tuple of recording dict and body bytes, or None if the key was never recorded
+        """
+        with self.lock:
+            recordings = self.recordings_by_key.get(key)
+            if not recordings:
+                return None
+            position = self.replay_positions_by_key.get(key, 0)
+            self.replay_positions_by_key[key] = position + 1
+            recording = recordings[min(position, len(recordings) - 1)]
+        with open(os.path.join(self.fixture_path, recording["body_file"]), "rb") as file_handler:
+            return recording, file_handler.read()
+
+    def record(self, key: str, response) -> None:
+        """
+        Record a response and its decoded body, then rewrite the manifest so the fixture is usable even if the run
+        does not finish.
+        :param key: request key
+        :param response: requests.Response with content read
+        :return: None
+        """
+        with self.lock:
+            os.makedirs(self.fixture_path, exist_ok=True)
+            recordings = self.recordings_by_key.setdefault(key, [])
+            body_file = f"{hashlib.sha1(key.encode('utf-8')).hexdigest()}_{len(recordings)}.body"
+            with open(os.path.join(self.fixture_path, body_file), "wb") as file_handler:
+                file_handler.write(response.content)
+            recordings.append({"url": response.url,
+                               "status_code": response.status_code,
+                               "reason": response.reason,
+                               "headers": {name: value for name, value in response.headers.items()
+                                           if name.lower() not in FeedFixtureStore.STRIPPED_HEADERS},
+                               "body_file": body_file})
+            self.write_manifest()
+        return None
+
+    def write_manifest(self) -> None:
+        """
+        Write the manifest json file. Caller must hold the lock.
+        :return: None
+        """
+        manifest = {"format_version": FeedFixtureStore.FORMAT_VERSION,
+                    "fixture_name": self.fixture_name,
+                    "recordings": self.recordings_by_key}
+        manifest_path = os.path.join(self.fixture_path, FeedFixtureStore.MANIFEST_FILE_NAME)
+        temp_path = f"{manifest_path}.tmp"
+        with open(temp_path, "w") as file_handler:
+            json.dump(manifest, file_handler, indent=1)
+        os.replace(temp_path, manifest_path)
+        return None
+
+
+class RecordingAdapter(HTTPAdapter):
+    """
+    Transport adapter that sends requests over the network and records each response in the fixture store.
+    """
+
+    def __init__(self, fixture_store: FeedFixtureStore, **kwargs):
+        super(RecordingAdapter, self).__init__(**kwargs)
+        self.fixture_store = fixture_store
+
+    def send(self, request, **kwargs):
+        """
+        Send the request and record the response.
+        Override of HTTPAdapter method.
+        :param request: requests.PreparedRequest
+        :return: requests.Response
+        """
+        response = super(RecordingAdapter, self).send(request, **kwargs)
+        self.fixture_store.record(key=FeedFixtureStore.build_request_key(request=request), response=response)
+        return response
+
+
+class ReplayAdapter(HTTPAdapter):
+    """
+    Transport adapter that answers requests from the fixture store instead of the network.
+    Requests that were never recorded are answered with a 404 so a replayed run never touches the network.
+    """
+
+    def __init__(self, fixture_store: FeedFixtureStore, **kwargs):
+        super(ReplayAdapter, self).__init__(**kwargs)
+        self.fixture_store = fixture_store
+
+    def send(self, request, **kwargs):
+        """
+        Build the response for the request from the next recording of its key.
+        Override of HTTPAdapter method.
+        :param request: requests.PreparedRequest
+        :return: requests.Response
+        """
+        key = FeedFixtureStore.build_request_key(request=request)
+        replayed = self.fixture_store.next_recording(key=key)
+        if replayed is None:
+            print(f"No recorded response for {key}")
+            recording, body = {"status_code": 404, "reason": "Not Recorded", "headers": {}}, b""
+        else:
+            recording, body = replayed
+        raw = HTTPResponse(body=io.BytesIO(body), headers=recording["headers"], status=recording["status_code"],
+                           reason=recording["reason"], preload_content=False, decode_content=False)
+        return self.build_response(req=request, resp=raw)
@@ -0,0 +1,195 @@
+"""
+Module containing an AsyncFetchEngine class for concurrent web requests of provider feed data.
+Each provider has a dependent chain of requests: the metadata key is needed before the date created and configuration
+feeds can be requested, and those are needed before the data feed uri can be built. The chain for a single provider is
+run in order as its own asyncio task, and the tasks for all providers are run concurrently. WebFunctionality requests
+are blocking so they are run in a thread pool. A per-host semaphore limits how many requests are in flight to any
+one provider host at a time. The fetch phase costs about as much as the slowest provider rather than the sum of all.
+The fetch phase has an overall deadline. Provider chains that have not finished by then are cancelled and the run
+continues with the providers that have returned.
+"""
+
+from PowerOutages.doit_PowerOutage_UtilityClass import Utility as DOIT_UTIL
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+import PowerOutages.doit_PowerOutage_CentralizedVariables as VARS
+import PowerOutages.doit_PowerOutage_WebRelatedFunctionality as WebFunc
+import asyncio
+import functools
+import time
+
+
+class AsyncFetchEngine:
+    """
+    Runs the metadata, date created, configuration (Kubra), and data feed requests for all provider objects.
+    The request chain of each provider runs sequentially within a task and all provider tasks run concurrently.
+    """
+
+    def __init__(self, provider_objects: dict, max_requests_per_host: int = VARS.fetch_engine_max_requests_per_host,
+                 max_workers: int = VARS.fetch_engine_max_workers, incremental_state=None,
+                 deadline_seconds: float = VARS.fetch_phase_deadline_seconds):
+        self.deadline = None
+        self.deadline_seconds = deadline_seconds
+        self.executor = None
+        self.host_semaphores = {}
+        self.incremental_state = incremental_state
+        self.max_requests_per_host = max_requests_per_host
+        self.max_workers = max_workers
+        self.provider_objects = provider_objects
+        self.provider_chain_seconds = {}
+
+    def gather_feed_uris(self) -> list:
+        """
+        Gather the configured metadata, date created, configuration (Kubra), and data feed uris of every provider.
+        Used to mount a connection pool adapter for every host before the provider chains start.
+        :return: list of uris, some still containing template placeholders
+        """
+        uris = []
+        for obj in self.provider_objects.values():
+            uris.extend([obj.metadata_feed_uri, obj.date_created_feed_uri, obj.data_feed_uri,
+                         getattr(obj, "configuration_url", None)])
+        return uris
+
+    def get_host_semaphore(self, uri: str) -> asyncio.Semaphore:
+        """
+        Get the semaphore for the host of the uri, creating it on first use.
+        Semaphores are created lazily so that they belong to the running event loop.
+        :param uri: web path to which a request will be made
+        :return: asyncio.Semaphore for the host
+        """
+        host = urlparse(uri).netloc.lower()
+        try:
+            return self.host_semaphores[host]
+        except KeyError as ke:
+            semaphore = asyncio.Semaphore(self.max_requests_per_host)
+            self.host_semaphores[host] = semaphore
+            return semaphore
+
+    async def make_web_request(self, obj, uri: str, feed_type: str):
+        """
+        Make a web request, using the provider objects web functionality, in the thread pool.
+        :param obj: provider object
+        :param uri: web path to which to make request
+        :param feed_type: metadata, date_created, configuration, or data. Determines timeouts.
+        :return: response
+        """
+        loop = asyncio.get_running_loop()
+        async with self.get_host_semaphore(uri=uri):
+            return await loop.run_in_executor(self.executor,
+                                              functools.partial(obj.web_func_class.make_web_request, uri=uri,
+                                                                feed_type=feed_type, deadline=self.deadline))
+
+    def print_transfer_statistics(self) -> None:
+        """
+        Print the wire bytes, decoded bytes, and slowest time to first byte of the feeds received by each provider.
+        :return: None
+        """
+        print("Transfer by provider (wire bytes / decoded bytes, slowest time to first byte):")
+        for key, obj in self.provider_objects.items():
+            transfer_statistics = obj.gather_transfer_statistics().values()
+            wire_bytes = sum(stats["wire_bytes"] for stats in transfer_statistics)
+            decoded_bytes = sum(stats["decoded_bytes"] for stats in transfer_statistics)
+            slowest_ttfb = max((stats["ttfb_seconds"] for stats in transfer_statistics), default=0)
+            DOIT_UTIL.print_tabbed_string(value=f"{key}: {wire_bytes} / {decoded_bytes}, {slowest_ttfb}s")
+        return None
+
+    async def run_provider_chain(self, key: str, obj) -> None:
+        """
+        Run the dependent chain of feed requests for a single provider and store responses as object attributes.
+        Metadata key -> date created and configuration (Kubra) -> data feed uri -> data feed.
+        :param key: unique provider key, example BGE_County
+        :param obj: provider object
+        :return: None
+        """
+        start = time.perf_counter()
+
+        #   Metadata key, for those providers that use the metadata key. Used in the date created and data feed uris.
+        if obj.metadata_feed_uri not in VARS.none_and_not_available:
+            obj.metadata_feed_response = await self.make_web_request(obj=obj, uri=obj.metadata_feed_uri,
+                                                                feed_type="metadata")
+            obj.extract_metadata_key()
+
+        #   Incremental mode, Kubra specific. An unchanged metadata key and interval generation data means an unchanged
+        #   report, so the previous run's stats objects are reused and the rest of the chain is skipped.
+        if (self.incremental_state is not None and obj.abbrev in VARS.kubra_feed_providers
+                and self.incremental_state.is_unchanged(key=key, obj=obj)):
+            self.incremental_state.restore(key=key, obj=obj)
+            self.provider_chain_seconds[key] = round(time.perf_counter() - start, 3)
+            DOIT_UTIL.print_tabbed_string(value=f"{key} unchanged since last run ({self.provider_chain_seconds[key]}s)")
+            return None
+
+        #   Date created, for providers with a date created service. NOTE: For Kubra feeds this is a second call to
+        #   the metadata key uri
+        if obj.date_created_feed_uri not in VARS.none_and_not_available:
+            obj.build_date_created_feed_uri()
+            obj.date_created_feed_response = await self.make_web_request(obj=obj, uri=obj.date_created_feed_uri,
+                                                                    feed_type="date_created")
+            obj.extract_date_created_from_feed()
+
+        #   Configuration, Kubra specific. Provides the report source needed in the data feed uri. Not every Kubra
+        #   object reads the configuration feed (BGE ZIP report source comes from a fixed template).
+        if obj.abbrev in VARS.kubra_feed_providers:
+            if obj.configuration_feed_required:
+                obj.build_configuration_feed_uri()
+                obj.configuration_feed_response = await self.make_web_request(obj=obj, uri=obj.configuration_url,
+                                                                             feed_type="configuration")
+            obj.extract_source_report()
+
+        #   Data feed
+        if obj.metadata_key not in VARS.none_and_not_available:
+            obj.build_data_feed_uri()
+        obj.data_feed_response = await self.make_web_request(obj=obj, uri=obj.data_feed_uri, feed_type="data")
+
+        self.provider_chain_seconds[key] = round(time.perf_counter() - start, 3)
+        DOIT_UTIL.print_tabbed_string(value=f"{key} feeds retrieved ({self.provider_chain_seconds[key]}s)")
+        return None
+
+    async def run_all_provider_chains(self) -> None:
+        """
+        Run the feed request chain for every provider object concurrently, until all finish or the deadline passes.
+        An exception in one provider chain is reported and does not stop the chains of the other providers. Chains
+        still running at the deadline are cancelled.
+        :return: None
+        """
+        tasks_by_key = {key: asyncio.ensure_future(self.run_provider_chain(key=key, obj=obj))
+                        for key, obj in self.provider_objects.items()}
+        done, pending = await asyncio.wait(tasks_by_key.values(),
+                                           timeout=max(self.deadline - time.monotonic(), 0))
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        for key, task in tasks_by_key.items():
+            if task in pending:
+                print(f"Fetch phase deadline ({self.deadline_seconds}s) reached for {key}. Provider feeds incomplete.")
+            elif task.exception() is not None:
+                print(f"Exception during feed requests for {key}. Provider feeds incomplete. {task.exception()}")
+        return None
+
+    def run(self) -> None:
+        """
+        Run the fetch phase for all provider objects and block until complete or the deadline passes.
+        Worker threads still finishing a request after the deadline are not waited on; their request timeouts are
+        already limited by the deadline.
+        :return: None
+        """
+        start = time.perf_counter()
+        WebFunc.WebFunctionality.CLIENT.mount_host_adapters(uris=self.gather_feed_uris())
+        self.deadline = time.monotonic() + self.deadline_seconds
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            asyncio.run(self.run_all_provider_chains())
+        finally:
+            self.executor.shutdown(wait=False)
+            self.executor = None
+        if VARS.web_fixture_mode != "replay":
+            WebFunc.WebFunctionality.CLIENT.latency_budget.save()
+        print(f"Fetch phase completed in {round(time.perf_counter() - start, 3)}s. "
+              f"Slowest provider chain: {max(self.provider_chain_seconds.values(), default=0)}s")
+        print("Connection reuse by host:")
+        WebFunc.WebFunctionality.CLIENT.print_connection_reuse_statistics()
+        WebFunc.WebFunctionality.CLIENT.coalescing_cache.print_statistics()
+        if WebFunc.WebFunctionality.CLIENT.conditional_cache is not None:
+            print(f"\tNot modified since last run (cached body reused): "
+                  f"{WebFunc.WebFunctionality.CLIENT.conditional_cache.not_modified_count}")
+        self.print_transfer_statistics()
+        return None
@@ -0,0 +1,104 @@
+"""
+Module containing a KubraIncrementalState class for skipping unchanged Kubra (BGE, DEL, PEP) feeds between runs.
+Kubra metadata provides the deployment id (metadata key) and interval_generation_data before the configuration and
+report.json are requested. When those values match the previous run the report is the same, so the configuration
+request, data feed request, and parsing are skipped and the stats objects from the previous run are reused.
+"""
+
+from datetime import datetime
+from PowerOutages.doit_PowerOutage_ProviderClasses import Outage
+from PowerOutages.doit_PowerOutage_ProviderClasses import OutageBatch
+import PowerOutages.doit_PowerOutage_CentralizedVariables as VARS
+import json
+import os
+
+
+class KubraIncrementalState:
+    """
+    Persisted per provider key (example BGE_County) record of the last seen metadata key, interval generation data,
+    date created, feed status codes, and resulting parsed stats objects.
+    """
+
+    def __init__(self, state_file_path: str = None):
+        self.state_file_path = os.path.join(VARS._root_project_path, VARS.run_state_directory,
+                                            VARS.kubra_incremental_state_file_name) if state_file_path is None else state_file_path
+        self.state_by_key = {}
+        self.unchanged_keys = []
+
+    def is_unchanged(self, key: str, obj) -> bool:
+        """
+        Determine if the Kubra metadata key and interval generation data match the previous run.
+        :param key: unique provider key, example BGE_County
+        :param obj: Kubra provider object with metadata key and interval generation data extracted
+        :return: bool
+        """
+        previous = self.state_by_key.get(key)
+        if previous is None:
+            return False
+        return (previous["metadata_key"] == obj.metadata_key
+                and previous["interval_generation_data"] == obj.interval_generation_data)
+
+    def load(self) -> None:
+        """
+        Load the state file from the previous run. A missing or unreadable file means every provider is processed.
+        :return: None
+        """
+        try:
+            with open(self.state_file_path, "r") as file_handler:
+                self.state_by_key = json.load(file_handler)
+        except (FileNotFoundError, ValueError) as e:
+            self.state_by_key = {}
+        return None
+
+    def record(self, key: str, obj) -> None:
+        """
+        Record the metadata values and parsed stats objects of a provider for use by the next run.
+        Providers whose data feed did not succeed are not recorded, and any previous state is dropped.
+        :param key: unique provider key, example BGE_County
+        :param obj: Kubra provider object after response processing
+        :return: None
+        """
+        if obj.stats_objects is None or obj.data_feed_response_status_code != 200:
+            self.state_by_key.pop(key, None)
+            return None
+        self.state_by_key[key] = {"metadata_key": obj.metadata_key,
+                                  "interval_generation_data": obj.interval_generation_data,
+                                  "date_created": obj.date_created,
+                                  "date_created_datetime": (None if obj.date_created_datetime is None
+                                                            else obj.date_created_datetime.isoformat()),
+                                  "data_feed_response_status_code": obj.data_feed_response_status_code,
+                                  "date_created_feed_response_status_code": obj.date_created_feed_response_status_code,
+                                  "stats_objects": obj.stats_objects.to_record_dicts()}
+        return None
+
+    def restore(self, key: str, obj) -> None:
+        """
+        Restore the previous run's date created, status codes, and stats objects onto the provider object.
+        The parsed date created datetime is restored from its ISO string, so the groomed date created is not parsed
+        again. The date updated value is refreshed when records are written.
+        :param key: unique provider key, example BGE_County
+        :param obj: Kubra provider object
+        :return: None
+        """
+        previous = self.state_by_key[key]
+        obj.date_created = previous["date_created"]
+        date_created_iso = previous.get("date_created_datetime")
+        obj.date_created_datetime = None if date_created_iso is None else datetime.fromisoformat(date_created_iso)
+        obj.data_feed_response_status_code = previous["data_feed_response_status_code"]
+        obj.date_created_feed_response_status_code = previous["date_created_feed_response_status_code"]
+        obj.stats_objects = OutageBatch(outages=[Outage(**stat_dict) for stat_dict in previous["stats_objects"]])
+        obj.is_unchanged_since_last_run = True
+        self.unchanged_keys.append(key)
+        return None
+
+    def save(self) -> None:
+        """
+        Write the state file for the next run.
+        :return: None
+        """
+        os.makedirs(os.path.dirname(self.state_file_path), exist_ok=True)
+        temp_path = f"{self.state_file_path}.tmp"
+        with open(temp_path, "w") as file_handler:
+            json.dump(self.state_by_key, file_handler)
+        os.replace(temp_path, self.state_file_path)
+        return None
@@ -0,0 +1,57 @@
+"""
+Module containing a JSONDecoder class, the single decoding layer for json provider feeds.
+The fastest installed backend is used, orjson then ujson, with the standard library json module as the fallback, unless
+a backend is named in the centralized variables. Response bodies are decoded from the raw bytes rather than from
+response.text, so the decoded str copy of the body is never made.
+"""
+
+import PowerOutages.doit_PowerOutage_CentralizedVariables as VARS
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+
+class JSONDecoder:
+    """
+    Decodes json bytes or str with the selected backend.
+    """
+
+    def __init__(self, backend_name: str = VARS.json_decode_backend):
+        backends = JSONDecoder.available_backends()
+        if backend_name is None:
+            backend_name = next(iter(backends))
+        elif backend_name not in backends:
+            print(f"JSON decode backend '{backend_name}' not installed. Using {next(iter(backends))}")
+            backend_name = next(iter(backends))
+        self.backend_name = backend_name
+        self.loads = backends[backend_name]
+
+    @staticmethod
+    def available_backends() -> dict:
+        """
+        Get the installed backends, fastest first.
+        :return: dict of backend name to loads function
+        """
+        backends = {}
+        if orjson is not None:
+            backends["orjson"] = orjson.loads
+        if ujson is not None:
+            backends["ujson"] = ujson.loads
+        backends["json"] = json.loads
+        return backends
+
+    def decode(self, content):
+        """
+        Decode json content.
+        :param content: bytes (preferred) or str json
+        :return: decoded json, usually dict
+        """
+        return self.loads(content)
@@ -3,14 +3,28 @@ Module contains a KubraParent class that inherits from Provider class. KubraPare
 specific to the peculiarities of the DEL, PEP, and BGE feeds and the processing they require that is not common to all
 providers but common to Kubra provided feeds. KubraParent was created as a result and is intended to provide
 flexibility for future changes. It acts as an interface.
+The report.json can be parsed in a streaming fashion, one area at a time, when the optional ijson package is
+installed and the report is large enough to warrant it. Otherwise the whole report is decoded into a dict tree and
+walked. Either way the parse time is added to the
+json decode time of the provider.
 """
 
+from PowerOutages.doit_PowerOutage_ExtractionSpecs import ExtractionSpec
+from PowerOutages.doit_PowerOutage_MultiZipSplitCache import MultiZipSplitCache
 from PowerOutages.doit_PowerOutage_UtilityClass import Utility as DOIT_UTIL
-from PowerOutages.doit_PowerOutage_ProviderClasses import Outage
+from PowerOutages.doit_PowerOutage_ProviderClasses import OutageBatch
 from PowerOutages.doit_PowerOutage_ProviderClasses import Provider
 import datetime
-import pytz
+import io
+import numpy as np
 import PowerOutages.doit_PowerOutage_CentralizedVariables as VARS
+import time
+
+try:
+    import ijson
+    from ijson.common import ObjectBuilder
+except ImportError:
+    ijson = None
 
 
 class KubraParent(Provider):
@@ -19,12 +33,15 @@ class KubraParent(Provider):
     Certain functions are overloaded in child classes.
     """
 
+    AREA_EXTRACTION_SPEC = ExtractionSpec(fields={"area": "name", "outages": "cust_a.val", "customers": "cust_s"})
     MULTI_ZIP_CODE_VALUE_DELIMITER = VARS.multi_zip_code_value_delimiter
+    MULTI_ZIP_SPLIT_CACHE = MultiZipSplitCache(zip_geography=Provider.ZIP_GEOGRAPHY)
 
     def __init__(self, provider_abbrev, style):
         super(KubraParent, self).__init__(provider_abbrev=provider_abbrev, style=style)
         self.area_list = None
         self.configuration_url = None
+        self.configuration_feed_required = True
         self.configuration_feed_response = None
         self.date_created_attribute = "updatedAt"  # Attribute override from Provider
         self.kubra_data_dict_attribute = "data"
@@ -75,27 +92,90 @@ class KubraParent(Provider):
         self.state_to_data_list_dict = states_outages_list_dict
         return None
 
+    def extract_date_created_from_feed(self) -> None:
+        """
+        Extract the date created value from the date created feed response and assign to attribute.
+        Kubra date data sits at a different level of the response json than other providers and is in milliseconds,
+        so it requires processing to match the format of other providers date time strings.
+        Override of Provider method.
+        :return: None
+        """
+        if "xml" in self.date_created_feed_response.headers["content-type"]:
+            super(KubraParent, self).extract_date_created_from_feed()
+            return None
+        date_created_response_dict = self.decode_json_response(response=self.date_created_feed_response)
+        self.date_created = DOIT_UTIL.extract_attribute_from_dict(data_dict=date_created_response_dict,
+                                                                  attribute_name=self.date_created_attribute)
+        self.process_date_created_to_seconds()
+        return None
+
+    def extract_metadata_key(self) -> None:
+        """
+        Extract the metadata key, and the second Kubra specific interval generation data key, from the metadata feed.
+        Override of Provider method.
+        :return: None
+        """
+        super(KubraParent, self).extract_metadata_key()
+        metadata_response_dict = self.decode_json_response(response=self.metadata_feed_response)
+        interval_gen_data_dict = DOIT_UTIL.extract_attribute_from_dict(data_dict=metadata_response_dict,
+                                                                       attribute_name=self.kubra_data_dict_attribute)
+        self.interval_generation_data = DOIT_UTIL.extract_attribute_from_dict(
+            data_dict=interval_gen_data_dict,
+            attribute_name=self.interval_generation_data_attribute)
+        return None
+
     def extract_outage_counts_by_area(self) -> None:
         """
         Extract outage counts by area from the outage dictionary, exchange state abbreviation for full name, and
-        build stat objects
+        build stat objects. Areas missing a field are skipped and recorded in the extraction errors.
         :return: None
         """
-        list_of_stats_objects = []
+        stats_objects = OutageBatch()
         for state_abbrev, outages_list in self.state_to_data_list_dict.items():
             state_groomed = DOIT_UTIL.exchange_state_abbrev_for_full_value(abbrev=state_abbrev)
-            for area_dict in outages_list:
-                area = DOIT_UTIL.extract_attribute_from_dict(data_dict=area_dict, attribute_name="name")
-                outages_dict = DOIT_UTIL.extract_attribute_from_dict(data_dict=area_dict, attribute_name="cust_a")
-                outages = DOIT_UTIL.extract_attribute_from_dict(data_dict=outages_dict, attribute_name="val")
-                customers = DOIT_UTIL.extract_attribute_from_dict(data_dict=area_dict, attribute_name="cust_s")
-                list_of_stats_objects.append(Outage(abbrev=self.abbrev,
-                                                    style=self.style,
-                                                    area=area,
-                                                    outages=outages,
-                                                    customers=customers,
-                                                    state=state_groomed))
-        self.stats_objects = list_of_stats_objects
+            for values in KubraParent.AREA_EXTRACTION_SPEC.extract_records(records=outages_list,
+                                                                           errors=self.extraction_errors):
+                stats_objects.append_values(abbrev=self.abbrev,
+                                            style=self.style,
+                                            area=values["area"],
+                                            outages=values["outages"],
+                                            customers=values["customers"],
+                                            state=state_groomed)
+        self.stats_objects = stats_objects
+        return None
+
+    def extract_outage_counts_from_report(self) -> None:
+        """
+        Extract outage counts from the report.json data feed response and build stat objects.
+        Uses the streaming parse when enabled, ijson is installed, and the report is at least the streaming minimum
+        size, otherwise the full decode and walk. Streaming costs about three times the cpu of the full decode, so it
+        is only worth its lower peak memory on the largest reports.
+        :return: None
+        """
+        if (VARS.kubra_streaming_parse_enabled and ijson is not None
+                and len(self.data_feed_response.content) >= VARS.kubra_streaming_parse_minimum_bytes):
+            self.extract_outage_counts_from_report_stream()
+        else:
+            self.extract_top_level_areas_list()
+            self.extract_area_outage_lists_by_state()
+            self.extract_outage_counts_by_area()
+        return None
+
+    def extract_outage_counts_from_report_stream(self) -> None:
+        """
+        Build stat objects directly from the area outage tuples streamed from the report.json response body.
+        The full report dict tree, and the intermediate area and state lists, are never built.
+        :return: None
+        """
+        stats_objects = OutageBatch()
+        for state_groomed, area, outages, customers in self.generate_area_outage_tuples():
+            stats_objects.append_values(abbrev=self.abbrev,
+                                        style=self.style,
+                                        area=area,
+                                        outages=outages,
+                                        customers=customers,
+                                        state=state_groomed)
+        self.stats_objects = stats_objects
         return None
 
     def extract_source_report(self) -> None:
@@ -103,7 +183,7 @@ class KubraParent(Provider):
         Extract the source report string value from the configuration feed response json
         :return: None
         """
-        configuration_json = self.configuration_feed_response.json()
+        configuration_json = self.decode_json_response(response=self.configuration_feed_response)
         config_data = DOIT_UTIL.extract_attribute_from_dict(data_dict=configuration_json,
                                                             attribute_name="config")
         reports_data = DOIT_UTIL.extract_attribute_from_dict(data_dict=config_data,
@@ -125,21 +205,113 @@ class KubraParent(Provider):
         Extract the top level area key information from a json response.
         :return: None
         """
-        data_json = self.data_feed_response.json()
+        data_json = self.decode_json_response(response=self.data_feed_response)
         file_data = DOIT_UTIL.extract_attribute_from_dict(data_dict=data_json,
                                                           attribute_name="file_data")
         self.area_list = DOIT_UTIL.extract_attribute_from_dict(data_dict=file_data,
                                                                attribute_name="areas")
         return None
 
+    def gather_transfer_statistics(self) -> dict:
+        """
+        Gather the transfer statistics of the feed responses received, including the Kubra configuration feed.
+        Override of Provider method.
+        :return: dict of feed name to transfer statistics dict
+        """
+        transfer_statistics = super(KubraParent, self).gather_transfer_statistics()
+        if hasattr(self.configuration_feed_response, "transfer_statistics"):
+            transfer_statistics["configuration"] = self.configuration_feed_response.transfer_statistics
+        return transfer_statistics
+
+    def generate_area_dicts_from_report_stream(self):
+        """
+        Stream the report.json response body and yield each area dict with the abbreviation of its state.
+        The report hierarchy is file_data -> areas (states) -> areas. Only one area dict is built at a time. If a
+        state name follows its areas in the body, those areas are held until the name is read.
+        Overloaded in child classes whose reports do not contain a state level.
+        :return: generator of (state abbreviation, area dict) tuples
+        """
+        state_prefix = "file_data.areas.item"
+        state_name_prefix = f"{state_prefix}.name"
+        area_prefix = f"{state_prefix}.areas.item"
+        state_abbrev = None
+        areas_awaiting_state = []
+        builder = None
+        for prefix, event, value in ijson.parse(io.BytesIO(self.data_feed_response.content)):
+            if builder is not None:
+                builder.event(event, value)
+                if prefix == area_prefix and event == "end_map":
+                    if state_abbrev is None:
+                        areas_awaiting_state.append(builder.value)
+                    else:
+                        yield state_abbrev, builder.value
+                    builder = None
+            elif prefix == area_prefix and event == "start_map":
+                builder = ObjectBuilder()
+                builder.event(event, value)
+            elif prefix == state_name_prefix:
+                state_abbrev = value
+                for area_dict in areas_awaiting_state:
+                    yield state_abbrev, area_dict
+                areas_awaiting_state = []
+            elif prefix == state_prefix and event == "end_map":
+                state_abbrev = None
+        return None
+
+    def generate_area_outage_tuples(self):
+        """
+        Yield the state full name, area name, outages (cust_a.val), and customers (cust_s) for each streamed area.
+        Areas missing a field are skipped and recorded in the extraction errors.
+        :return: generator of tuples
+        """
+        area_dicts = self.generate_timed_stream_items(items=self.generate_area_dicts_from_report_stream())
+        for record_index, (state_abbrev, area_dict) in enumerate(area_dicts):
+            values = KubraParent.AREA_EXTRACTION_SPEC.extract(record=area_dict, record_index=record_index,
+                                                              errors=self.extraction_errors)
+            if values is not None:
+                yield (DOIT_UTIL.exchange_state_abbrev_for_full_value(abbrev=state_abbrev),
+                       values["area"],
+                       values["outages"],
+                       values["customers"])
+
+    def generate_timed_stream_items(self, items):
+        """
+        Yield the items of a streaming parse generator, adding the time spent parsing to the total json decode time of
+        the provider object, as decode_json_content() does for a full decode. Time spent by the caller between items
+        is not counted.
+        :param items: generator of items parsed from a response stream
+        :return: generator of the same items
+        """
+        iterator = iter(items)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.json_decode_seconds += time.perf_counter() - start
+                return None
+            self.json_decode_seconds += time.perf_counter() - start
+            yield item
+
+    @staticmethod
+    def generate_top_level_area_dicts_from_stream(report_stream):
+        """
+        Yield each dict in the file_data -> areas list of a report stream, one at a time.
+        For reports without a state level, where the top level areas are the outage areas.
+        :param report_stream: file like object of the report.json bytes
+        :return: generator of area dicts
+        """
+        yield from ijson.items(report_stream, "file_data.areas.item")
+
     def process_multi_value_zips_to_single_value(self) -> None:
         """
         Process "area" values, containing multiple comma separated zips, into new single zip value objects.
-        This function is rather long and works on each stat object in a list at a time. The stat object .area attribute
-        is examined, split into single values if necessary, then the .outages are divided evenly among the newly
-        created single zip objects. The fractional remainder of outages are distributed evenly until there are no more
-        outages to assign so that no values are created or lost. The original multi-value zip object is deleted from
-        the stat objects list and the newly created single value zip objects are appended in their place. To give this
+        The multi-value area strings are looked up in the shared multi-value zip split cache, which splits each string
+        and keeps the zips that have polygon geometry the first time it is seen, in this run or a previous one. The
+        outages of all multi-value stat objects are then divided evenly among their single zips in one vectorized
+        step; the whole portion to every single, then the remainder distributed one at a time from the first single so
+        that no values are created or lost. The original multi-value zip objects are deleted from the stat objects
+        batch and the newly created single value zip objects are appended. To give this
         process context, in the original process design the multi-value zips strings reported by PEP and DEL were
         written to the database as reported. Then, CTK zip values were checked against a database table that basically
         served as a dictionary. There was a single key value with a corresponding multi-value string of zips. The CTK
@@ -148,97 +320,62 @@ class KubraParent(Provider):
         to be mappable. The new design does away with the multi-value method and simply breaks the multi into singles
         and distributes the counts as evenly as possible. This design is based around the zip code geometry layer
         instead of revolving around the business practice of PEP and DEL.
+        Multi-value strings with no geometry zips are left in place and reported in a single summary line.
         :return: None
         """
 
-        # Inspect every existing stat object to determine if it is multiple comma separated zips or a single zip
-        stat_objs_to_delete = []    # Accumulate the multi zips that will be replaced by single
-        new_stat_objs_to_append = []    # Accumulate the newly created single zip objects
-
-        for stat_obj in self.stats_objects:
-
-            # If the delimiter, currently a comma, is in the .area then it is multi-value and needs to be processed
-            if KubraParent.MULTI_ZIP_CODE_VALUE_DELIMITER in stat_obj.area:
-
-                # Split the multi value string into a list of single value zips
-                singles = stat_obj.area.split(KubraParent.MULTI_ZIP_CODE_VALUE_DELIMITER)
-            else:
+        # Inspect every area to determine if it is multiple comma separated zips and, if so, get its geometry zips
+        split_indices = []  # Rows of the multi zips that will be replaced by singles
+        split_geometry_zips = []
+        no_geometry_indices = []
+        for index, area in enumerate(self.stats_objects.area):
+            if KubraParent.MULTI_ZIP_CODE_VALUE_DELIMITER not in area:
                 continue
-
-            # For each single value, check if it is in the master maryland list of zips with geometry.
-            # The master maryland list of zips with geometry came from a maryland zip codes feature class.
-            non_geometry_zips = []
-            geometry_zips = []
-
-            for zipcode in singles:
-                zipcode = zipcode.strip()
-
-                # Check the master dictionary, try the key, if it's there it will work and if not it will throw
-                try:
-
-                    # TODO: Future, when incorporate point geometry zips will need to adjust here
-                    # if in dict then no error, and we don't do anything with the area name value that is returned
-                    _ = VARS.maryland_master_inventory_zip_codes_polygon_geometry[zipcode]
-
-                except KeyError as ke:
-
-                    # Accumulate the non-geometry zip codes
-                    non_geometry_zips.append(zipcode)
-                    continue
-
-                else:
-
-                    # Accumulate the zips that correspond with a valid zip polygon geometry.
-                    geometry_zips.append(zipcode)
-
-            # Attempt to build stat objects for singles but protect against case where all singles are non-geometry zips
-            if len(geometry_zips) > 0:
-
-                # Calculate the whole portion and the remaining fraction of outages based on the number of singles
-                portion = stat_obj.outages // len(geometry_zips)  # Truncation division
-                fraction = stat_obj.outages % len(geometry_zips)  # Finding remainder using modulo operator
-
-                # Since the stat object of focus will be converted to new single zip value objects, it now needs to be
-                #   deleted from the original list of stat objects. Accumulate those to be deleted.
-                stat_objs_to_delete.append(stat_obj)
-
-                # Create a list of the new singles objects that will be appended to the original list. Revise the
-                #   customer count value because the original reported value will not be valid or used
-                singles_stats_objects_list = [Outage(abbrev=stat_obj.abbrev,
-                                                     style=stat_obj.style,
-                                                     area=value,    # NOTICE
-                                                     outages=portion,   # NOTICE
-                                                     customers=VARS.database_flag,  # NOTICE
-                                                     state=stat_obj.state
-                                                     ) for value in geometry_zips]
-
+            geometry_zips = KubraParent.MULTI_ZIP_SPLIT_CACHE.get_geometry_zips(area=area)
+            if geometry_zips:
+                split_indices.append(index)
+                split_geometry_zips.append(geometry_zips)
             else:
 
                 # The scenario, if encountered, where all zips in the multi-value string have no corresponding geometry.
-                print(f"WARNING: Multi-value zip string ({stat_obj.area}) (prov={stat_obj.abbrev}, state={stat_obj.state}) all registered as 'no-geometry' so count value ({stat_obj.outages}) could not be applied for MD map display.")
-                continue
-
-            # Distribute the fraction amount until there are no more remainder outage counts
-            if fraction > 0:
-                for single_zip_obj in singles_stats_objects_list:
-                    if fraction > 0:
-                        single_zip_obj.outages += 1
-                        fraction -= 1
-
-            print(f"Multi-value zip: {stat_obj}")
-            for single_zip_obj in singles_stats_objects_list:
-                print(f"\tSingle: {single_zip_obj}")
-
-            # Track new singles to be added to original list of stat objects.
-            new_stat_objs_to_append.extend(singles_stats_objects_list)
-
-        # Delete old stats objects
-        for old_obj in stat_objs_to_delete:
-            self.stats_objects.remove(old_obj)
-
-        # Add the new single value objects to the original stat objects list
-        self.stats_objects.extend(new_stat_objs_to_append)
-
+                no_geometry_indices.append(index)
+
+        if no_geometry_indices:
+            unapplied_outages = sum(self.stats_objects.outages[index] for index in no_geometry_indices)
+            examples = [self.stats_objects.area[index] for index in no_geometry_indices[:3]]
+            print(f"WARNING: {len(no_geometry_indices)} multi-value zip strings ({self.abbrev} {self.style}) all "
+                  f"registered as 'no-geometry' so count values ({unapplied_outages} outages) could not be applied "
+                  f"for MD map display. Examples: {examples}")
+        if not split_indices:
+            return None
+
+        # Calculate the whole portion and the remaining fraction of outages of every multi zip at once, then give each
+        #   single the portion plus one while its position is less than the fraction.
+        singles_counts = np.fromiter((len(geometry_zips) for geometry_zips in split_geometry_zips), dtype=np.int64,
+                                     count=len(split_geometry_zips))
+        multi_outages = np.fromiter((self.stats_objects.outages[index] for index in split_indices), dtype=np.int64,
+                                    count=len(split_indices))
+        portion, fraction = np.divmod(multi_outages, singles_counts)
+        group_starts = np.cumsum(singles_counts) - singles_counts
+        positions = np.arange(singles_counts.sum()) - np.repeat(group_starts, singles_counts)
+        singles_outages = np.repeat(portion, singles_counts) + (positions < np.repeat(fraction, singles_counts))
+
+        # Build the new singles from the multi rows (abbrev, style, state), revising area and outages. Revise the
+        #   customer count value because the original reported value will not be valid or used
+        singles = self.stats_objects.take(indices=np.repeat(split_indices, singles_counts).tolist())
+        singles.set_column(column_name="area",
+                           values=[zip_code for geometry_zips in split_geometry_zips for zip_code in geometry_zips])
+        singles.set_column(column_name="outages", values=singles_outages.tolist())
+        singles.set_column(column_name="customers", values=[VARS.database_flag] * len(singles))
+        print(f"Multi-value zips ({self.abbrev} {self.style}): {len(split_indices)} split into {len(singles)} single "
+              f"zips. Split cache totals this run, hits {KubraParent.MULTI_ZIP_SPLIT_CACHE.hits}, "
+              f"misses {KubraParent.MULTI_ZIP_SPLIT_CACHE.misses}")
+
+        # Delete old stats objects and add the new single value objects to the original stat objects batch
+        keep_mask = np.ones(len(self.stats_objects), dtype=bool)
+        keep_mask[split_indices] = False
+        self.stats_objects = self.stats_objects.filter(mask=keep_mask)
+        self.stats_objects.extend(outages=singles)
         return None
 
     def process_date_created_to_seconds(self) -> None:
@@ -247,9 +384,8 @@ class KubraParent(Provider):
         :return: None
         """
         seconds = self.date_created / 1000
-        tz_eastern = pytz.timezone('US/Eastern')
-        dt_obj = datetime.datetime.fromtimestamp(seconds, tz=tz_eastern)
-        self.date_created = dt_obj.strftime("%Y-%m-%dT%H:%M:%S")  # converted to string so dateutil.parser won't choke
+        dt_obj = datetime.datetime.fromtimestamp(seconds, tz=VARS.eastern_tz)  # Cached timezone object
+        self.date_created = dt_obj.strftime("%Y-%m-%dT%H:%M:%S")  # converted to string, in the format parsed by groom
 
         return None
 
@@ -0,0 +1,136 @@
+"""
+Module containing an EndpointLatencyBudget class for deadline aware web request timeouts.
+Each feed type (metadata, date created, configuration, data) has configured connect and read timeouts. The observed
+latency of each endpoint (host and feed type) is kept between runs and the read timeout adapts to it, so an endpoint
+that normally answers in a second is not given a minute before being retried. The read timeout is doubled on each
+retry and the last attempt gets the configured timeout, and a read timed out attempt is recorded at the configured
+timeout, so an endpoint that slows down is not locked out by its fast history. A connect timeout says nothing about read
+latency and is not recorded. Timeouts never exceed the time remaining before
+the fetch phase deadline, which bounds the worst case duration of a run.
+"""
+
+import PowerOutages.doit_PowerOutage_CentralizedVariables as VARS
+import json
+import os
+import random
+import threading
+import time
+
+
+class EndpointLatencyBudget:
+    """
+    Per endpoint latency history and timeout/backoff calculation for the web layer.
+    """
+
+    def __init__(self, history_file_path: str = None):
+        self.history_by_endpoint = None
+        self.history_file_path = os.path.join(VARS._root_project_path, VARS.run_state_directory,
+                                              VARS.web_latency_history_file_name) if history_file_path is None else history_file_path
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def backoff_seconds(attempt: int) -> float:
+        """
+        Calculate a jittered exponential backoff for a retry attempt (full jitter).
+        :param attempt: zero based number of the attempt that failed
+        :return: float seconds to wait before the next attempt
+        """
+        ceiling = min(VARS.web_retry_backoff_max_seconds, VARS.web_retry_backoff_base_seconds * (2 ** attempt))
+        return random.uniform(0, ceiling)
+
+    @staticmethod
+    def build_endpoint_key(host: str, feed_type: str) -> str:
+        """
+        Build the key for an endpoint. Paths are not used because Kubra paths change with every report.
+        :param host: network location of the request
+        :param feed_type: metadata, date_created, configuration, data, or default
+        :return: str key
+        """
+        return f"{host}|{feed_type}"
+
+    @staticmethod
+    def configured_timeout(feed_type: str) -> tuple:
+        """
+        Get the configured (connect, read) timeout for a feed type. The read timeout is the ceiling of the adaptive
+        read timeout.
+        :param feed_type: metadata, date_created, configuration, data, or default
+        :return: tuple of connect and read timeout seconds
+        """
+        return VARS.web_timeouts_by_feed_type.get(feed_type, VARS.web_timeouts_by_feed_type["default"])
+
+    def get_history(self) -> dict:
+        """
+        Get the latency history, loading the history file on first use.
+        :return: dict of endpoint key to list of recent latencies in seconds
+        """
+        with self.lock:
+            if self.history_by_endpoint is None:
+                try:
+                    with open(self.history_file_path, "r") as file_handler:
+                        self.history_by_endpoint = json.load(file_handler)
+                except (FileNotFoundError, ValueError) as e:
+                    self.history_by_endpoint = {}
+            return self.history_by_endpoint
+
+    def record(self, host: str, feed_type: str, seconds: float) -> None:
+        """
+        Record the latency of a request, keeping only the most recent values.
+        :param host: network location of the request
+        :param feed_type: metadata, date_created, configuration, data, or default
+        :param seconds: total request time in seconds
+        :return: None
+        """
+        history = self.get_history()
+        with self.lock:
+            latencies = history.setdefault(EndpointLatencyBudget.build_endpoint_key(host=host, feed_type=feed_type), [])
+            latencies.append(round(seconds, 3))
+            del latencies[:-VARS.web_latency_history_size]
+        return None
+
+    def record_timeout(self, host: str, feed_type: str) -> None:
+        """
+        Record a read timed out request as a latency at the configured read timeout, so the adaptive read timeout of a
+        slowed endpoint grows back toward the configured value instead of staying at its earlier fast latencies.
+        Not used for connect timeouts, which have their own fixed timeout.
+        :param host: network location of the request
+        :param feed_type: metadata, date_created, configuration, data, or default
+        :return: None
+        """
+        connect_timeout, read_timeout = EndpointLatencyBudget.configured_timeout(feed_type=feed_type)
+        self.record(host=host, feed_type=feed_type, seconds=read_timeout)
+        return None
+
+    def save(self) -> None:
+        """
+        Write the latency history file for use by the next run.
+        :return: None
+        """
+        history = self.get_history()
+        with self.lock:
+            os.makedirs(os.path.dirname(self.history_file_path), exist_ok=True)
+            with open(self.history_file_path, "w") as file_handler:
+                json.dump(history, file_handler)
+        return None
+
+    def timeout(self, host: str, feed_type: str, deadline: float = None, attempt: int = 0) -> tuple:
+        """
+        Determine the (connect, read) timeout for a request.
+        The configured read timeout for the feed type is the ceiling. With latency history, the read timeout is a
+        multiple of the slowest recent latency, but no less than the configured minimum, and is doubled for each
+        retry. The last attempt always gets the ceiling. Neither value exceeds the time remaining before the deadline.
+        :param host: network location of the request
+        :param feed_type: metadata, date_created, configuration, data, or default
+        :param deadline: time.monotonic() value by which the fetch phase must finish, or None
+        :param attempt: zero based number of the attempt
+        :return: tuple of connect and read timeout seconds
+        """
+        connect_timeout, read_timeout = EndpointLatencyBudget.configured_timeout(feed_type=feed_type)
+        latencies = self.get_history().get(EndpointLatencyBudget.build_endpoint_key(host=host, feed_type=feed_type))
+        if latencies and attempt < VARS.web_retry_attempts - 1:
+            adaptive_read_timeout = max(latencies) * VARS.web_adaptive_timeout_multiplier * (2 ** attempt)
+            read_timeout = min(read_timeout, max(VARS.web_minimum_read_timeout_seconds * (2 ** attempt),
+                                                 adaptive_read_timeout))
+        if deadline is not None:
+            remaining = max(deadline - time.monotonic(), 0.001)
+            connect_timeout, read_timeout = min(connect_timeout, remaining), min(read_timeout, remaining)
+        return connect_timeout, read_timeout
@@ -7,7 +7,7 @@ following order of sections: imports, variable definition/creation, web requests
 processing of response data, output of feed status to json file, and database transactions for 'realtime' and 'archive'
 and customer data.
 Main relies on the following imported modules containing classes: ArchiveClasses, CustomerClass,
-CloudStorageFunctionality, CTKClasses, DatabaseFunctionality, DELClasses, EUCClasses, FESClasses, PEPClasses,
+CloudStorageFunctionality, CTKClasses, DatabaseFunctionality, DELClasses, EUCClasses, FESClasses, FetchEngine, PEPClasses,
 SMEClasses, and UtilityClass. It also relies on a CentralizedVariables python file,
 and access through a parser to a Credentials config file and a ProvidersURI config file.
 The process is designed with an object-oriented focus. For power providers, there is a top level parent class called
@@ -58,6 +58,12 @@ def main():
     from PowerOutages.doit_PowerOutage_CloudStorageFunctionality import ArcGISOnline
     from PowerOutages.doit_PowerOutage_CloudStorageFunctionality import CloudStorage
     from PowerOutages.doit_PowerOutage_CloudStorageFunctionality import OpenData
+    from PowerOutages.doit_PowerOutage_FetchEngine import AsyncFetchEngine
+    from PowerOutages.doit_PowerOutage_IncrementalState import KubraIncrementalState
+    from PowerOutages.doit_PowerOutage_Kubra_ParentClass import KubraParent
+    from PowerOutages.doit_PowerOutage_ParsePool import ProviderParsePool
+    from PowerOutages.doit_PowerOutage_ProviderClasses import Provider
+    from PowerOutages.doit_PowerOutage_Timestamps import RunClock
     from PowerOutages.doit_PowerOutage_UtilityClass import Utility as DOIT_UTIL
     from PowerOutages.doit_PowerOutage_ArchiveClasses import ZipCodeCountAggregated
 
@@ -74,7 +80,8 @@ def main():
 
     import os
 
-    print(f"Initiated process @ {DOIT_UTIL.current_date_time_str()}")
+    RunClock.snapshot()
+    print(f"Initiated process @ {RunClock.date_time_str()}")
 
     # VARIABLES
     provider_uri_cfg_path = os.path.join(VARS._root_project_path, VARS.provider_uri_cfg_file)
@@ -100,7 +107,7 @@ def main():
                         }
 
     #   Get and store variables, as provider object attributes, from cfg file.
-    print(f"Gathering variables...{DOIT_UTIL.current_date_time_str()}")
+    print(f"Gathering variables...{RunClock.current_date_time_str()}")
     for key, obj in provider_objects.items():
         DOIT_UTIL.print_tabbed_string(value=key)
         section_keys = [item for item in DOIT_UTIL.PARSER[key]]
@@ -113,165 +120,65 @@ def main():
             obj.metadata_feed_uri, obj.data_feed_uri, obj.date_created_feed_uri = section_values
 
     # WEB REQUESTS AND PROCESSING OF RESPONSE CONTENT
-    #   Make the metadata key requests, for those providers that use the metadata key, and store the response.
-    #   Key used in the uri for accessing the data feeds and date created feeds.
-    print(f"Metadata feed processing...{DOIT_UTIL.current_date_time_str()}")
+    #   Each provider has a dependent chain of requests (metadata key -> date created/configuration -> data feed).
+    #   The chain for each provider runs as its own task and all providers run concurrently. Metadata key and date
+    #   created values are extracted as responses arrive.
+    print(f"Feed requests (metadata, date created, configuration, data)...{RunClock.current_date_time_str()}")
+    #   Incremental mode: Kubra providers whose metadata is unchanged since the last run reuse the last run's results.
+    #   Not used when recording or replaying fixtures, so that every feed is recorded and replays are repeatable.
+    kubra_incremental_state = None
+    if VARS.kubra_incremental_mode_enabled and VARS.web_fixture_mode is None:
+        kubra_incremental_state = KubraIncrementalState()
+        kubra_incremental_state.load()
+    fetch_engine = AsyncFetchEngine(provider_objects=provider_objects, incremental_state=kubra_incremental_state)
+    fetch_engine.run()
+
+    # PROCESS RESPONSE DATA
+    #   Extract the outage data from the response, for each provider. Where applicable, extract the
+    #   date created/generated. Some providers provide the date created/generated value in the data feed.
+    #   With the parse pool enabled, responses are processed in parallel in worker processes first.
+    print(f"Response data processing...{RunClock.current_date_time_str()}")
+    KubraParent.MULTI_ZIP_SPLIT_CACHE.load()
+    parse_pool = None
+    if VARS.parse_pool_enabled:
+        parse_pool = ProviderParsePool(provider_objects=provider_objects)
+        parse_pool.run()
     for key, obj in provider_objects.items():
         DOIT_UTIL.print_tabbed_string(value=key)
-        if obj.metadata_feed_uri in VARS.none_and_not_available:
+        if obj.is_unchanged_since_last_run:
 
-            # Providers who do not use the metadata key style.
+            # Stats objects and date created were restored from the previous run. Only the data age changes.
+            obj.calculate_data_age_minutes()
             continue
-        else:
-            obj.metadata_feed_response = obj.web_func_class.make_web_request(uri=obj.metadata_feed_uri)
-
-    #   Extract the metadata key and assign to provider object attribute for later use.
-    for key, obj in provider_objects.items():
-        DOIT_UTIL.print_tabbed_string(value=key)
-        if obj.metadata_feed_uri in VARS.none_and_not_available:
+        if obj.data_feed_response is None:
+            print(f"Data feed response not available: {key}")
             continue
-        else:
-            if "xml" in obj.metadata_feed_response.headers["content-type"]:
-                metadata_xml_element = DOIT_UTIL.parse_xml_response_to_element(
-                    response_xml_str=obj.metadata_feed_response.text)
-                obj.metadata_key = DOIT_UTIL.extract_attribute_value_from_xml_element_by_index(
-                    root_element=metadata_xml_element)
-            else:
-                metadata_response_dict = obj.metadata_feed_response.json()
-                obj.metadata_key = DOIT_UTIL.extract_attribute_from_dict(
-                    data_dict=metadata_response_dict,
-                    attribute_name=obj.metadata_key_attribute)
-
-        # Kubra specific, there is a second key needed
-        if obj.abbrev in VARS.kubra_feed_providers:
-            metadata_response_dict = obj.metadata_feed_response.json()
-            interval_gen_data_dict = DOIT_UTIL.extract_attribute_from_dict(
-                data_dict=metadata_response_dict,
-                attribute_name=obj.kubra_data_dict_attribute)
-            obj.interval_generation_data = DOIT_UTIL.extract_attribute_from_dict(
-                data_dict=interval_gen_data_dict,
-                attribute_name=obj.interval_generation_data_attribute)
-
-    #   Make the date created requests, for providers with a date created service, and store the response.
-    #   NOTE: For Kubra feeds this is a second call to the metadata key uri (above)
-    print(f"Date Generated feed processing...{DOIT_UTIL.current_date_time_str()}")
-    for key, obj in provider_objects.items():
-        DOIT_UTIL.print_tabbed_string(value=key)
-        if obj.date_created_feed_uri in VARS.none_and_not_available:
+        if obj.data_feed_response.status_code != 200:
+            print(f"Data feed response status code != 200: {key} {obj.data_feed_response.status_code}")
             continue
-        else:
-            obj.date_created_feed_uri = DOIT_UTIL.build_feed_uri(metadata_key=obj.metadata_key,
-                                                                 data_feed_uri=obj.date_created_feed_uri)
-            obj.date_created_feed_response = obj.web_func_class.make_web_request(uri=obj.date_created_feed_uri)
+        if parse_pool is None:
+            ProviderParsePool.process_response(key=key, obj=obj)
+        obj.calculate_data_age_minutes()
 
-    #   Extract the date created value and assign to provider object attribute
-    print(f"Extracting date created value...{DOIT_UTIL.current_date_time_str()}")
-    for key, obj in provider_objects.items():
-        DOIT_UTIL.print_tabbed_string(value=key)
-        if obj.date_created_feed_uri in VARS.none_and_not_available:
-            continue
-        else:
-            if "xml" in obj.date_created_feed_response.headers["content-type"]:
-                date_created_xml_element = DOIT_UTIL.parse_xml_response_to_element(
-                    response_xml_str=obj.date_created_feed_response.text)
-                obj.date_created = DOIT_UTIL.extract_attribute_value_from_xml_element_by_index(
-                    root_element=date_created_xml_element)
-            else:
-                date_created_response_dict = obj.date_created_feed_response.json()
-
-                # Kubra specific, date data sits at different levels of response json
-                if obj.abbrev in VARS.kubra_feed_providers:
-                    obj.date_created = DOIT_UTIL.extract_attribute_from_dict(
-                        data_dict=date_created_response_dict,
-                        attribute_name=obj.date_created_attribute)
-
-                    # Kubra datetime requires processing to match format of other providers dt strings
-                    obj.process_date_created_to_seconds()
-                else:
-                    file_data = DOIT_UTIL.extract_attribute_from_dict(data_dict=date_created_response_dict,
-                                                                      attribute_name=obj.file_data_attribute)
-                    obj.date_created = DOIT_UTIL.extract_attribute_from_dict(
-                        data_dict=file_data,
-                        attribute_name=obj.date_created_attribute)
-
-    print(f"Configuration feed processing (Kubra)...{DOIT_UTIL.current_date_time_str()}")
-    for key, obj in provider_objects.items():
-        if obj.abbrev in VARS.kubra_feed_providers:
-            DOIT_UTIL.print_tabbed_string(value=key)
-            obj.build_configuration_feed_uri()
-            obj.configuration_feed_response = obj.web_func_class.make_web_request(uri=obj.configuration_url)
-            obj.extract_source_report()
+    if parse_pool is not None:
+        parse_pool.print_worker_timings()
 
-    #   Make the data feed requests and store the response.
-    print(f"Data feed requests and response storage...{DOIT_UTIL.current_date_time_str()}")
+    print(f"JSON decode time by provider ({Provider.JSON_DECODER.backend_name})...")
     for key, obj in provider_objects.items():
-        DOIT_UTIL.print_tabbed_string(value=key)
-        if obj.metadata_key in VARS.none_and_not_available:
-            obj.data_feed_response = obj.web_func_class.make_web_request(uri=obj.data_feed_uri)
-        else:
-            obj.build_data_feed_uri()
-            obj.data_feed_response = obj.web_func_class.make_web_request(uri=obj.data_feed_uri)
+        if obj.json_decode_seconds > 0:
+            DOIT_UTIL.print_tabbed_string(value=f"{key}: {round(obj.json_decode_seconds, 4)}s")
+        obj.print_extraction_errors(unique_key=key)
 
-    # PROCESS RESPONSE DATA
-    #   Extract the outage data from the response, for each provider. Where applicable, extract the
-    #   date created/generated. Some providers provide the date created/generated value in the data feed.
-    print(f"Response data processing...{DOIT_UTIL.current_date_time_str()}")
+    print("Normalization changes by provider...")
     for key, obj in provider_objects.items():
-        DOIT_UTIL.print_tabbed_string(value=key)
-        if obj.data_feed_response.status_code != 200:
-            print(f"Data feed response status code != 200: {key} {obj.data_feed_response.status_code}")
-            continue
+        obj.print_normalization_counts(unique_key=key)
 
-        if key in ("FES_County", "FES_ZIP"):
-            obj.xml_element = DOIT_UTIL.parse_xml_response_to_element(response_xml_str=obj.data_feed_response.text)
-            obj.extract_area_outage_elements()
-            obj.extract_outage_counts()
-            obj.create_stats_objects()
-            obj.extract_date_created()
-
-        elif key in ("DEL_County", "PEP_County", "BGE_County"):
-            obj.extract_top_level_areas_list()
-            obj.extract_area_outage_lists_by_state()
-            obj.extract_outage_counts_by_area()
-
-        elif key in ("DEL_ZIP", "PEP_ZIP", "BGE_ZIP"):
-            obj.extract_top_level_areas_list()
-            obj.extract_area_outage_lists_by_state()
-            obj.extract_outage_counts_by_area()
-            obj.process_multi_value_zips_to_single_value()
-
-        elif key in ("SME_County", "SME_ZIP"):
-            obj.extract_areas_list()
-            obj.extract_outage_counts()
-
-        elif key in ("EUC_County", "EUC_ZIP"):
-            obj.xml_element = DOIT_UTIL.parse_xml_response_to_element(response_xml_str=obj.data_feed_response.text)
-            obj.extract_outage_events_list_from_xml_str()
-            obj.extract_outage_counts()
-            obj.extract_date_created()
-
-        elif key in ("CTK_County", "CTK_ZIP"):
-            obj.xml_element = DOIT_UTIL.parse_xml_response_to_element(response_xml_str=obj.data_feed_response.text)
-            obj.extract_report_by_id()
-            obj.extract_outage_dataset()
-            obj.extract_outage_counts_from_dataset()
-            obj.extract_date_created()
-
-        # Need to remove duplicates, isolate MD zips, correct spelling & punctuation, convert str counts to int,
-        #   and process date/time
-        obj.purge_duplicate_stats_objects()
-        obj.purge_zero_outage_zip_stats_objects()
-        obj.remove_non_maryland_stat_objects()
-        DOIT_UTIL.revise_county_name_spellings_and_punctuation(stats_objects_list=obj.stats_objects)
-        DOIT_UTIL.remove_commas_from_counts(objects_list=obj.stats_objects)
-        DOIT_UTIL.process_stats_objects_counts_to_integers(objects_list=obj.stats_objects, keyword="customers")
-        DOIT_UTIL.process_stats_objects_counts_to_integers(objects_list=obj.stats_objects, keyword="outages")
-        obj.groom_date_created()
-        obj.calculate_data_age_minutes()
+    #   Keep the multi-value zip strings split this run for the next run
+    KubraParent.MULTI_ZIP_SPLIT_CACHE.save()
 
     # JSON FILE OUTPUT AND FEED STATUS EVALUATION
     #   Write json file containing status check on all feeds.
-    print(f"Checking feed status's for notification purposes...{DOIT_UTIL.current_date_time_str()}")
+    print(f"Checking feed status's for notification purposes...{RunClock.current_date_time_str()}")
     for key, obj in provider_objects.items():
         DOIT_UTIL.print_tabbed_string(value=key)
         obj.set_status_codes()
@@ -279,45 +186,118 @@ def main():
         #   Down Feeds - Send Notification Email to MJOC. Piggy back on JSON feed status process
         obj.perform_feed_status_check_and_notification(alert_email_address=DOIT_UTIL.PARSER["EMAIL"]["ALERTS_ADDRESS"])
 
-    print(f"Writing feed check to json file...{DOIT_UTIL.current_date_time_str()}")
+    print(f"Writing feed check to json file...{RunClock.current_date_time_str()}")
     status_check_output_dict = {}
     for key, obj in provider_objects.items():
         DOIT_UTIL.print_tabbed_string(value=key)
         status_check_output_dict.update(obj.build_output_dict(unique_key=key))
     DOIT_UTIL.write_to_file(file=output_json_file, content=status_check_output_dict)
 
+    #   Store Kubra metadata values and stats objects for the next run's incremental check.
+    if kubra_incremental_state is not None:
+        for key, obj in provider_objects.items():
+            if obj.abbrev in VARS.kubra_feed_providers:
+                kubra_incremental_state.record(key=key, obj=obj)
+        kubra_incremental_state.save()
+        print(f"Kubra providers unchanged since last run: {kubra_incremental_state.unchanged_keys}")
+
+    #   Replay mode is for offline runs of the feed requests and processing. Database and cloud stages are skipped.
+    if VARS.web_fixture_mode == "replay":
+        print(f"Replay mode. Database and cloud storage stages skipped.\nProcess Completed...{RunClock.current_date_time_str()}")
+        return
+
     # DATABASE TRANSACTIONS
     #   Prepare for database transactions and establish a connection.
-    print(f"Database operations initiated...{DOIT_UTIL.current_date_time_str()}")
+    print(f"Database operations initiated...{RunClock.current_date_time_str()}")
     db_obj = DbMod.DatabaseUtilities(parser=DOIT_UTIL.PARSER)
     db_obj.create_database_connection_string()
     db_obj.establish_database_connection()
 
-    # REALTIME: For every provider object need to delete existing records, and update with new. Need a cursor to do so.
+    # REALTIME: For every provider object need to replace existing records with new. Need a cursor to do so.
+    #   Rows are sent as parameterized batches, not as one insert statement per stats object.
     db_obj.create_database_cursor()
-    print(f"RealTime counts update process initiated...{DOIT_UTIL.current_date_time_str()}")
-    for key, obj in provider_objects.items():
-        DOIT_UTIL.print_tabbed_string(value=key)
-
-        # Need to delete existing records from database table for every/all provider. All the same WRT delete.
-        db_obj.delete_records(style=obj.style, provider_abbrev=obj.abbrev)
+    print(f"RealTime counts update process initiated ({VARS.realtime_publish_mode})...{RunClock.current_date_time_str()}")
+    if VARS.realtime_publish_mode == "staged_swap":
 
-        try:
-            realtime_insert_generator = obj.generate_insert_sql_statement_realtime()
-            for sql_statement in realtime_insert_generator:
-                db_obj.execute_sql_statement(sql_statement=sql_statement)
-        except TypeError as te:
-            print(f"TypeError. REALTIME process. {obj.abbrev} appears to have no stats objects. \n{te}")
+        # Load every provider into the staging tables, then replace the realtime records of all providers in one short
+        #   transaction so the map service never reads a partially updated table.
+        db_obj.create_realtime_staging_tables()
+        for key, obj in provider_objects.items():
+            DOIT_UTIL.print_tabbed_string(value=key)
+            try:
+                realtime_insert_rows = obj.build_realtime_insert_rows()
+            except TypeError as te:
+                print(f"TypeError. REALTIME process. {obj.abbrev} appears to have no stats objects. \n{te}")
+            else:
+                staged_count = db_obj.bulk_insert_realtime_records(
+                    style=obj.style, rows=realtime_insert_rows,
+                    table_name=VARS.realtime_staging_table_name_by_style[obj.style])
+                print(f"Records staged ({RunClock.current_date_time_str()}): {obj.abbrev}  {obj.style} {staged_count}")
+        db_obj.commit_changes()
+        provider_abbrevs_by_style = {}
+        for obj in provider_objects.values():
+            provider_abbrevs_by_style.setdefault(obj.style, set()).add(obj.abbrev)
+        swap_counts_by_style, swap_milliseconds = db_obj.swap_realtime_from_staging(
+            provider_abbrevs_by_style=provider_abbrevs_by_style)
+        for style, counts in swap_counts_by_style.items():
+            print(f"RealTime {style} records replaced: {counts['deleted']} deleted, {counts['inserted']} inserted")
+        print(f"RealTime staged swap committed in one transaction: {swap_milliseconds}ms")
+        db_obj.drop_realtime_staging_tables()
+    elif VARS.realtime_publish_mode == "delta":
+
+        # Compare with the current records of each provider and write only what changed, in one transaction.
+        realtime_writes = {}
+        for key, obj in provider_objects.items():
+            try:
+                realtime_insert_rows = obj.build_realtime_insert_rows()
+            except TypeError as te:
+                print(f"TypeError. REALTIME process. {obj.abbrev} appears to have no stats objects. \n{te}")
+                realtime_insert_rows = []
+            realtime_writes[key] = {"style": obj.style,
+                                    "provider_abbrev": obj.abbrev,
+                                    "rows": realtime_insert_rows,
+                                    "date_created": obj.date_created,
+                                    "date_updated": obj.date_updated}
+        if VARS.database_concurrent_writers > 1:
+
+            # Independent provider/styles are written in parallel, each on its own pooled connection and transaction.
+            delta_counts_by_key = db_obj.publish_realtime_deltas_concurrently(
+                realtime_writes=realtime_writes, writer_count=VARS.database_concurrent_writers)
+            for key, counts in delta_counts_by_key.items():
+                DOIT_UTIL.print_tabbed_string(value=f"{key}: {counts['inserted']} inserted, {counts['updated']} updated, "
+                                                    f"{counts['deleted']} deleted, {counts['unchanged']} unchanged "
+                                                    f"({counts['writer']} {round(counts['seconds'], 3)}s)"
+                                                    f"{'' if counts['error'] is None else ' FAILED ' + counts['error']}")
+            print(f"RealTime delta committed per provider by concurrent writers...{RunClock.current_date_time_str()}")
         else:
-            db_obj.commit_changes()
-            print(f"Records inserted ({DOIT_UTIL.current_date_time_str()}): {obj.abbrev}  {obj.style} {len(obj.stats_objects)}")
+            delta_counts_by_key = db_obj.publish_realtime_deltas(realtime_writes=realtime_writes)
+            for key, counts in delta_counts_by_key.items():
+                DOIT_UTIL.print_tabbed_string(value=f"{key}: {counts['inserted']} inserted, {counts['updated']} updated, "
+                                                    f"{counts['deleted']} deleted, {counts['unchanged']} unchanged")
+            print(f"RealTime delta committed in one transaction...{RunClock.current_date_time_str()}")
+    else:
+        for key, obj in provider_objects.items():
+            DOIT_UTIL.print_tabbed_string(value=key)
+
+            # Need to delete existing records from database table for every/all provider. All the same WRT delete.
+            db_obj.delete_records(style=obj.style, provider_abbrev=obj.abbrev)
+
+            try:
+                realtime_insert_rows = obj.build_realtime_insert_rows()
+            except TypeError as te:
+                print(f"TypeError. REALTIME process. {obj.abbrev} appears to have no stats objects. \n{te}")
+            else:
+                inserted_count = db_obj.bulk_insert_realtime_records(style=obj.style, rows=realtime_insert_rows)
+                db_obj.commit_changes()
+                print(f"Records inserted ({RunClock.current_date_time_str()}): {obj.abbrev}  {obj.style} {inserted_count}")
 
     # Clean up for next step
+    db_obj.delete_bulk_insert_cursors()
     db_obj.delete_cursor()
 
     # CUSTOMER COUNT: Before moving to archive stage, where customer count is used to calculate percent outage, update
     #   the customer counts table using data feed values.
-    print(f"County customer counts update process initiated...{DOIT_UTIL.current_date_time_str()}")
+    print(f"County customer counts update process initiated...{RunClock.current_date_time_str()}")
     db_obj.create_database_cursor()
     cust_obj = Customer.Customer()
     cust_obj.calculate_county_customer_counts(prov_objects=provider_objects)
@@ -335,12 +315,12 @@ def main():
 
     # ARCHIVE STEPS
     # ZIP: SUM outage counts by Zip. Append aggregated count records to the Archive_PowerOutagesZipcode table.
-    print(f"Archive counts update process initiated...{DOIT_UTIL.current_date_time_str()}")
+    print(f"Archive counts update process initiated...{RunClock.current_date_time_str()}")
     archive_zip_obj = ArchiveZIP()
     db_obj.create_database_cursor()
 
     # Aggregate counts for all zips from all providers to account for outages for zips covered by multiple providers
-    print(f"Zip Code outage counts aggregation initiated...{DOIT_UTIL.current_date_time_str()}")
+    print(f"Zip Code outage counts aggregation initiated...{RunClock.current_date_time_str()}")
     for key, obj in provider_objects.items():
         DOIT_UTIL.print_tabbed_string(value=key)
         if obj.style == DOIT_UTIL.COUNTY:
@@ -374,7 +354,7 @@ def main():
         exit()
     else:
         db_obj.commit_changes()
-        print(f"{len(archive_zip_obj.master_aggregated_zip_count_objects_dict.values())} ZIP archive records inserted into Archive_PowerOutagesZipcode...{DOIT_UTIL.current_date_time_str()}")
+        print(f"{len(archive_zip_obj.master_aggregated_zip_count_objects_dict.values())} ZIP archive records inserted into Archive_PowerOutagesZipcode...{RunClock.current_date_time_str()}")
 
     # Clean up for next step
     db_obj.delete_cursor()
@@ -383,44 +363,57 @@ def main():
     # COUNTY: Get selection from PowerOutages_PowerOutagesViewForArchive and write to Archive_PowerOutagesCounty
     #   Selection from PowerOutages_PowerOutagesViewForArchive, all fields except geometry, for insertion
     archive_county_obj = ArchiveCounty()
-    try:
-        db_obj.create_database_cursor()
-        db_obj.execute_sql_statement(sql_statement=VARS.sql_select_counties_viewforarchive)
-        db_obj.fetch_all_from_selection()
-    except Exception as e:
-        # TODO: Refine exception handling when determine what issue types could be
-        print(f"ARCHIVE County process. Database selection operation error. {e}")
-        exit()
-    else:
-        archive_county_obj.build_list_of_archive_data_record_objects(selection=db_obj.selection)
-    finally:
+    county_archive_set_based_complete = False
+    if VARS.archive_county_set_based_enabled:
 
-        # Clean up for next step
-        db_obj.delete_cursor()
+        # Transfer the view records to the archive table inside the database with one INSERT...SELECT
+        county_archive_set_based_complete = archive_county_obj.insert_archive_records_set_based(db_obj=db_obj)
+        if county_archive_set_based_complete:
+            print(f"{archive_county_obj.county_archive_inserted_count} County archive records inserted into Archive_PowerOutagesCounty by INSERT...SELECT...{RunClock.current_date_time_str()}")
+        else:
+            print("ARCHIVE County set based insert not completed. Using row by row insert.")
 
-    #   Insertion into Archive_PowerOutagesCounty
-    try:
-        db_obj.create_database_cursor()
-        county_archive_insert_generator = archive_county_obj.generate_county_archive_insert_sql_statement()
-        for sql_statement in county_archive_insert_generator:
-            db_obj.execute_sql_statement(sql_statement=sql_statement)
-    except Exception as e:
-        # TODO: Refine exception handling when determine what issue types could be
-        print(f"ARCHIVE County process. Database insertion operation error. {e}")
-        print(e)
-        exit()
-    else:
-        db_obj.commit_changes()
-        print(f"{len(archive_county_obj.county_archive_record_objects_list)} County archive records inserted into Archive_PowerOutagesCounty...{DOIT_UTIL.current_date_time_str()}")
-    finally:
+    if not county_archive_set_based_complete:
 
-        # Clean up for next step
-        db_obj.delete_cursor()
+        # Fallback: select the view records into Python and insert them one statement per record
+        try:
+            db_obj.create_database_cursor()
+            db_obj.execute_sql_statement(sql_statement=VARS.sql_select_counties_viewforarchive)
+            db_obj.fetch_all_from_selection()
+        except Exception as e:
+            # TODO: Refine exception handling when determine what issue types could be
+            print(f"ARCHIVE County process. Database selection operation error. {e}")
+            exit()
+        else:
+            archive_county_obj.build_list_of_archive_data_record_objects(selection=db_obj.selection)
+        finally:
+
+            # Clean up for next step
+            db_obj.delete_cursor()
+
+        #   Insertion into Archive_PowerOutagesCounty
+        try:
+            db_obj.create_database_cursor()
+            county_archive_insert_generator = archive_county_obj.generate_county_archive_insert_sql_statement()
+            for sql_statement in county_archive_insert_generator:
+                db_obj.execute_sql_statement(sql_statement=sql_statement)
+        except Exception as e:
+            # TODO: Refine exception handling when determine what issue types could be
+            print(f"ARCHIVE County process. Database insertion operation error. {e}")
+            print(e)
+            exit()
+        else:
+            db_obj.commit_changes()
+            print(f"{len(archive_county_obj.county_archive_record_objects_list)} County archive records inserted into Archive_PowerOutagesCounty...{RunClock.current_date_time_str()}")
+        finally:
+
+            # Clean up for next step
+            db_obj.delete_cursor()
 
     #   Update RealTime_TaskTracking
     try:
         db_obj.create_database_cursor()
-        sql_task_tracking_update = VARS.sql_update_task_tracking_table.format(now=DOIT_UTIL.current_date_time_str())
+        sql_task_tracking_update = VARS.sql_update_task_tracking_table.format(now=RunClock.date_time_str())
         db_obj.execute_sql_statement(sql_statement=sql_task_tracking_update)
     except Exception as e:
         print(f"Task Tracking update. Database insertion operation error. {e}")
@@ -428,14 +421,18 @@ def main():
         exit()
     else:
         db_obj.commit_changes()
-        print(f"Task Tracking table updated...{DOIT_UTIL.current_date_time_str()}")
+        print(f"Task Tracking table updated...{RunClock.current_date_time_str()}")
     finally:
 
         # Clean up for next step
         db_obj.delete_cursor()
 
+    # Database work is done. Return the connection and close the connection pool.
+    db_obj.connection_pool.print_statistics()
+    db_obj.close_database_connections()
+
     # CLOUD STORAGE
-    print(f"Processing data for cloud storage...{DOIT_UTIL.current_date_time_str()}")
+    print(f"Processing data for cloud storage...{RunClock.current_date_time_str()}")
 
     # Generic processing, not specific to County or ZIP Code
     cloud_storage = CloudStorage()
@@ -466,7 +463,7 @@ def main():
     cloud_storage.zipcode_zipper = CloudStorage.create_lists_of_record_dicts(dataframe=cloud_storage.zipcode_outage_records_df)
     cloud_storage.feed_status_zipper = CloudStorage.create_lists_of_record_dicts(dataframe=cloud_storage.feed_status_df)
 
-    print(f"Upserting data to cloud storage...{DOIT_UTIL.current_date_time_str()}")
+    print(f"Upserting data to cloud storage...{RunClock.current_date_time_str()}")
     print("OPEN DATA PORTAL")
     open_data = OpenData(parser=DOIT_UTIL.PARSER)
     open_data.create_socrata_client()
@@ -501,7 +498,7 @@ def main():
         arc_cloud_obj.delete_features()
         arc_cloud_obj.append_new_outage_data()
 
-    print(f"Deleting aged records ({OpenData.RECORD_DELETION_AGE_LIMIT_DAYS} days) in Open Data assets...{DOIT_UTIL.current_date_time_str()}")
+    print(f"Deleting aged records ({OpenData.RECORD_DELETION_AGE_LIMIT_DAYS} days) in Open Data assets...{RunClock.current_date_time_str()}")
     county_records_gen = open_data.retrieve_old_records_for_deletion(
         dataset_identifier=DOIT_UTIL.PARSER["OPENDATA"]["COUNTY_4X4"])
     zip_records_gen = open_data.retrieve_old_records_for_deletion(
@@ -516,7 +513,7 @@ def main():
     open_data.delete_records_by_uid(dataset_identifier=DOIT_UTIL.PARSER["OPENDATA"]["STATUS_4X4"],
                                     results_gen=status_records_gen)
 
-    print(f"Process Completed...{DOIT_UTIL.current_date_time_str()}")
+    print(f"Process Completed...{RunClock.current_date_time_str()}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,115 @@
+"""
+Module containing a MultiZipSplitCache class for reusing the split of multi-value zip area strings between runs.
+Kubra (PEP, DEL) zip reports name some areas with several comma separated zips, example "21921,21922", and the same
+strings appear run after run. The split, strip, and polygon geometry check of a string is done once and the resulting
+tuple of geometry zips is kept in a bounded, least recently used, cache that is saved to the RUN_STATE folder.
+A cache written against a different zip polygon inventory is discarded on load.
+"""
+
+from PowerOutages.doit_PowerOutage_ZipGeographyIndex import ZipGeographyIndex
+import PowerOutages.doit_PowerOutage_CentralizedVariables as VARS
+import collections
+import hashlib
+import json
+import os
+
+
+class MultiZipSplitCache:
+    """
+    Bounded mapping of multi-value zip area string to the tuple of its zips that have polygon geometry.
+    """
+
+    def __init__(self, zip_geography: ZipGeographyIndex, cache_file_path: str = None,
+                 max_entries: int = VARS.multi_zip_split_cache_max_entries,
+                 delimiter: str = VARS.multi_zip_code_value_delimiter):
+        self.cache_file_path = os.path.join(VARS._root_project_path, VARS.run_state_directory,
+                                            VARS.multi_zip_split_cache_file_name) if cache_file_path is None else cache_file_path
+        self.added_areas = []
+        self.delimiter = delimiter
+        self.geometry_zips_by_area = collections.OrderedDict()
+        self.hits = 0
+        self.max_entries = max_entries
+        self.misses = 0
+        self.zip_geography = zip_geography
+        self.zip_geography_fingerprint = hashlib.sha1(
+            ",".join(sorted(zip_geography.polygon_geometry_zips)).encode("utf-8")).hexdigest()
+
+    def drain_added_entries(self) -> list:
+        """
+        Get the entries split since the last drain, for a parse pool worker to return to the main process.
+        :return: list of (area str, tuple of zip code str)
+        """
+        entries = [(area, self.geometry_zips_by_area[area]) for area in self.added_areas
+                   if area in self.geometry_zips_by_area]
+        self.added_areas = []
+        return entries
+
+    def get_geometry_zips(self, area: str) -> tuple:
+        """
+        Get the zips with polygon geometry in a multi-value zip area string, splitting and checking it on a miss.
+        :param area: multi-value zip area string
+        :return: tuple of zip code str, empty if no zip in the string has geometry
+        """
+        geometry_zips = self.geometry_zips_by_area.get(area)
+        if geometry_zips is not None:
+            self.hits += 1
+            self.geometry_zips_by_area.move_to_end(area)
+            return geometry_zips
+
+        # TODO: Future, when incorporate point geometry zips will need to adjust here
+        self.misses += 1
+        self.added_areas.append(area)
+        geometry_zips = tuple(zip_code for zip_code in (value.strip() for value in area.split(self.delimiter))
+                              if self.zip_geography.has_polygon_geometry(zip_code=zip_code))
+        self.geometry_zips_by_area[area] = geometry_zips
+        if len(self.geometry_zips_by_area) > self.max_entries:
+            self.geometry_zips_by_area.popitem(last=False)
+        return geometry_zips
+
+    def load(self) -> None:
+        """
+        Load the cache file from previous runs. A missing or unreadable file, or one built against a different zip
+        polygon inventory, means every string is split again.
+        :return: None
+        """
+        try:
+            with open(self.cache_file_path, "r") as file_handler:
+                cache = json.load(file_handler)
+        except (FileNotFoundError, ValueError) as e:
+            return None
+        if cache.get("zip_geography_fingerprint") != self.zip_geography_fingerprint:
+            return None
+        entries = cache.get("entries", [])[-self.max_entries:]
+        self.geometry_zips_by_area = collections.OrderedDict((area, tuple(zips)) for area, zips in entries)
+        return None
+
+    def merge_entries(self, entries: list, hits: int = 0, misses: int = 0) -> None:
+        """
+        Add entries split in a parse pool worker, and the worker's hit and miss counts, to this cache.
+        :param entries: list of (area str, tuple of zip code str)
+        :param hits: number of cache hits in the worker
+        :param misses: number of cache misses in the worker
+        :return: None
+        """
+        for area, geometry_zips in entries:
+            self.geometry_zips_by_area[area] = tuple(geometry_zips)
+            self.geometry_zips_by_area.move_to_end(area)
+        while len(self.geometry_zips_by_area) > self.max_entries:
+            self.geometry_zips_by_area.popitem(last=False)
+        self.hits += hits
+        self.misses += misses
+        return None
+
+    def save(self) -> None:
+        """
+        Write the cache file for the next run, least recently used entries first.
+        :return: None
+        """
+        os.makedirs(os.path.dirname(self.cache_file_path), exist_ok=True)
+        temp_path = f"{self.cache_file_path}.tmp"
+        with open(temp_path, "w") as file_handler:
+            json.dump({"zip_geography_fingerprint": self.zip_geography_fingerprint,
+                       "entries": [[area, list(zips)] for area, zips in self.geometry_zips_by_area.items()]},
+                      file_handler)
+        os.replace(temp_path, self.cache_file_path)
+        return None
@@ -3,12 +3,12 @@ Module contains a PEP class that inherits from KubraParent class which inherits
 PEP class is an implementation specific to the peculiarities of the PEP feeds and the processing they require
 that is not common to all providers. PEP and DEL had shared functionality. KubraParent was created as a result and is
 intended to provide flexibility for future changes. It acts as an interface. PEP inherits from the KubraParent class.
-TODO: Future, Will need to incorporate zip code points. May want to centralize master inventory of zips for point & poly
+TODO: Future, Will need to incorporate zip code points. Zip inventories are centralized in the ZipGeographyIndex.
 """
 
-import PowerOutages.doit_PowerOutage_CentralizedVariables as VARS
 from PowerOutages.doit_PowerOutage_UtilityClass import Utility as DOIT_UTIL
 from PowerOutages.doit_PowerOutage_Kubra_ParentClass import KubraParent
+import io
 
 
 class PEP(KubraParent):
@@ -19,26 +19,28 @@ class PEP(KubraParent):
 
     def __init__(self, provider_abbrev, style):
         super(PEP, self).__init__(provider_abbrev=provider_abbrev, style=style)
-        self.md_zips_keys_only = None
 
-    @property
-    def md_zips_keys_only(self):
+    def determine_area_state_abbrev(self, area_dict: dict):
         """
-        Get the md zip codes key value
-        :return: None or list depending on object style (Zip or County)
+        Determine if an area is in MD or DC. PEPCO is assumed to only cover MD and DC.
+        For counties it is an either or situation. For zip codes each zip in a single or multi-zip string is checked,
+        MD first using the polygon geometry zips, then DC using the web scraped usps zips, both from the shared zip
+        geography index. During testing did not find a scenario where MD and DC zips were in the same outage string, so
+        the first known zip decides.
+        :param area_dict: area dictionary from the report json
+        :return: "MD", "DC", or None if no zip in the area is known
         """
-        return self.__md_zips_keys_only
+        area_name = DOIT_UTIL.extract_attribute_from_dict(data_dict=area_dict, attribute_name="name")
+        if self.style == DOIT_UTIL.COUNTY:
+            return "DC" if area_name.lower() == DOIT_UTIL.DISTRICT_OF_COLUMBIA.lower() else "MD"
+        for value in DOIT_UTIL.generate_value_from_csv_string(area_name):
+            state_abbrev = PEP.ZIP_GEOGRAPHY.determine_state_abbrev(zip_code=value, require_polygon_geometry=True)
+            if state_abbrev is not None:
+                return state_abbrev
 
-    @md_zips_keys_only.setter
-    def md_zips_keys_only(self, value):
-        """
-        Assign a list of maryland master inventory keys to attribute if the style is ZIP.
-        Do not need to perform this functionality if the object is style of COUNTY
-        :param value: expected signature, not used
-        :return: None
-        """
-        if self.style == DOIT_UTIL.ZIP:
-            self.__md_zips_keys_only = list(VARS.maryland_master_inventory_zip_codes_polygon_geometry.keys())
+            # If an unknown zip code is found, print a message and move on to next in string of zips
+            print(f"UNKNOWN ZIP CODE ({value})\t{area_dict}")
+        return None
 
     def extract_area_outage_lists_by_state(self) -> None:
         """
@@ -50,36 +52,26 @@ class PEP(KubraParent):
         assumption has been made that PEPCO only covers MD and DC.
         Overload of Kubra_ParentClass method.
         :return: None
-        TODO: Attempted to refactor to flatten nested levels. Tried inner functions and ternary etc. Future improvement.
         """
-        dc_areas_list = []
-        md_areas_list = []
-
+        state_areas_lists = {"DC": [], "MD": []}
         for area_dict in self.area_list:
-
-            # Identical for county and zip
-            area_name = DOIT_UTIL.extract_attribute_from_dict(data_dict=area_dict, attribute_name="name")
-
-            if self.style == DOIT_UTIL.COUNTY:
-
-                # Easy either or situation, unlike zip code areas
-                dc_areas_list.append(area_dict) if area_name.lower() == DOIT_UTIL.DISTRICT_OF_COLUMBIA.lower() else md_areas_list.append(area_dict)
-            else:
-
-                # Need to check each and every zip code in single or multi-zip string.
-                # During testing did not find scenario where MD and DC zip were in same outage string. Assumption made.
-                for value in DOIT_UTIL.generate_value_from_csv_string(area_name):
-                    if value in self.md_zips_keys_only:
-                        md_areas_list.append(area_dict)
-                        break
-                    elif value in VARS.district_of_columbia_zip_code_inventory_from_web:
-                        dc_areas_list.append(area_dict)
-                        break
-                    else:
-                        # If an unknown zip code is found, print a message and move on to next in string of zips
-                        print(f"UNKNOWN ZIP CODE ({value})\t{area_dict}")
-                        continue
+            state_abbrev = self.determine_area_state_abbrev(area_dict=area_dict)
+            if state_abbrev is not None:
+                state_areas_lists[state_abbrev].append(area_dict)
 
         # Need to store the DC and MD dicts with key to make states_outages_list_dict
-        self.state_to_data_list_dict = {"DC": dc_areas_list, "MD": md_areas_list}
+        self.state_to_data_list_dict = state_areas_lists
         return None
+
+    def generate_area_dicts_from_report_stream(self):
+        """
+        Stream the report.json response body and yield each area dict with its determined state (MD/DC).
+        PEPCO reports have no state level, see extract_area_outage_lists_by_state().
+        Overload of Kubra_ParentClass method.
+        :return: generator of (state abbreviation, area dict) tuples
+        """
+        report_stream = io.BytesIO(self.data_feed_response.content)
+        for area_dict in KubraParent.generate_top_level_area_dicts_from_stream(report_stream=report_stream):
+            state_abbrev = self.determine_area_state_abbrev(area_dict=area_dict)
+            if state_abbrev is not None:
+                yield state_abbrev, area_dict
@@ -0,0 +1,296 @@
+"""
+Module containing a ProviderParsePool class for processing provider responses in parallel in a process pool.
+Processing a response (extraction of outages, normalization, and date created grooming) is cpu bound and depends only
+on the response of that provider, so each provider/style response can be processed in its own worker process. A
+worker is sent a compact ParseTask (provider class, abbreviation, style, date created, and the raw data feed response
+bytes, status, and headers) and returns a ParseResult holding the stats objects batch and the other values set by
+processing, plus the worker process id and the cpu and wall seconds the task took.
+Each task has a cpu time limit, enforced in the worker with a SIGPROF interval timer where the platform provides one,
+and the phase as a whole has a wall clock limit. A provider whose task fails, exceeds the cpu limit, or is not returned
+in time is left with no stats objects, like a provider whose feed was down, and the other providers are not affected.
+Workers still running when the phase ends are terminated.
+"""
+
+from dataclasses import dataclass
+from dataclasses import field
+from PowerOutages.doit_PowerOutage_Kubra_ParentClass import KubraParent
+from PowerOutages.doit_PowerOutage_UtilityClass import Utility as DOIT_UTIL
+import PowerOutages.doit_PowerOutage_CentralizedVariables as VARS
+import multiprocessing
+import os
+import signal
+import time
+
+
+class ParseTimeoutError(Exception):
+    """
+    Raised in a worker when processing of a response exceeds the cpu time limit.
+    """
+    pass
+
+
+class ResponseContent:
+    """
+    Picklable stand-in for the data feed response in a worker. Holds only what response processing reads.
+    """
+
+    __slots__ = ("content", "headers", "status_code")
+
+    def __init__(self, content: bytes, headers: dict, status_code: int):
+        self.content = content
+        self.headers = headers
+        self.status_code = status_code
+
+
+@dataclass
+class ParseTask:
+    """
+    Everything a worker needs to process one provider/style response.
+    """
+    key: str
+    provider_class: type
+    abbrev: str
+    style: str
+    date_created: object
+    content: bytes
+    headers: dict
+    status_code: int
+    cpu_timeout_seconds: float
+
+
+@dataclass
+class ParseResult:
+    """
+    Values set by processing one provider/style response in a worker, with the worker timing.
+    """
+    key: str
+    worker_pid: int
+    cpu_seconds: float
+    wall_seconds: float
+    error: str = None
+    stats_objects: object = None
+    date_created: object = None
+    date_created_datetime: object = None
+    extraction_errors: list = field(default_factory=list)
+    normalization_counts: dict = field(default_factory=dict)
+    json_decode_seconds: float = 0.0
+    multi_zip_split_entries: list = field(default_factory=list)
+    multi_zip_split_hits: int = 0
+    multi_zip_split_misses: int = 0
+
+
+class ProviderParsePool:
+    """
+    Fans provider response processing out to a process pool and applies the results to the provider objects.
+    """
+
+    def __init__(self, provider_objects: dict, processes: int = VARS.parse_pool_processes,
+                 cpu_timeout_seconds: float = VARS.parse_pool_cpu_timeout_seconds,
+                 phase_timeout_seconds: float = VARS.parse_pool_phase_timeout_seconds):
+        self.cpu_timeout_seconds = cpu_timeout_seconds
+        self.phase_timeout_seconds = phase_timeout_seconds
+        self.phase_wall_seconds = 0.0
+        self.processes = processes
+        self.provider_objects = provider_objects
+        self.results_by_key = {}
+
+    def apply_result(self, obj, result: ParseResult) -> None:
+        """
+        Set the values returned by a worker on the provider object. Multi-value zip strings split by the worker are
+        added to the shared split cache so they are saved for the next run.
+        :param obj: provider object
+        :param result: result of processing the provider response
+        :return: None
+        """
+        if result.error is not None:
+            print(f"Response processing failed in parse pool: {result.key} {result.error}")
+            return None
+        obj.stats_objects = result.stats_objects
+        obj.date_created = result.date_created
+        obj.date_created_datetime = result.date_created_datetime
+        obj.extraction_errors = result.extraction_errors
+        obj.normalization_counts = result.normalization_counts
+        obj.json_decode_seconds += result.json_decode_seconds
+        KubraParent.MULTI_ZIP_SPLIT_CACHE.merge_entries(entries=result.multi_zip_split_entries,
+                                                        hits=result.multi_zip_split_hits,
+                                                        misses=result.multi_zip_split_misses)
+        return None
+
+    def build_tasks(self) -> list:
+        """
+        Build a task for every provider object with a response to process. Providers unchanged since the last run,
+        and providers with no data feed response or a status code other than 200, are skipped as in serial processing.
+        :return: list of ParseTask
+        """
+        tasks = []
+        for key, obj in self.provider_objects.items():
+            if obj.is_unchanged_since_last_run or obj.data_feed_response is None:
+                continue
+            if obj.data_feed_response.status_code != 200:
+                continue
+            tasks.append(ParseTask(key=key,
+                                   provider_class=type(obj),
+                                   abbrev=obj.abbrev,
+                                   style=obj.style,
+                                   date_created=obj.date_created,
+                                   content=obj.data_feed_response.content,
+                                   headers=dict(obj.data_feed_response.headers),
+                                   status_code=obj.data_feed_response.status_code,
+                                   cpu_timeout_seconds=self.cpu_timeout_seconds))
+        return tasks
+
+    @staticmethod
+    def handle_cpu_timeout(signal_number, frame) -> None:
+        """
+        Signal handler for the SIGPROF interval timer in a worker.
+        :param signal_number: signal received
+        :param frame: current stack frame
+        :return: None
+        :raises: ParseTimeoutError
+        """
+        raise ParseTimeoutError("cpu time limit exceeded")
+
+    @staticmethod
+    def initialize_worker() -> None:
+        """
+        Prepare a worker process. Loads the multi-value zip split cache from the previous run and installs the cpu
+        time limit handler where the platform provides SIGPROF interval timers.
+        :return: None
+        """
+        KubraParent.MULTI_ZIP_SPLIT_CACHE.load()
+        if hasattr(signal, "setitimer"):
+            signal.signal(signal.SIGPROF, ProviderParsePool.handle_cpu_timeout)
+        return None
+
+    @staticmethod
+    def parse_in_worker(task: ParseTask) -> ParseResult:
+        """
+        Process one provider/style response in a worker process. A new provider object is built from the task, and
+        the response is processed exactly as in serial processing.
+        NOTE: exit() calls made on bad feed content end only this task, not the worker or the run.
+        :param task: task describing the response to process
+        :return: ParseResult
+        """
+        cpu_start = time.process_time()
+        wall_start = time.perf_counter()
+        cpu_timer_available = hasattr(signal, "setitimer")
+        split_cache = KubraParent.MULTI_ZIP_SPLIT_CACHE
+        split_cache.drain_added_entries()
+        split_cache.hits, split_cache.misses = 0, 0
+        obj = task.provider_class(provider_abbrev=task.abbrev, style=task.style)
+        obj.date_created = task.date_created
+        obj.data_feed_response = ResponseContent(content=task.content, headers=task.headers,
+                                                 status_code=task.status_code)
+        error = None
+        try:
+            if cpu_timer_available:
+                signal.setitimer(signal.ITIMER_PROF, task.cpu_timeout_seconds)
+            ProviderParsePool.process_response(key=task.key, obj=obj)
+        except ParseTimeoutError as pte:
+            error = f"ParseTimeoutError: {pte} ({task.cpu_timeout_seconds}s)"
+        except SystemExit as se:
+            error = "Processing called exit(). See worker output above."
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        finally:
+            if cpu_timer_available:
+                signal.setitimer(signal.ITIMER_PROF, 0)
+        result = ParseResult(key=task.key,
+                             worker_pid=os.getpid(),
+                             cpu_seconds=time.process_time() - cpu_start,
+                             wall_seconds=time.perf_counter() - wall_start,
+                             error=error)
+        if error is None:
+            result.stats_objects = obj.stats_objects
+            result.date_created = obj.date_created
+            result.date_created_datetime = obj.date_created_datetime
+            result.extraction_errors = obj.extraction_errors
+            result.normalization_counts = obj.normalization_counts
+            result.json_decode_seconds = obj.json_decode_seconds
+            result.multi_zip_split_entries = split_cache.drain_added_entries()
+            result.multi_zip_split_hits = split_cache.hits
+            result.multi_zip_split_misses = split_cache.misses
+        return result
+
+    def print_worker_timings(self) -> None:
+        """
+        Print the cpu and wall seconds of every task, the totals for every worker process, and the phase wall time.
+        :return: None
+        """
+        print(f"Parse pool worker timings (phase wall {round(self.phase_wall_seconds, 3)}s)...")
+        seconds_by_pid = {}
+        for key, result in self.results_by_key.items():
+            DOIT_UTIL.print_tabbed_string(value=f"{key}: worker {result.worker_pid} cpu {round(result.cpu_seconds, 3)}s "
+                                                 f"wall {round(result.wall_seconds, 3)}s"
+                                                 f"{'' if result.error is None else ' FAILED'}")
+            task_count, cpu_seconds = seconds_by_pid.get(result.worker_pid, (0, 0.0))
+            seconds_by_pid[result.worker_pid] = (task_count + 1, cpu_seconds + result.cpu_seconds)
+        for worker_pid, (task_count, cpu_seconds) in sorted(seconds_by_pid.items()):
+            DOIT_UTIL.print_tabbed_string(value=f"worker {worker_pid}: {task_count} tasks, cpu {round(cpu_seconds, 3)}s")
+        return None
+
+    @staticmethod
+    def process_response(key: str, obj) -> None:
+        """
+        Extract the outage data from the response of a provider and, where applicable, the date created/generated
+        value, then normalize the stats objects and groom the date created. Used by workers and by serial processing.
+        Some providers provide the date created/generated value in the data feed.
+        :param key: provider/style key, example "PEP_ZIP"
+        :param obj: provider object with a data feed response
+        :return: None
+        """
+        if key in ("FES_County", "FES_ZIP"):
+            obj.extract_outage_counts_and_date_created()
+
+        elif key in ("DEL_County", "PEP_County", "BGE_County"):
+            obj.extract_outage_counts_from_report()
+
+        elif key in ("DEL_ZIP", "PEP_ZIP", "BGE_ZIP"):
+            obj.extract_outage_counts_from_report()
+            obj.process_multi_value_zips_to_single_value()
+
+        elif key in ("SME_County", "SME_ZIP"):
+            obj.extract_areas_list()
+            obj.extract_outage_counts()
+
+        elif key in ("EUC_County", "EUC_ZIP"):
+            obj.extract_outage_counts_and_date_created()
+
+        elif key in ("CTK_County", "CTK_ZIP"):
+            obj.extract_outage_counts_and_date_created()
+
+        # Need to remove duplicates, isolate MD zips, correct spelling & punctuation, convert str counts to int,
+        #   in a single pass, and process date/time
+        obj.normalize_stats_objects()
+        obj.groom_date_created()
+        return None
+
+    def run(self) -> None:
+        """
+        Process every response with a task in the process pool and apply the results to the provider objects.
+        Results are collected in task order until the phase timeout. Tasks not returned by then are reported and
+        the pool, with any worker still running, is terminated on exit of the context manager.
+        :return: None
+        """
+        tasks = self.build_tasks()
+        if not tasks:
+            return None
+        processes = min(self.processes or os.cpu_count() or 1, len(tasks))
+        phase_start = time.perf_counter()
+        deadline = time.monotonic() + self.phase_timeout_seconds
+        with multiprocessing.Pool(processes=processes, initializer=ProviderParsePool.initialize_worker) as pool:
+            async_results = [(task.key, pool.apply_async(ProviderParsePool.parse_in_worker, (task,))) for task in tasks]
+            for key, async_result in async_results:
+                try:
+                    result = async_result.get(timeout=max(deadline - time.monotonic(), 0))
+                except multiprocessing.TimeoutError as mte:
+                    print(f"Response processing not returned by parse pool within phase timeout "
+                          f"({self.phase_timeout_seconds}s): {key}")
+                    continue
+                except Exception as e:
+                    print(f"Response processing result not received from parse pool: {key} {type(e).__name__}: {e}")
+                    continue
+                self.results_by_key[key] = result
+                self.apply_result(obj=self.provider_objects[key], result=result)
+        self.phase_wall_seconds = time.perf_counter() - phase_start
+        return None
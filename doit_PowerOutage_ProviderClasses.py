@@ -1,47 +1,72 @@
 """
-Module contains a Provider class and an Outage dataclass.
+Module contains a Provider class, an Outage dataclass, and an OutageBatch class with its column classes.
 Provider is parent class for all power outage providers and is intended to contain shared functionality to all.
 Outage is a data class used to store reported power outage data. The Outage objects are used during database insertion.
+OutageBatch is the columnar container that holds the outages of a provider object as its stats objects. Rows are
+yielded as Outage objects when iterated.
 Provider is inherited by all of the child power providing company classes.
 
 """
 
 from dataclasses import dataclass
-from datetime import datetime
+from PowerOutages.doit_PowerOutage_JSONDecoder import JSONDecoder
+from PowerOutages.doit_PowerOutage_Timestamps import RunClock
+from PowerOutages.doit_PowerOutage_Timestamps import TimestampParser
 from PowerOutages.doit_PowerOutage_UtilityClass import Utility as DOIT_UTIL
-import dateutil.parser
+from PowerOutages.doit_PowerOutage_ZipGeographyIndex import ZipGeographyIndex
+import array
+import itertools
+import numpy as np
+import pandas as pd
 import PowerOutages.doit_PowerOutage_CentralizedVariables as VARS
 import PowerOutages.doit_PowerOutage_WebRelatedFunctionality as WebFunc
+import time
 
 
 class Provider:
     """
     Provider is a parent class containing attributes and methods common to all provider specific classes.
     It is inherited by child classes.
+    All json feed responses are decoded through the shared JSON_DECODER, which records decode time per provider object.
+    Parsed stats objects are cleaned in a single pass by normalize_stats_objects() using lookup tables built at import.
+    Zip code membership and state questions are answered by the shared ZIP_GEOGRAPHY index.
+    Date created values are parsed by the shared TIMESTAMP_PARSER, which caches each provider's date format.
     """
+
+    GROOMED_DATE_CREATED_FORMAT = "%Y-%m-%d %H:%M"
+    JSON_DECODER = JSONDecoder()
+    NORMALIZATION_STEPS = ("duplicates removed", "zero outage zips removed", "non maryland removed",
+                           "zips without geometry removed", "areas corrected", "count commas removed",
+                           "count sentinels replaced", "invalid counts flagged")
+    TIMESTAMP_PARSER = TimestampParser()
+    ZIP_GEOGRAPHY = ZipGeographyIndex()
+
     def __init__(self, provider_abbrev: str, style: str):
         self.abbrev = provider_abbrev
         self.date_created = None
+        self.date_created_datetime = None
         self.date_created_attribute = "date_generated"
         self.date_created_feed_response = None
         self.date_created_feed_response_status_code = None
         self.date_created_feed_uri = None
         self.date_updated = None
+        self.extraction_errors = []
         self.data_age_minutes = None
         self.data_feed_response = None
         self.data_feed_response_status_code = None
         self.data_feed_response_style = None
         self.data_feed_uri = None
         self.file_data_attribute = "file_data"
+        self.is_unchanged_since_last_run = False
+        self.json_decode_seconds = 0.0
         self.metadata_feed_response = None
         self.metadata_feed_response_status_code = None
         self.metadata_feed_uri = None
         self.metadata_key = None
         self.metadata_key_attribute = "directory"
+        self.normalization_counts = {}
         self.style = style
         self.stats_objects = None
-        self.sql_insert_record_county_realtime = VARS.sql_insert_record_county_realtime
-        self.sql_insert_record_zip_realtime = VARS.sql_insert_record_zip_realtime
         self.sql_insert_record_zip_archive = VARS.sql_insert_record_zip_archive
         self.web_func_class = WebFunc.WebFunctionality
 
@@ -53,9 +78,19 @@ class Provider:
         self.data_feed_uri = self.data_feed_uri.format(metadata_key=self.metadata_key)
         return None
 
+    def build_date_created_feed_uri(self) -> None:
+        """
+        Build the date created feed uri by substituting the metadata key value into the url
+        :return: None
+        """
+        self.date_created_feed_uri = DOIT_UTIL.build_feed_uri(metadata_key=self.metadata_key,
+                                                              data_feed_uri=self.date_created_feed_uri)
+        return None
+
     def build_output_dict(self, unique_key:str) -> dict:
         """
         Build a dictionary of stats used in the JSON file for web display of feed status and process health.
+        Transfer statistics for each feed requested are included under "transfer".
         :param unique_key: str value unique to each provider
         :return: dict, dictionary used in json output file.
         """
@@ -64,28 +99,81 @@ class Provider:
                              "metadata": self.metadata_feed_response_status_code,
                              "created": self.date_created,
                              "data age (min)": self.data_age_minutes,
+                             "transfer": self.gather_transfer_statistics(),
                              }
                 }
 
+    def build_realtime_insert_rows(self) -> list:
+        """
+        Build the parameter rows for the realtime insert statement of the provider style, one tuple per stats object in
+        the column order of the statement. Values are passed to the database as parameters, so apostrophe containing
+        county names need no escaping.
+        For both County and ZIP data. The date updated is the run clock snapshot.
+        Note: sql database as is will not accept a tz aware datetime value
+        :return: list of tuples
+        """
+        self.date_updated = RunClock.date_time_str()
+        row_count = len(self.stats_objects)
+        date_created_values = itertools.repeat(self.date_created, row_count)
+        date_updated_values = itertools.repeat(self.date_updated, row_count)
+        if self.style == DOIT_UTIL.ZIP:
+            return list(zip(self.stats_objects.area, self.stats_objects.abbrev, self.stats_objects.outages,
+                            date_created_values, date_updated_values))
+        return list(zip(self.stats_objects.state, self.stats_objects.area, self.stats_objects.outages,
+                        itertools.repeat(self.abbrev, row_count), date_updated_values, date_created_values))
+
     def calculate_data_age_minutes(self) -> None:
         """
-        Determine the difference between two date time values.
-        NOTE: Did not convert the datetime values involved in difference calculation to be time zone aware.
+        Determine the difference between the run clock snapshot and the date created, both time zone aware.
+        The groomed date created datetime is used when available. Date created values restored from a previous run
+        without it are parsed from the groomed string with its exact format, not through the shared parser, so the
+        format cached for the provider's raw feed value is kept.
+        NOTE: The whole difference is used (total seconds). The seconds attribute of a timedelta drops any days.
         :return: None
         """
-        try:
-            date_create_datetime_object = dateutil.parser.parse(timestr=self.date_created)
-        except ValueError as ve:
-            print(f"ValueError while parsing date created string to datetime: {self.date_created}\n{ve}")
-            self.data_age_minutes = -9999
-        except OverflowError as oe:
-            print(f"OverflowError while parsing date created string to datetime: {self.date_created}\n{oe}")
-            self.data_age_minutes = -9999
-        else:
-            difference = datetime.now() - date_create_datetime_object
-            self.data_age_minutes = round(number=(difference.seconds / 60), ndigits=1)
+        date_created_datetime_object = self.date_created_datetime
+        if date_created_datetime_object is None:
+            if self.date_created is None:
+
+                # Date created could not be groomed
+                self.data_age_minutes = -9999
+                return None
+            try:
+                date_created_datetime_object = Provider.TIMESTAMP_PARSER.localize(
+                    TimestampParser.parse_with_format(value=self.date_created,
+                                                      date_format=Provider.GROOMED_DATE_CREATED_FORMAT))
+            except (TypeError, ValueError) as e:
+                print(f"{type(e).__name__} while parsing date created string to datetime: {self.date_created}\n{e}")
+                self.data_age_minutes = -9999
+                return None
+            except OverflowError as oe:
+                print(f"OverflowError while parsing date created string to datetime: {self.date_created}\n{oe}")
+                self.data_age_minutes = -9999
+                return None
+        difference = RunClock.now - date_created_datetime_object
+        self.data_age_minutes = round(number=(difference.total_seconds() / 60), ndigits=1)
         return None
 
+    def decode_json_content(self, content):
+        """
+        Decode json content using the shared decoder and add the time to the total json decode time of the provider
+        object.
+        :param content: bytes (preferred) or str json
+        :return: decoded json, usually dict
+        """
+        start = time.perf_counter()
+        decoded = Provider.JSON_DECODER.decode(content=content)
+        self.json_decode_seconds += time.perf_counter() - start
+        return decoded
+
+    def decode_json_response(self, response):
+        """
+        Decode a json feed response from its raw bytes, skipping the str copy made by response.text/response.json().
+        :param response: feed response with json content
+        :return: decoded json, usually dict
+        """
+        return self.decode_json_content(content=response.content)
+
     def detect_response_style(self) -> None:
         """
         Detect the style of the feed provided in the http response; XML and JSON in this project.
@@ -97,32 +185,53 @@ class Provider:
             self.data_feed_response_style = "JSON"
         return None
 
-    def generate_insert_sql_statement_realtime(self):
+    def extract_date_created_from_feed(self) -> None:
         """
-        Build the insert sql statement for real time data and yield the statement.
-        For both County and ZIP data. If is ZIP, then isolate Maryland only so that DE and DC are not written to table
-        Note: sql database as is will not accept a tz aware datetime value
+        Extract the date created value from the date created feed response and assign to attribute.
+        The date created feed is xml or json depending on provider. For json, the date sits inside the file data.
         :return: None
         """
-        self.date_updated = DOIT_UTIL.current_date_time_str()
-        for stat_obj in self.stats_objects:
-            if self.style == DOIT_UTIL.ZIP:
-                sql = self.sql_insert_record_zip_realtime.format(area=stat_obj.area,
-                                                                 abbrev=stat_obj.abbrev,
-                                                                 outages=stat_obj.outages,
-                                                                 date_created=self.date_created,
-                                                                 date_updated=self.date_updated
-                                                                 )
-            else:
-                database_ready_area_name = stat_obj.area.replace("'", "''")  # Prep apostrophe containing names for DB
-                sql = self.sql_insert_record_county_realtime.format(state=stat_obj.state,
-                                                                    county=database_ready_area_name,
-                                                                    outages=stat_obj.outages,
-                                                                    abbrev=self.abbrev,
-                                                                    date_updated=self.date_updated,
-                                                                    date_created=self.date_created
-                                                                    )
-            yield sql
+        if "xml" in self.date_created_feed_response.headers["content-type"]:
+            date_created_xml_element = DOIT_UTIL.parse_xml_response_to_element(
+                response_xml_str=self.date_created_feed_response.text)
+            self.date_created = DOIT_UTIL.extract_attribute_value_from_xml_element_by_index(
+                root_element=date_created_xml_element)
+        else:
+            date_created_response_dict = self.decode_json_response(response=self.date_created_feed_response)
+            file_data = DOIT_UTIL.extract_attribute_from_dict(data_dict=date_created_response_dict,
+                                                              attribute_name=self.file_data_attribute)
+            self.date_created = DOIT_UTIL.extract_attribute_from_dict(data_dict=file_data,
+                                                                      attribute_name=self.date_created_attribute)
+        return None
+
+    def extract_metadata_key(self) -> None:
+        """
+        Extract the metadata key from the metadata feed response and assign to attribute for later use.
+        The key is used in the uri for accessing the data feeds and date created feeds.
+        :return: None
+        """
+        if "xml" in self.metadata_feed_response.headers["content-type"]:
+            metadata_xml_element = DOIT_UTIL.parse_xml_response_to_element(
+                response_xml_str=self.metadata_feed_response.text)
+            self.metadata_key = DOIT_UTIL.extract_attribute_value_from_xml_element_by_index(
+                root_element=metadata_xml_element)
+        else:
+            metadata_response_dict = self.decode_json_response(response=self.metadata_feed_response)
+            self.metadata_key = DOIT_UTIL.extract_attribute_from_dict(data_dict=metadata_response_dict,
+                                                                      attribute_name=self.metadata_key_attribute)
+        return None
+
+    def gather_transfer_statistics(self) -> dict:
+        """
+        Gather the transfer statistics of the feed responses received, keyed like the status codes in the output dict.
+        Responses shared with another provider object (same uri) carry the same statistics.
+        :return: dict of feed name to transfer statistics dict
+        """
+        responses = {"data": self.data_feed_response,
+                     "date": self.date_created_feed_response,
+                     "metadata": self.metadata_feed_response}
+        return {feed_name: response.transfer_statistics for feed_name, response in responses.items()
+                if hasattr(response, "transfer_statistics")}
 
     @staticmethod
     def get_config_variable(parser, section: str, variable_name: str) -> str:
@@ -144,24 +253,126 @@ class Provider:
 
     def groom_date_created(self) -> None:
         """
-        Use a dateutil parser to interpret inconsistent/varying date string formats and format them into specific style.
-        NOTE: Valuable Resource - https://dateutil.readthedocs.io/en/stable/parser.html
-        NOTE: Since date created comes from providers it is not being converted to timezone aware
+        Parse the date created string, with the format cached for the provider, into a time zone aware datetime, keep
+        it for the data age calculation, and format the date created into specific style.
+        NOTE: Valuable Resource - https://dateutil.readthedocs.io/en/stable/parser.html, used only when the provider
+        value matches no known format.
+        NOTE: The formatted date created is US/Eastern local time, not time zone aware, for the sql database.
+        NOTE: A date created that can't be parsed is set to None, written to the database as NULL.
         :return: None
         """
+        self.date_created_datetime = None
         try:
-            datetime_object = dateutil.parser.parse(timestr=self.date_created)
+            datetime_object = Provider.TIMESTAMP_PARSER.parse(value=self.date_created, key=self.abbrev)
         except TypeError as te:
             print(f"TypeError while parsing date created string to datetime: {self.date_created}\n{te}")
-            self.date_created = datetime.fromisoformat(DOIT_UTIL.ZERO_TIME_STRING)
+            self.date_created = None
         except ValueError as ve:
             print(f"ValueError while parsing date created string to datetime: {self.date_created}\n{ve}")
-            self.date_created = datetime.fromisoformat(DOIT_UTIL.ZERO_TIME_STRING)
+            self.date_created = None
         except OverflowError as oe:
             print(f"OverflowError while parsing date created string to datetime: {self.date_created}\n{oe}")
-            self.date_created = datetime.fromisoformat(DOIT_UTIL.ZERO_TIME_STRING)
+            self.date_created = None
         else:
-            self.date_created = f"{datetime_object:%Y-%m-%d %H:%M}"
+            self.date_created_datetime = datetime_object
+            self.date_created = datetime_object.strftime(Provider.GROOMED_DATE_CREATED_FORMAT)
+        return None
+
+    @staticmethod
+    def normalize_count(value, counts: dict) -> int:
+        """
+        Convert a customer or outage count value to integer. Commas are removed from strings, "<5" style sentinels are
+        replaced with 1, and values that can't be converted are flagged as -9999. Changes are tallied in counts.
+        :param value: int, or raw str value from a feed
+        :param counts: dict of normalization step name to count
+        :return: int
+        """
+        if type(value) is int:
+            return value
+        if isinstance(value, str) and "," in value:
+            value = value.replace(",", "")
+            counts["count commas removed"] += 1
+        try:
+            return int(value)
+        except ValueError as ve:
+
+            # Can't cast to type int so likely is a string. Try to replace string with int value using dict
+            replacement = DOIT_UTIL.COUNT_SENTINEL_VALUES.get(value)
+            if replacement is None:
+                counts["invalid counts flagged"] += 1
+                return -9999
+            counts["count sentinels replaced"] += 1
+            return replacement
+
+    def normalize_stats_objects(self) -> None:
+        """
+        Remove duplicates, zero outage zips, and non Maryland stats objects, correct county spelling and punctuation,
+        and convert the customer and outage counts to integers, in a single pass over the stats objects batch.
+        Providers may not give a state abbreviation with a zip code. For those the process assigns a default of MD.
+        This is done with an assumption that we understood their coverage area to be only within MD. Due to an issue
+        where WV and VA zips were making it into the output a check against MD polygon and point zip code inventories
+        was instituted.
+        The number of stats objects removed, or values changed, by each step is kept in normalization_counts.
+        :return: None
+        """
+        counts = dict.fromkeys(Provider.NORMALIZATION_STEPS, 0)
+        stats_objects = self.stats_objects
+        is_zip_mask = stats_objects.style.mask(predicate=lambda style: style == DOIT_UTIL.ZIP)
+        is_maryland_mask = stats_objects.state.mask(predicate=lambda state: state == DOIT_UTIL.MARYLAND)
+        seen_rows = set()
+        kept_indices = []
+        areas = []
+        outages_values = []
+        customers_values = []
+        for index, (row, is_zip, is_maryland) in enumerate(zip(stats_objects.iterate_rows(), is_zip_mask,
+                                                                is_maryland_mask)):
+
+            # Batch rows are Outage identity keys, so a set of rows seen detects duplicates
+            if row in seen_rows:
+                counts["duplicates removed"] += 1
+                continue
+            seen_rows.add(row)
+            abbrev, style, area, outages, customers, state = row
+
+            # Only counts greater than zero are inserted in db for zips
+            if is_zip and outages == 0:
+                counts["zero outage zips removed"] += 1
+                continue
+
+            # Applies to county and zip stats objects
+            if not is_maryland:
+                counts["non maryland removed"] += 1
+                continue
+            try:
+
+                # County string will raise ValueError on casting to type int, zip code number like strings will not
+                int(area)
+            except ValueError as ve:
+
+                # For county name strings, correct spelling and punctuation instead of checking zip code inventory
+                corrected_area = DOIT_UTIL.correct_area_name(area=area)
+                if corrected_area != area:
+                    counts["areas corrected"] += 1
+                    area = corrected_area
+            else:
+
+                # For zip codes, check against zip codes inventory to safeguard against mis-assigned values.
+                if not Provider.ZIP_GEOGRAPHY.is_maryland(zip_code=area):
+                    print(f"ZIP PURGED -> Not in MD geometry inventory (poly & point): {stats_objects[index]}")
+                    counts["zips without geometry removed"] += 1
+                    continue
+
+            kept_indices.append(index)
+            areas.append(area)
+            outages_values.append(Provider.normalize_count(value=outages, counts=counts))
+            customers_values.append(Provider.normalize_count(value=customers, counts=counts))
+
+        normalized = stats_objects.take(indices=kept_indices)
+        normalized.set_column(column_name="area", values=areas)
+        normalized.set_column(column_name="outages", values=outages_values)
+        normalized.set_column(column_name="customers", values=customers_values)
+        self.stats_objects = normalized
+        self.normalization_counts = counts
         return None
 
     def perform_feed_status_check_and_notification(self, alert_email_address: str) -> None:
@@ -185,64 +396,25 @@ class Provider:
                 return
         return
 
-    def purge_duplicate_stats_objects(self) -> None:
-        """
-        Eliminate duplicate stats objects in a list
-        Note: Outage objects are mutable and can't be added to sets. Used dictionary unique key behavior to purge.
-        :return: None
-        """
-        temp_dict = {}
-        for outage in self.stats_objects:
-            temp_dict[str(outage)] = outage
-        self.stats_objects = list(temp_dict.values())
-        return None
-
-    def purge_zero_outage_zip_stats_objects(self) -> None:
+    def print_extraction_errors(self, unique_key: str) -> None:
         """
-        Remove zero zip outage objects from the stats objects so that only counts greater than zero are inserted in db.
+        Print the number of records skipped because a field could not be extracted, and the first such error.
+        :param unique_key: str value unique to each provider
         :return: None
         """
-        temp_list = [outage for outage in self.stats_objects if outage.style == DOIT_UTIL.ZIP and outage.outages == 0]
-        for zero_outage in temp_list:
-            self.stats_objects.remove(zero_outage)
+        if self.extraction_errors:
+            print(f"{unique_key}: {len(self.extraction_errors)} records skipped. First: {self.extraction_errors[0]}")
         return None
 
-    def remove_non_maryland_stat_objects(self) -> None:
+    def print_normalization_counts(self, unique_key: str) -> None:
         """
-        Detect stats objects for those not in Maryland and delete the objects from the stats objects list
-
-        Providers may not give a state abbreviation with a zip code. For those the process assigns a default of MD.
-        This is done with an assumption that we understood their coverage area to be only within MD. Due to an issue
-        where WV and VA zips were making it into the output a check against MD polygon and point zip code inventories
-        was instituted.
+        Print the number of stats objects removed, or values changed, by each normalization step that had an effect.
+        :param unique_key: str value unique to each provider
         :return: None
         """
-        non_maryland_stat_objects = []
-        all_maryland_zips_with_geometry_ls = VARS.maryland_master_inventory_zip_codes_point_geometry + list(
-            VARS.maryland_master_inventory_zip_codes_polygon_geometry.keys())
-        for stat_obj in self.stats_objects:
-
-            # Applies to county and zip stats objects
-            if stat_obj.state != DOIT_UTIL.MARYLAND:
-                non_maryland_stat_objects.append(stat_obj)
-            else:
-                try:
-
-                    # County string will raise ValueError on casting to type int, zip code number like strings will not
-                    int(stat_obj.area)
-                except ValueError as ve:
-
-                    # For county name strings, skip checking against zip code inventory
-                    continue
-                else:
-
-                    # For zip codes, check against zip codes inventory to safeguard against mis-assigned values.
-                    if stat_obj.area not in all_maryland_zips_with_geometry_ls:
-                        print(f"ZIP PURGED -> Not in MD geometry inventory (poly & point): {stat_obj}")
-                        non_maryland_stat_objects.append(stat_obj)
-
-        for obj in non_maryland_stat_objects:
-            self.stats_objects.remove(obj)
+        changes = [f"{step} {count}" for step, count in self.normalization_counts.items() if count > 0]
+        if changes:
+            print(f"{unique_key}: {', '.join(changes)}")
         return None
 
     def set_status_codes(self) -> None:
@@ -273,7 +445,10 @@ class Provider:
 class Outage:
     """
     Data class for storing power outage report values
+    Slotted so each record carries no instance dict. Records are equal, and hash, on their identity key; the tuple of
+    all field values, in the same order as the rows of an OutageBatch. Don't change a record while it is in a set/dict.
     """
+    __slots__ = ("abbrev", "style", "area", "outages", "customers", "state")
     abbrev: str
     style: str
     area: str
@@ -281,6 +456,372 @@ class Outage:
     customers: int
     state: str
 
+    def __hash__(self):
+        return hash(self.identity_key)
+
+    @property
+    def identity_key(self) -> tuple:
+        """
+        Get the identity key of the record, the tuple of all field values
+        :return: tuple
+        """
+        return self.abbrev, self.style, self.area, self.outages, self.customers, self.state
+
+
+class CategoricalColumn:
+    """
+    Column of repeated string values, such as provider abbreviation, style, and state, stored as int16 codes into a
+    list of categories. Each distinct value is stored once. A None value is stored as code -1.
+    """
+
+    MISSING_CODE = -1
+    TYPECODE = "h"
+
+    def __init__(self, values=()):
+        self.categories = []
+        self.code_by_category = {}
+        self.codes = array.array(CategoricalColumn.TYPECODE)
+        self.extend(values=values)
 
+    def __getitem__(self, index: int):
+        code = self.codes[index]
+        return None if code == CategoricalColumn.MISSING_CODE else self.categories[code]
 
+    def __iter__(self):
+        categories = self.categories
+        return (None if code == CategoricalColumn.MISSING_CODE else categories[code] for code in self.codes)
+
+    def __len__(self):
+        return len(self.codes)
+
+    def append(self, value) -> None:
+        """
+        Append a value, adding it to the categories if not seen before
+        :param value: str or None
+        :return: None
+        """
+        self.codes.append(self.encode(value=value))
+        return None
 
+    def encode(self, value) -> int:
+        """
+        Get the code of a value, adding it to the categories if not seen before
+        :param value: str or None
+        :return: int code
+        """
+        if value is None:
+            return CategoricalColumn.MISSING_CODE
+        code = self.code_by_category.get(value)
+        if code is None:
+            code = len(self.categories)
+            self.code_by_category[value] = code
+            self.categories.append(value)
+        return code
+
+    def extend(self, values) -> None:
+        """
+        Append values. Another categorical column is appended by remapping its codes, without decoding each value.
+        :param values: iterable of str or None, or CategoricalColumn
+        :return: None
+        """
+        if isinstance(values, CategoricalColumn):
+            remap = [self.encode(value=category) for category in values.categories]
+            self.codes.extend(array.array(CategoricalColumn.TYPECODE,
+                                          (CategoricalColumn.MISSING_CODE if code == CategoricalColumn.MISSING_CODE
+                                           else remap[code] for code in values.codes)))
+        else:
+            self.codes.extend(array.array(CategoricalColumn.TYPECODE, (self.encode(value=value) for value in values)))
+        return None
+
+    def mask(self, predicate) -> list:
+        """
+        Evaluate a predicate once per category, rather than once per row, and spread the result to the rows
+        :param predicate: function taking a value and returning bool
+        :return: list of bool, one per row
+        """
+        missing_result = bool(predicate(None))
+        results = [bool(predicate(category)) for category in self.categories]
+        return [missing_result if code == CategoricalColumn.MISSING_CODE else results[code] for code in self.codes]
+
+    def take(self, indices):
+        """
+        Build a new column from the rows at the indices. Categories are shared as is.
+        :param indices: list of int row indices
+        :return: CategoricalColumn
+        """
+        column = CategoricalColumn()
+        column.categories = list(self.categories)
+        column.code_by_category = dict(self.code_by_category)
+        codes = self.codes
+        column.codes = array.array(CategoricalColumn.TYPECODE, (codes[index] for index in indices))
+        return column
+
+    def to_numpy(self):
+        """
+        Get the codes as a numpy int16 array that shares memory with the column (zero copy).
+        The column can't grow while the array is alive.
+        :return: numpy array of codes
+        """
+        return np.frombuffer(self.codes, dtype=np.int16)
+
+    def to_pandas(self):
+        """
+        Get the column as a pandas Categorical built from the codes; -1 codes become missing values.
+        :return: pandas Categorical
+        """
+        return pd.Categorical.from_codes(codes=self.to_numpy(), categories=self.categories)
+
+
+class CountColumn:
+    """
+    Column of outage or customer counts. Stored as an int64 array while every value is an int. Raw feed values such as
+    "1,234" or "<5" demote the column to a list of values until the counts are converted to integers.
+    """
+
+    TYPECODE = "q"
+
+    def __init__(self, values=()):
+        self.values = array.array(CountColumn.TYPECODE)
+        self.extend(values=values)
+
+    def __getitem__(self, index: int):
+        return self.values[index]
+
+    def __iter__(self):
+        return iter(self.values)
+
+    def __len__(self):
+        return len(self.values)
+
+    @property
+    def is_typed(self) -> bool:
+        """
+        Whether the counts are stored as an int64 array
+        :return: bool
+        """
+        return isinstance(self.values, array.array)
+
+    def append(self, value) -> None:
+        """
+        Append a count, demoting the column to a list if the value is not an int
+        :param value: int, or raw str value from a feed
+        :return: None
+        """
+        if self.is_typed:
+            try:
+                self.values.append(value)
+                return None
+            except (TypeError, OverflowError) as e:
+                self.values = self.values.tolist()
+        self.values.append(value)
+        return None
+
+    def extend(self, values) -> None:
+        """
+        Append counts, demoting the column to a list if any value is not an int
+        :param values: iterable of int or raw str values, or CountColumn
+        :return: None
+        """
+        values = values.values if isinstance(values, CountColumn) else values
+        if not isinstance(values, (array.array, list, tuple)):
+            values = list(values)
+        if self.is_typed:
+            try:
+                self.values.extend(values if isinstance(values, array.array) else array.array(CountColumn.TYPECODE,
+                                                                                             values))
+                return None
+            except (TypeError, OverflowError) as e:
+                self.values = self.values.tolist()
+        self.values.extend(values)
+        return None
+
+    def take(self, indices):
+        """
+        Build a new column from the rows at the indices
+        :param indices: list of int row indices
+        :return: CountColumn
+        """
+        values = self.values
+        return CountColumn(values=[values[index] for index in indices])
+
+    def to_numpy(self):
+        """
+        Get the counts as a numpy array. An int64 array shares memory with the column (zero copy) and the column can't
+        grow while it is alive. Untyped counts are copied to an object array.
+        :return: numpy array of counts
+        """
+        if self.is_typed:
+            return np.frombuffer(self.values, dtype=np.int64)
+        return np.array(self.values, dtype=object)
+
+
+class OutageBatch:
+    """
+    Columnar container for the outages of a provider object, used as the provider stats objects.
+    Area is a list of str, outages and customers are CountColumn, and abbrev, style, and state are CategoricalColumn
+    so the repeated strings are stored once per batch and not once per outage.
+    Iterating, or indexing, yields Outage objects built from the columns. Filters build a mask over whole columns and
+    keep the masked rows in a new batch. Changes to a row's values are made by replacing the column with set_column().
+    """
+
+    COLUMN_NAMES = ("abbrev", "style", "area", "outages", "customers", "state")
+
+    def __init__(self, outages=()):
+        self.abbrev = CategoricalColumn()
+        self.area = []
+        self.customers = CountColumn()
+        self.outages = CountColumn()
+        self.state = CategoricalColumn()
+        self.style = CategoricalColumn()
+        self.extend(outages=outages)
+
+    def __getitem__(self, index: int):
+        return Outage(abbrev=self.abbrev[index],
+                      style=self.style[index],
+                      area=self.area[index],
+                      outages=self.outages[index],
+                      customers=self.customers[index],
+                      state=self.state[index])
+
+    def __iter__(self):
+        for abbrev, style, area, outages, customers, state in self.iterate_rows():
+            yield Outage(abbrev=abbrev, style=style, area=area, outages=outages, customers=customers, state=state)
+
+    def __len__(self):
+        return len(self.area)
+
+    def append(self, outage) -> None:
+        """
+        Append an Outage as a row
+        :param outage: Outage
+        :return: None
+        """
+        self.append_values(abbrev=outage.abbrev,
+                           style=outage.style,
+                           area=outage.area,
+                           outages=outage.outages,
+                           customers=outage.customers,
+                           state=outage.state)
+        return None
+
+    def append_values(self, abbrev: str, style: str, area: str, outages, customers, state: str) -> None:
+        """
+        Append a row from field values, without building an Outage object
+        :param abbrev: provider abbreviation
+        :param style: County or ZIP
+        :param area: county name or zip code
+        :param outages: outage count, int or raw str value from a feed
+        :param customers: customer count, int or raw str value from a feed
+        :param state: state full name
+        :return: None
+        """
+        self.abbrev.append(value=abbrev)
+        self.style.append(value=style)
+        self.area.append(area)
+        self.outages.append(value=outages)
+        self.customers.append(value=customers)
+        self.state.append(value=state)
+        return None
+
+    def extend(self, outages) -> None:
+        """
+        Append rows. Another OutageBatch is appended column by column.
+        :param outages: iterable of Outage, or OutageBatch
+        :return: None
+        """
+        if isinstance(outages, OutageBatch):
+            for column_name in OutageBatch.COLUMN_NAMES:
+                getattr(self, column_name).extend(getattr(outages, column_name))
+        else:
+            for outage in outages:
+                self.append(outage=outage)
+        return None
+
+    def filter(self, mask):
+        """
+        Build a new batch holding the rows where the mask is True
+        :param mask: iterable of bool, one per row; a list or numpy bool array
+        :return: OutageBatch
+        """
+        return self.take(indices=[index for index, keep in enumerate(mask) if keep])
+
+    def iterate_rows(self):
+        """
+        Iterate the rows as tuples of values in COLUMN_NAMES order, without building Outage objects
+        :return: iterator of tuples
+        """
+        return zip(self.abbrev, self.style, self.area, self.outages, self.customers, self.state)
+
+    def set_column(self, column_name: str, values) -> None:
+        """
+        Replace a column with new values, one per row
+        :param column_name: name of the column from COLUMN_NAMES
+        :param values: iterable of values
+        :return: None
+        """
+        if column_name == "area":
+            column = list(values)
+        elif column_name in ("outages", "customers"):
+            column = CountColumn(values=values)
+        elif column_name in ("abbrev", "style", "state"):
+            column = CategoricalColumn(values=values)
+        else:
+            print(f"Invalid column name passed to OutageBatch.set_column(): {column_name}")
+            return None
+        if len(column) != len(self):
+            print(f"Column {column_name} has {len(column)} values for {len(self)} rows. Column not replaced")
+            return None
+        setattr(self, column_name, column)
+        return None
+
+    def take(self, indices):
+        """
+        Build a new batch from the rows at the indices
+        :param indices: list of int row indices
+        :return: OutageBatch
+        """
+        batch = OutageBatch()
+        area = self.area
+        batch.area = [area[index] for index in indices]
+        for column_name in ("abbrev", "style", "outages", "customers", "state"):
+            setattr(batch, column_name, getattr(self, column_name).take(indices=indices))
+        return batch
+
+    def to_dataframe(self, categorical: bool = True):
+        """
+        Build a pandas dataframe with a column per field. Typed count columns and categorical codes are not copied
+        on the way to numpy.
+        :param categorical: True for pandas categorical abbrev, style, and state columns, False for str columns
+        :return: pandas DataFrame
+        """
+        columns = {}
+        for column_name in OutageBatch.COLUMN_NAMES:
+            column = getattr(self, column_name)
+            if isinstance(column, CategoricalColumn):
+                columns[column_name] = column.to_pandas() if categorical else list(column)
+            elif isinstance(column, CountColumn):
+                columns[column_name] = column.to_numpy()
+            else:
+                columns[column_name] = column
+        return pd.DataFrame(data=columns, columns=list(OutageBatch.COLUMN_NAMES))
+
+    def to_numpy(self) -> dict:
+        """
+        Export the columns as numpy arrays. Typed counts and categorical codes share memory with the batch (zero copy),
+        so the batch can't grow while the arrays are alive. Areas are copied to an object array.
+        :return: dict of column name to numpy array; categorical columns give codes, and categories under
+            "<name>_categories"
+        """
+        arrays = {"area": np.array(self.area, dtype=object)}
+        for column_name in ("abbrev", "style", "outages", "customers", "state"):
+            arrays[column_name] = getattr(self, column_name).to_numpy()
+        for column_name in ("abbrev", "style", "state"):
+            arrays[f"{column_name}_categories"] = np.array(getattr(self, column_name).categories, dtype=object)
+        return arrays
+
+    def to_record_dicts(self) -> list:
+        """
+        Build a list of dicts, one per row, keyed like the Outage fields
+        :return: list of dict
+        """
+        return [dict(zip(OutageBatch.COLUMN_NAMES, row)) for row in self.iterate_rows()]
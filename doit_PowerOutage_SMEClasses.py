@@ -3,8 +3,9 @@ Module contains a SME class that inherits from Provider class. SME class is an i
 peculiarities of the SME feeds and the processing they require that is not common to all providers.
 """
 
+from PowerOutages.doit_PowerOutage_ExtractionSpecs import ExtractionSpec
 from PowerOutages.doit_PowerOutage_UtilityClass import Utility as DOIT_UTIL
-from PowerOutages.doit_PowerOutage_ProviderClasses import Outage
+from PowerOutages.doit_PowerOutage_ProviderClasses import OutageBatch
 from PowerOutages.doit_PowerOutage_ProviderClasses import Provider
 
 
@@ -13,6 +14,9 @@ class SME(Provider):
     SME specific functionality and variables for handling SME feed data. Inherits from Provider.
     """
 
+    AREA_EXTRACTION_SPEC = ExtractionSpec(fields={"area": "area_name", "outages": "cust_a.val", "customers": "cust_s"},
+                                          constants={"state": DOIT_UTIL.MARYLAND})
+
     def __init__(self, provider_abbrev, style):
         super().__init__(provider_abbrev=provider_abbrev, style=style)
         self.area_list = None
@@ -23,7 +27,7 @@ class SME(Provider):
         Extract the county or zip area information from a json response.
         :return: None
         """
-        data_json = self.data_feed_response.json()
+        data_json = self.decode_json_response(response=self.data_feed_response)
         file_data = DOIT_UTIL.extract_attribute_from_dict(data_dict=data_json,
                                                           attribute_name="file_data")
         areas_list_outer = DOIT_UTIL.extract_attribute_from_dict(data_dict=file_data,
@@ -37,19 +41,11 @@ class SME(Provider):
     def extract_outage_counts(self) -> None:
         """
         Extract the outage counts from the outage areas dataset json and build stat objects to store the data.
+        Areas missing a field are skipped and recorded in the extraction errors.
         :return: None
         """
-        list_of_stats_objects = []
-        for county_dict in self.area_list:
-            county = DOIT_UTIL.extract_attribute_from_dict(data_dict=county_dict, attribute_name="area_name")
-            outages_dict = DOIT_UTIL.extract_attribute_from_dict(data_dict=county_dict, attribute_name="cust_a")
-            outages = DOIT_UTIL.extract_attribute_from_dict(data_dict=outages_dict, attribute_name="val")
-            customers = DOIT_UTIL.extract_attribute_from_dict(data_dict=county_dict, attribute_name="cust_s")
-            list_of_stats_objects.append(Outage(abbrev=self.abbrev,
-                                                style=self.style,
-                                                area=county,
-                                                outages=outages,
-                                                customers=customers,
-                                                state=DOIT_UTIL.MARYLAND))
-        self.stats_objects = list_of_stats_objects
+        stats_objects = OutageBatch()
+        for values in SME.AREA_EXTRACTION_SPEC.extract_records(records=self.area_list, errors=self.extraction_errors):
+            stats_objects.append_values(abbrev=self.abbrev, style=self.style, **values)
+        self.stats_objects = stats_objects
         return
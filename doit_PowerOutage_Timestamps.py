@@ -0,0 +1,140 @@
+"""
+Module containing a TimestampParser class and a RunClock class for timestamp handling.
+Providers report date created values in their own, but consistent, formats. TimestampParser detects the format of a
+provider's value once, from a list of known formats, and caches it by provider so later values are parsed with an exact
+strptime (or fromisoformat) call. dateutil's fuzzy parser is used only when no known format matches. Parsed values are
+returned as timezone aware datetimes in US/Eastern, using the timezone object from the centralized variables.
+RunClock holds a single snapshot of the current time, taken at the start of the run, which is used for record date
+updated values, the task tracking stamp, and data age calculations so every provider is measured against the same
+instant. Progress messages read the same clock, advanced by the monotonic time elapsed since the snapshot.
+"""
+
+from datetime import datetime
+from datetime import timedelta
+import dateutil.parser
+import PowerOutages.doit_PowerOutage_CentralizedVariables as VARS
+import time
+
+
+class TimestampParser:
+    """
+    Parses date created strings with a per provider cached format, returning US/Eastern aware datetimes.
+    """
+
+    ISO_FORMAT = "isoformat"
+    CANDIDATE_FORMATS = (ISO_FORMAT,
+                         "%Y-%m-%dT%H:%M:%S%z",
+                         "%Y-%m-%dT%H:%M:%S.%f%z",
+                         "%Y-%m-%d %H:%M",
+                         "%m/%d/%Y %I:%M:%S %p",
+                         "%m/%d/%Y %I:%M %p",
+                         "%m/%d/%Y %H:%M:%S",
+                         "%m/%d/%Y %H:%M",
+                         "%a %b %d %H:%M:%S %Y",
+                         "%b %d, %Y %I:%M %p")
+
+    def __init__(self, timezone=VARS.eastern_tz):
+        self.fallback_count = 0
+        self.format_by_key = {}
+        self.timezone = timezone
+
+    def detect_format(self, value: str):
+        """
+        Find the first known format that parses the value exactly.
+        :param value: date time string
+        :return: tuple of format str and naive or aware datetime, or None if no known format matches
+        """
+        for date_format in TimestampParser.CANDIDATE_FORMATS:
+            try:
+                return date_format, TimestampParser.parse_with_format(value=value, date_format=date_format)
+            except ValueError as ve:
+                continue
+        return None
+
+    def localize(self, datetime_object: datetime) -> datetime:
+        """
+        Make a datetime aware in the parser timezone. Naive values are taken to be in that timezone already.
+        :param datetime_object: naive or aware datetime
+        :return: aware datetime
+        """
+        if datetime_object.tzinfo is None:
+            return self.timezone.localize(datetime_object)
+        return datetime_object.astimezone(self.timezone)
+
+    def parse(self, value: str, key: str) -> datetime:
+        """
+        Parse a date time string using the format cached for the key, detecting and caching the format on a miss, and
+        falling back to dateutil when no known format matches.
+        :param value: date time string
+        :param key: cache key, the provider abbreviation
+        :return: aware datetime
+        :raises: TypeError, ValueError, or OverflowError from dateutil if the value can't be parsed
+        """
+        date_format = self.format_by_key.get(key)
+        if date_format is not None:
+            try:
+                return self.localize(TimestampParser.parse_with_format(value=value, date_format=date_format))
+            except ValueError as ve:
+
+                # The provider changed format. Detect again.
+                pass
+        if isinstance(value, str):
+            detected = self.detect_format(value=value)
+            if detected is not None:
+                date_format, datetime_object = detected
+                self.format_by_key[key] = date_format
+                return self.localize(datetime_object)
+        self.fallback_count += 1
+        return self.localize(dateutil.parser.parse(timestr=value))
+
+    @staticmethod
+    def parse_with_format(value: str, date_format: str) -> datetime:
+        """
+        Parse a date time string with an exact format.
+        :param value: date time string
+        :param date_format: strptime format, or ISO_FORMAT for datetime.fromisoformat
+        :return: naive or aware datetime
+        :raises: ValueError if the value does not match the format
+        """
+        if date_format == TimestampParser.ISO_FORMAT:
+            return datetime.fromisoformat(value)
+        return datetime.strptime(value, date_format)
+
+
+class RunClock:
+    """
+    Snapshot of the current time, in US/Eastern, shared by the whole run. Taken at import and again at the start of
+    the process.
+    """
+
+    now = datetime.now(tz=VARS.eastern_tz)
+    snapshot_monotonic = time.monotonic()
+
+    @staticmethod
+    def current_date_time_str() -> str:
+        """
+        Create a naive string representation of the run clock's current time, the snapshot advanced by the monotonic
+        time elapsed since it was taken, for progress messages.
+        :return: string representation of date and time
+        """
+        current = RunClock.now + timedelta(seconds=time.monotonic() - RunClock.snapshot_monotonic)
+        return f"{current:%Y-%m-%d %H:%M:%S}"
+
+    @staticmethod
+    def date_time_str() -> str:
+        """
+        Create a naive string representation of the snapshot date and time, in the style of
+        Utility.current_date_time_str()
+        :return: string representation of date and time
+        """
+        return f"{RunClock.now:%Y-%m-%d %H:%M:%S}"
+
+    @staticmethod
+    def snapshot() -> None:
+        """
+        Take the snapshot of the current time for the run.
+        :return: None
+        """
+        RunClock.now = datetime.now(tz=VARS.eastern_tz)
+        RunClock.snapshot_monotonic = time.monotonic()
+        return None
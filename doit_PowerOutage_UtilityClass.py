@@ -7,6 +7,7 @@ from datetime import datetime
 from pytz import timezone
 import collections
 import configparser
+import io
 import xml.etree.ElementTree as ET
 import json
 
@@ -20,6 +21,7 @@ class Utility:
     COUNTY = "County"
     DELAWARE = "Delaware"
     DISTRICT_OF_COLUMBIA = "District Of Columbia"
+    EASTERN_TIMEZONE = timezone('US/Eastern')
     LESS_THAN_FIVE = "Less than 5"
     MARYLAND = "Maryland"
     MARYLAND_COUNTIES = ("Allegany", "Anne Arundel", "Baltimore", "Baltimore City", "Calvert", "Caroline", "Carroll",
@@ -33,6 +35,20 @@ class Utility:
     ZERO_TIME_STRING = "00:00:00 00:00:00"
     ZIP = "ZIP"
 
+    # Lookup tables, built once at import from the values above
+    COUNT_SENTINEL_VALUES = {LESS_THAN_FIVE: 1, "<5": 1}
+    COUNTY_NAME_SPELLING_CORRECTIONS = {"Prince Georges": "Prince George's",
+                                        "St Marys": "St. Mary's",
+                                        "St Mary's": "St. Mary's",
+                                        "St. Marys": "St. Mary's",
+                                        "Queen Annes": "Queen Anne's",
+                                        "Kent (MD)": "Kent"}
+    COUNTY_NAME_CORRECTIONS = {**{county.upper(): county for county in MARYLAND_COUNTIES},
+                               **{name.upper(): corrected for name, corrected in COUNTY_NAME_SPELLING_CORRECTIONS.items()},
+                               **COUNTY_NAME_SPELLING_CORRECTIONS}
+    STATE_NAME_BY_ABBREV = {"DC": DISTRICT_OF_COLUMBIA, "DE": DELAWARE, "MD": MARYLAND, "VA": VIRGINIA,
+                            "WV": WEST_VIRGINIA, "PA": PENNSYLVANIA}
+
     @staticmethod
     def build_feed_uri(metadata_key: str, data_feed_uri: str) -> str:
         """Build a uri for provider data feed, inserting key into string template
@@ -43,6 +59,22 @@ class Utility:
         """
         return data_feed_uri.format(metadata_key=metadata_key)
 
+    @staticmethod
+    def correct_area_name(area: str) -> str:
+        """Correct county name spelling, punctuation, and all upper case using the county name corrections table.
+
+        Other all upper case names are title cased and checked again. Zip codes pass through unchanged.
+        :param area: county name or zip code
+        :return: string corrected area
+        """
+        corrected = Utility.COUNTY_NAME_CORRECTIONS.get(area)
+        if corrected is not None:
+            return corrected
+        if area.isupper():
+            area = area.title()
+            return Utility.COUNTY_NAME_CORRECTIONS.get(area, area)
+        return area
+
     @staticmethod
     def current_date_time_str(tz_aware: bool = False) -> str:
         """
@@ -51,8 +83,7 @@ class Utility:
         :return: string representation of date and time
         """
         if tz_aware:
-            eastern_tz = timezone('US/Eastern')
-            loc_dt = eastern_tz.localize(datetime.now())
+            loc_dt = Utility.EASTERN_TIMEZONE.localize(datetime.now())
             return loc_dt.strftime('%Y-%m-%dT%H:%M:%S%z')
         else:
             return "{:%Y-%m-%d %H:%M:%S}".format(datetime.now())
@@ -63,14 +94,9 @@ class Utility:
         Get a value from a state abbreviations dictionary using the provided abbreviation.
 
         :param abbrev: string abbreviation for the state
-        :return: string value from state_abbrev_dict for given abbrev, or the abbrev itself if KeyError
+        :return: string value from STATE_NAME_BY_ABBREV for given abbrev, or the abbrev itself if not present
         """
-        state_abbrev_dict = {"DC": Utility.DISTRICT_OF_COLUMBIA, "DE": Utility.DELAWARE, "MD": Utility.MARYLAND,
-                             "VA": Utility.VIRGINIA, "WV": Utility.WEST_VIRGINIA, "PA": Utility.PENNSYLVANIA}
-        try:
-            return state_abbrev_dict[abbrev]
-        except KeyError as ke:
-            return abbrev
+        return Utility.STATE_NAME_BY_ABBREV.get(abbrev, abbrev)
 
     @staticmethod
     def extract_all_immediate_child_features_from_element(element: ET.Element, tag_name: str) -> list:
@@ -126,6 +152,34 @@ class Utility:
             print(f"AttributeError: Unable to extract '{tag_name}' from {element.text}: {ae}")
             exit()
 
+    @staticmethod
+    def generate_completed_xml_elements(response_content: bytes, tag_names: tuple) -> collections.Iterable:
+        """
+        Stream xml response content and yield each element of interest as soon as its end tag has been read.
+        The raw response bytes are parsed incrementally with ET.iterparse instead of building the whole tree. Once the
+        caller moves on, a yielded element is cleared and detached from its parent so that memory stays flat no
+        matter how many records the feed contains. Values must be read from the element before moving on.
+
+        :param response_content: bytes xml from response
+        :param tag_names: tags of the elements to yield
+        :return: generator of (tuple of ancestor ET.Element items from the root down, completed ET.Element)
+        """
+        open_elements = []
+        try:
+            for event, element in ET.iterparse(io.BytesIO(response_content), events=("start", "end")):
+                if event == "start":
+                    open_elements.append(element)
+                    continue
+                open_elements.pop()
+                if element.tag in tag_names:
+                    yield tuple(open_elements), element
+                    element.clear()
+                    if open_elements:
+                        open_elements[-1].remove(element)
+        except ET.ParseError as pe:
+            print(f"Unable to process xml response using ET.iterparse(): {pe}")
+            exit()
+
     @staticmethod
     def generate_value_from_csv_string(csv_string: str) -> collections.Iterable:
         """
@@ -154,10 +208,10 @@ class Utility:
             exit()
 
     @staticmethod
-    def parse_xml_response_to_element(response_xml_str: str) -> ET.Element:
+    def parse_xml_response_to_element(response_xml_str) -> ET.Element:
         """
         Process xml response content to xml ET.Element
-        :param response_xml_str: string xml from response
+        :param response_xml_str: string xml from response, or the raw bytes xml content
         :return: xml ET.Element
         """
         try:
@@ -176,86 +230,6 @@ class Utility:
         print(f"\t{value}")
         return None
 
-    @staticmethod
-    def process_stats_objects_counts_to_integers(objects_list: list, keyword: str):
-        """
-        Process objects customer or outage count attribute values to integer
-        :param objects_list: list of stat objects
-        :param keyword: string that determines if .customers or .outages value of objects is operated on
-        :return: none, revises value of attribute
-        """
-        replacement_values_dict = {Utility.LESS_THAN_FIVE: 1, "<5": 1}
-
-        for obj in objects_list:
-            if keyword == "customers":
-                try:
-                    obj.customers = int(obj.customers)
-                except ValueError as ve:
-                    try:
-
-                        # Can't cast to type int so likely is a string. Try to replace string with int value using dict
-                        obj.customers = replacement_values_dict[obj.customers]
-                    except KeyError as ke:
-                        obj.customers = -9999
-            elif keyword == "outages":
-                try:
-                    obj.outages = int(obj.outages)
-                except ValueError as ve:
-                    try:
-                        obj.outages = replacement_values_dict[obj.outages]
-                    except KeyError as ke:
-                        obj.outages = -9999
-            else:
-                print("Invalid value passed as parameter 'keyword' in process_stats_objects_counts_to_integers()")
-                continue
-        return
-
-    @staticmethod
-    def remove_commas_from_counts(objects_list: list):
-        """
-        Remove commas from string version of number values in objects
-        :param objects_list:  list of objects to operate on
-        :return: none, revises in place
-        """
-        for obj in objects_list:
-            try:
-                obj.outages = obj.outages.replace(",", "")
-            except AttributeError as ae:
-                # doesn't have .replace method. likely type int
-                pass
-            try:
-                obj.customers = obj.customers.replace(",", "")
-            except AttributeError as ae:
-                # doesn't have .replace method. likely type int
-                pass
-        return
-
-    @staticmethod
-    def revise_county_name_spellings_and_punctuation(stats_objects_list: list):
-        """
-        Revise county name spellings and punctuation for attributes in stat objects.
-        :param stats_objects_list: list of stat objects
-        :return: none, revise in place
-        """
-        corrections_dict = {"Prince Georges": "Prince George's",
-                            "St Marys": "St. Mary's",
-                            "St Mary's": "St. Mary's",
-                            "St. Marys": "St. Mary's",
-                            "Queen Annes": "Queen Anne's",
-                            "Kent (MD)": "Kent"}
-        for obj in stats_objects_list:
-            if obj.area.isupper():
-                obj.area = obj.area.title()
-            else:
-                pass
-            try:
-                obj.area = corrections_dict[obj.area]
-            except KeyError as ke:
-
-                # No correction needed per the dict of items as seen above
-                continue
-        return
-
     @staticmethod
     def send_feed_status_check_email(data_code: str, date_code: str, metadata_code: str, prov_abbrev: str, alert_email_address: str):
         """
@@ -1,33 +1,364 @@
 """
-Module containing WebFunctionality class for web interaction
+Module containing WebFunctionality class for web interaction, a WebClient class that holds the shared pooled
+http session used for all provider requests, and a RequestCoalescingCache class for sharing responses within a run.
+GET requests also use the on-disk ConditionalRequestCache so unchanged feeds are not re-downloaded between runs.
+Requests are given timeouts from the EndpointLatencyBudget and failed attempts are retried with jittered backoff.
+Compressed transfer is requested for every feed and each response carries transfer statistics (wire and decoded bytes,
+content encoding, time to first byte, and total time) for the feed status output.
+In record and replay fixture modes the host adapters record responses to, or serve them from, a FeedFixtureStore. The
+on-disk conditional cache is not used in those modes so that recordings are complete and replays are repeatable.
 """
 
+from PowerOutages.doit_PowerOutage_ConditionalRequestCache import ConditionalRequestCache
+from PowerOutages.doit_PowerOutage_FeedFixtures import FeedFixtureStore
+from PowerOutages.doit_PowerOutage_FeedFixtures import RecordingAdapter
+from PowerOutages.doit_PowerOutage_FeedFixtures import ReplayAdapter
+from PowerOutages.doit_PowerOutage_LatencyBudget import EndpointLatencyBudget
+from concurrent.futures import Future
+from requests.adapters import HTTPAdapter
+from urllib.parse import urlparse
+import PowerOutages.doit_PowerOutage_CentralizedVariables as VARS
+import functools
 import requests
+import threading
+import time
+
+
+class RequestCoalescingCache:
+    """
+    Per run cache of responses keyed by request style and uri.
+    Several provider objects request identical uris (County/ZIP pairs share metadata and configuration feeds, and
+    the Kubra date created feed is the metadata feed). The first request for a key is sent and every later or
+    concurrent (in-flight) request for the same key is handed the same response. Failed requests are not cached.
+    """
+
+    def __init__(self):
+        self.futures = {}
+        self.hits = 0
+        self.lock = threading.Lock()
+        self.misses = 0
+
+    @staticmethod
+    def build_key(style: str, uri: str, payload=None) -> tuple:
+        """
+        Build the cache key for a request.
+        :param style: style of the request, example: GET
+        :param uri: web path to which request is made
+        :param payload: payload, if present, passed in request
+        :return: tuple key
+        """
+        return style, uri, repr(payload)
+
+    def get_or_request(self, key: tuple, send):
+        """
+        Return the response for the key, sending the request only if no identical request has been made in this run.
+        :param key: cache key from build_key()
+        :param send: callable that makes the request and returns the response
+        :return: response
+        """
+        with self.lock:
+            future = self.futures.get(key)
+            is_owner = future is None
+            if is_owner:
+                future = Future()
+                self.futures[key] = future
+                self.misses += 1
+            else:
+                self.hits += 1
+        if not is_owner:
+            return future.result()
+        try:
+            response = send()
+        except BaseException as e:
+            with self.lock:
+                del self.futures[key]
+            future.set_exception(e)
+            raise
+        future.set_result(response)
+        return response
+
+    def print_statistics(self) -> None:
+        """
+        Print the hit and miss counts. Each hit is a round trip that was saved.
+        :return: None
+        """
+        print(f"\tRequest cache: hits (round trips saved)={self.hits}, misses (requests sent)={self.misses}")
+        return None
+
+    def reset(self) -> None:
+        """
+        Clear cached responses and counters.
+        :return: None
+        """
+        with self.lock:
+            self.futures = {}
+            self.hits = 0
+            self.misses = 0
+        return None
+
+
+class WebClient:
+    """
+    Pooled http client built on a single shared requests.Session.
+    Connections are kept alive and reused across requests to the same host. A connection pool adapter is mounted for
+    each configured host before any request is made, sized according to the provider host (Kubra, FirstEnergy, SMECO)
+    it serves. Requests only look adapters up, because mounting reorders the session adapters and is not safe while
+    other threads are sending requests.
+    """
+
+    def __init__(self, pool_sizes_by_host: dict = None, default_pool_size: int = VARS.web_default_pool_size):
+        self.accept_encoding = VARS.web_accept_encoding
+        self.adapters_by_host = {}
+        self.coalescing_cache = RequestCoalescingCache()
+        self.conditional_cache = ConditionalRequestCache() if VARS.http_cache_enabled and VARS.web_fixture_mode is None else None
+        self.default_pool_size = default_pool_size
+        self.fixture_store = None if VARS.web_fixture_mode is None else FeedFixtureStore(mode=VARS.web_fixture_mode)
+        self.latency_budget = EndpointLatencyBudget()
+        self.lock = threading.Lock()
+        self.pool_sizes_by_host = VARS.web_pool_sizes_by_host if pool_sizes_by_host is None else pool_sizes_by_host
+        self.session = requests.Session()
+        if self.fixture_store is not None:
+
+            # Hosts not mounted ahead of time are recorded or replayed too, never requested live during a replay
+            for prefix in ("https://", "http://"):
+                self.session.mount(prefix=prefix, adapter=self.build_adapter(pool_size=self.default_pool_size))
+
+    def build_adapter(self, pool_size: int) -> HTTPAdapter:
+        """
+        Build a connection pool adapter of the given size. In fixture record or replay mode the adapter records
+        responses or serves recorded responses.
+        :param pool_size: maximum connections kept open to the host
+        :return: HTTPAdapter
+        """
+        if self.fixture_store is None:
+            return HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        elif self.fixture_store.mode == "record":
+            return RecordingAdapter(fixture_store=self.fixture_store, pool_connections=1, pool_maxsize=pool_size)
+        else:
+            return ReplayAdapter(fixture_store=self.fixture_store, pool_connections=1, pool_maxsize=pool_size)
+
+    @staticmethod
+    def build_transfer_statistics(response, total_seconds: float, attempts: int) -> dict:
+        """
+        Build the transfer statistics of a completed response.
+        Wire bytes are the body bytes read from the connection, before decompression. A response rebuilt from the
+        on-disk cache after a 304 Not Modified transferred no body. Time to first byte is the time from sending the
+        request until the response headers were parsed.
+        :param response: response with content already read
+        :param total_seconds: time of the successful attempt, including reading the body
+        :param attempts: number of attempts made
+        :return: dict of transfer statistics
+        """
+        try:
+            wire_bytes = response.raw.tell()
+        except AttributeError as ae:
+            wire_bytes = 0
+        return {"content_encoding": response.headers.get("content-encoding", "identity"),
+                "wire_bytes": wire_bytes,
+                "decoded_bytes": len(response.content),
+                "ttfb_seconds": round(response.elapsed.total_seconds(), 3),
+                "total_seconds": round(total_seconds, 3),
+                "from_cache": getattr(response, "from_conditional_cache", False),
+                "attempts": attempts}
+
+    def connection_reuse_statistics(self) -> dict:
+        """
+        Gather request and connection counts from the connection pool of each host used during the run.
+        :return: dict of host to dict of requests, connections opened, and connections reused
+        """
+        statistics = {}
+        for host, adapter in self.adapters_by_host.items():
+            pools = [adapter.poolmanager.pools[pool_key] for pool_key in adapter.poolmanager.pools.keys()]
+            requests_count = sum(pool.num_requests for pool in pools)
+            connections_count = sum(pool.num_connections for pool in pools)
+            statistics[host] = {"requests": requests_count,
+                                "connections": connections_count,
+                                "reused": max(requests_count - connections_count, 0)}
+        return statistics
+
+    def determine_pool_size(self, host: str) -> int:
+        """
+        Determine the connection pool size for a host by matching the end of the host name to the configured hosts.
+        :param host: network location, example kubra.io or outages.firstenergycorp.com
+        :return: int pool size
+        """
+        for host_suffix, pool_size in self.pool_sizes_by_host.items():
+            if host == host_suffix or host.endswith(f".{host_suffix}"):
+                return pool_size
+        return self.default_pool_size
+
+    def mount_host_adapter(self, uri: str) -> None:
+        """
+        Mount a sized connection pool adapter on the session for the host of the uri, if not already mounted.
+        Must not be called while requests are in flight on other threads. See mount_host_adapters().
+        :param uri: web path to which a request will be made
+        :return: None
+        """
+        parsed = urlparse(uri)
+        host = parsed.netloc.lower()
+        with self.lock:
+            if host in self.adapters_by_host:
+                return None
+            adapter = self.build_adapter(pool_size=self.determine_pool_size(host=parsed.hostname or host))
+            self.session.mount(prefix=f"{parsed.scheme}://{host}", adapter=adapter)
+            self.adapters_by_host[host] = adapter
+        return None
+
+    def mount_host_adapters(self, uris) -> None:
+        """
+        Mount an adapter for the host of every uri before requests start. Uris that are not configured, or whose host
+        is still a template placeholder, are skipped and their requests use the default session adapter.
+        :param uris: iterable of configured feed uris, template placeholders in the path are allowed
+        :return: None
+        """
+        for uri in uris:
+            if uri in VARS.none_and_not_available or "{" in urlparse(uri).netloc:
+                continue
+            self.mount_host_adapter(uri=uri)
+        return None
+
+    def print_connection_reuse_statistics(self) -> None:
+        """
+        Print the per host connection reuse statistics.
+        :return: None
+        """
+        for host, stats in self.connection_reuse_statistics().items():
+            print(f"\t{host}: requests={stats['requests']}, connections={stats['connections']}, "
+                  f"reused={stats['reused']}")
+        return None
+
+    def request(self, uri, payload=None, style="GET", headers=None, feed_type="default", deadline=None):
+        """
+        Make a single web request of the requested style using the shared session.
+        Only the requested style is sent. GET requests go through the coalescing cache so that identical requests
+        made during the run share one response, and are sent as conditional requests when the feed is cached on disk.
+        Every request has connect/read timeouts from the latency budget and failed attempts are retried. Compressed
+        transfer is requested unless the caller sets Accept-Encoding.
+        :param uri: web path to which to make request
+        :param payload: payload, if present, to pass in request
+        :param style: style of the request, example: GET POST_data POST_json
+        :param headers: request headers
+        :param feed_type: metadata, date_created, configuration, data, or default. Determines timeouts.
+        :param deadline: time.monotonic() value after which no further time is spent on the request, or None
+        :return: response
+        """
+        headers = {"Accept-Encoding": self.accept_encoding, **(headers or {})}
+        dispatch = {"GET": lambda timeout: self.session.get(url=uri, params=payload, headers=headers,
+                                                            timeout=timeout),
+                    "POST_data": lambda timeout: self.session.post(url=uri, data=payload, headers=headers,
+                                                                   timeout=timeout),
+                    "POST_json": lambda timeout: self.session.post(url=uri, json=payload, headers=headers,
+                                                                   timeout=timeout),
+                    }
+        send_once = dispatch[style]
+        key = RequestCoalescingCache.build_key(style=style, uri=uri, payload=payload)
+        if style == "GET" and self.conditional_cache is not None:
+            send_once = functools.partial(self.send_conditional_get, key=key, uri=uri, payload=payload,
+                                          headers=headers)
+        send = functools.partial(self.send_with_retries, send_once=send_once, host=urlparse(uri).netloc.lower(),
+                                 feed_type=feed_type, deadline=deadline)
+        if style != "GET":
+            return send()
+        return self.coalescing_cache.get_or_request(key=key, send=send)
+
+    def send_conditional_get(self, key: tuple, uri, payload=None, headers=None, timeout=None):
+        """
+        Send a GET with If-None-Match/If-Modified-Since headers from the on-disk cache and resolve the response.
+        A 304 Not Modified is returned as a response carrying the cached body. If the cached body is no longer
+        available, the GET is sent again without the conditional headers.
+        :param key: request key
+        :param uri: web path to which to make request
+        :param payload: payload, if present, to pass in request
+        :param headers: request headers
+        :param timeout: tuple of connect and read timeout seconds
+        :return: response
+        """
+        request_headers = dict(headers or {})
+        request_headers.update(self.conditional_cache.conditional_headers(key=key))
+        response = self.session.get(url=uri, params=payload, headers=request_headers, timeout=timeout)
+        resolved_response = self.conditional_cache.resolve_response(key=key, response=response)
+        if resolved_response is not None:
+            return resolved_response
+
+        # Cache entry evicted or body file removed after the conditional headers were sent
+        response = self.session.get(url=uri, params=payload, headers=headers, timeout=timeout)
+        resolved_response = self.conditional_cache.resolve_response(key=key, response=response)
+        return response if resolved_response is None else resolved_response
+
+    def send_with_retries(self, send_once, host: str, feed_type: str, deadline: float = None):
+        """
+        Send a request, retrying connection errors, timeouts, and retryable status codes with jittered backoff.
+        No retry is started if its backoff would pass the deadline. The read timeout grows with each retry. The latency
+        of successful requests is recorded, a read timed out attempt is recorded at the configured read timeout, a
+        connect timeout is not recorded, and transfer statistics are attached to the response as transfer_statistics.
+        :param send_once: callable taking a timeout and returning a response
+        :param host: network location of the request
+        :param feed_type: metadata, date_created, configuration, data, or default
+        :param deadline: time.monotonic() value after which no further time is spent on the request, or None
+        :return: response, the last response received if every attempt returned a retryable status code
+        """
+        failure = None
+        response = None
+        for attempt in range(VARS.web_retry_attempts):
+            timeout = self.latency_budget.timeout(host=host, feed_type=feed_type, deadline=deadline, attempt=attempt)
+            start = time.perf_counter()
+            try:
+                response = send_once(timeout=timeout)
+            except requests.exceptions.ConnectTimeout as cte:
+                # No response was awaited, so the read latency sample is left as it is
+                failure = cte
+            except requests.exceptions.Timeout as te:
+                failure = te
+                self.latency_budget.record_timeout(host=host, feed_type=feed_type)
+            except requests.exceptions.ConnectionError as e:
+                failure = e
+            else:
+                if response.status_code not in VARS.web_retry_status_codes:
+                    total_seconds = time.perf_counter() - start
+                    self.latency_budget.record(host=host, feed_type=feed_type, seconds=total_seconds)
+                    response.transfer_statistics = WebClient.build_transfer_statistics(response=response,
+                                                                                       total_seconds=total_seconds,
+                                                                                       attempts=attempt + 1)
+                    return response
+                failure = f"HTTP {response.status_code}"
+            wait_seconds = EndpointLatencyBudget.backoff_seconds(attempt=attempt)
+            is_last_attempt = attempt == VARS.web_retry_attempts - 1
+            if is_last_attempt or (deadline is not None and time.monotonic() + wait_seconds >= deadline):
+                break
+            print(f"Attempt {attempt + 1} of {VARS.web_retry_attempts} failed ({host} {feed_type}): {failure}. "
+                  f"Retrying in {round(wait_seconds, 2)}s")
+            time.sleep(wait_seconds)
+        if response is not None:
+            return response
+        raise failure
 
 
 class WebFunctionality:
     """
     Static class at time of implementation, contains make_web_request() for use by all providers in web transactions
+    All requests go through the single shared WebClient so that connections are pooled for the whole run.
     """
 
+    CLIENT = WebClient()
+
     @staticmethod
-    def make_web_request(uri, payload=None, style="GET", headers=None):
+    def make_web_request(uri, payload=None, style="GET", headers=None, feed_type="default", deadline=None):
         """
         Static method available to all provider classes for use in making web requests
         NOTE: In requests module, pass dict directly using the json parameter and it will be encoded automatically
            If use data= then must use json.dumps(payload) before passing it in
         :param uri: web path to which to make request
         :param payload: payload, if present, to pass in request
-        :param style: style of the request, example: GET POST etc...
+        :param style: style of the request, example: GET POST_data POST_json
         :param headers: request headers
+        :param feed_type: metadata, date_created, configuration, data, or default. Determines timeouts.
+        :param deadline: time.monotonic() value after which no further time is spent on the request, or None
         :return: response, unless exception and then message returned
         """
 
         try:
-            return {"GET": requests.get(url=uri, params=payload),
-                    "POST_data": requests.post(url=uri, data=payload, headers=headers),
-                    "POST_json": requests.post(url=uri, json=payload, headers=headers),
-                    }.get(style)
+            return WebFunctionality.CLIENT.request(uri=uri, payload=payload, style=style, headers=headers,
+                                                   feed_type=feed_type, deadline=deadline)
         except KeyError as ke:
             message = f"{style} not yet supported"
             print(message, ke)
@@ -36,4 +367,3 @@ class WebFunctionality:
             message = f"ConnectionResetError encountered. {uri}"
             print(message, cre)
             return message
-
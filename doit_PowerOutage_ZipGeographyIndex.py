@@ -0,0 +1,90 @@
+"""
+Module containing a ZipGeographyIndex class, the single lookup for zip code geography.
+The index is built once, at import of the provider classes, from the zip code inventories in the centralized variables:
+the Maryland polygon geometry zips (with town names), the Maryland point geometry zips, and the District of Columbia
+zips. Membership, state, and town name questions are answered with set and dict lookups instead of scans of lists.
+"""
+
+import PowerOutages.doit_PowerOutage_CentralizedVariables as VARS
+import types
+
+
+class ZipGeographyIndex:
+    """
+    Immutable index of zip codes with geometry, and their state and town name.
+    Lookups are by zip code str. A Maryland zip is one with polygon or point geometry.
+    """
+
+    DISTRICT_OF_COLUMBIA = "DC"
+    MARYLAND = "MD"
+
+    __slots__ = ("district_of_columbia_zips", "maryland_zips", "point_geometry_zips", "polygon_geometry_zips",
+                 "town_name_by_zip")
+
+    def __init__(self, polygon_geometry_zips_to_town: dict = VARS.maryland_master_inventory_zip_codes_polygon_geometry,
+                 point_geometry_zips=VARS.maryland_master_inventory_zip_codes_point_geometry,
+                 district_of_columbia_zips=VARS.district_of_columbia_zip_code_inventory_from_web):
+        self.district_of_columbia_zips = frozenset(district_of_columbia_zips)
+        self.point_geometry_zips = frozenset(point_geometry_zips)
+        self.polygon_geometry_zips = frozenset(polygon_geometry_zips_to_town.keys())
+        self.maryland_zips = self.point_geometry_zips | self.polygon_geometry_zips
+        self.town_name_by_zip = types.MappingProxyType(dict(polygon_geometry_zips_to_town))
+
+    def __setattr__(self, name, value):
+        if hasattr(self, name):
+            raise AttributeError(f"ZipGeographyIndex is immutable, can't set {name}")
+        super(ZipGeographyIndex, self).__setattr__(name, value)
+
+    def determine_state_abbrev(self, zip_code: str, require_polygon_geometry: bool = False):
+        """
+        Determine if a zip code is in MD or DC. MD is checked first.
+        :param zip_code: zip code str
+        :param require_polygon_geometry: True to only treat zips with polygon geometry as MD
+        :return: "MD", "DC", or None if the zip is in neither inventory
+        """
+        maryland_zips = self.polygon_geometry_zips if require_polygon_geometry else self.maryland_zips
+        if zip_code in maryland_zips:
+            return ZipGeographyIndex.MARYLAND
+        if zip_code in self.district_of_columbia_zips:
+            return ZipGeographyIndex.DISTRICT_OF_COLUMBIA
+        return None
+
+    def get_town_name(self, zip_code: str):
+        """
+        Get the town name of a polygon geometry zip code
+        :param zip_code: zip code str
+        :return: str town name, or None if the zip has no polygon geometry
+        """
+        return self.town_name_by_zip.get(zip_code)
+
+    def has_point_geometry(self, zip_code: str) -> bool:
+        """
+        Whether the zip code is in the Maryland point geometry inventory
+        :param zip_code: zip code str
+        :return: bool
+        """
+        return zip_code in self.point_geometry_zips
+
+    def has_polygon_geometry(self, zip_code: str) -> bool:
+        """
+        Whether the zip code is in the Maryland polygon geometry inventory
+        :param zip_code: zip code str
+        :return: bool
+        """
+        return zip_code in self.polygon_geometry_zips
+
+    def is_district_of_columbia(self, zip_code: str) -> bool:
+        """
+        Whether the zip code is in the District of Columbia inventory
+        :param zip_code: zip code str
+        :return: bool
+        """
+        return zip_code in self.district_of_columbia_zips
+
+    def is_maryland(self, zip_code: str) -> bool:
+        """
+        Whether the zip code is in Maryland, having polygon or point geometry
+        :param zip_code: zip code str
+        :return: bool
+        """
+        return zip_code in self.maryland_zips